@@ -0,0 +1,220 @@
+import json
+import os
+import threading
+
+from edit_history import EditHistory, command_from_record, command_to_record
+from save_queue import atomic_write
+
+
+class AnnotationJournal:
+    """주석 편집을 저장 경로의 추가 전용 로그에 남겨 비정상 종료 후 저장하지 않은 편집을 복구하는 저널
+
+    편집마다 JSON 한 줄을 쓰고, 디스크 동기화(fsync)는 SYNC_INTERVAL마다 백그라운드 스레드에서 한 번에 한다.
+    (이미지, 모드)별 기록은 라벨 파일의 객체 수(base)에서 시작하는 명령 목록이다.
+        open  - 불러온 라벨에서 편집 시작 (처음 편집할 때 기록)
+        edit / undo / redo - 편집 명령과 실행 취소/다시 실행
+        save  - 저장 시작 (이 시점의 객체 수가 새 base), saved - 해당 저장이 디스크에 기록됨
+    기록된 저장(saved) 이후의 명령이 남은 항목만 복구 대상이며,
+    복구할 항목이 없으면 파일을 비워 라벨 파일로 정리(compact)한다.
+    저장하지 않고 다른 이미지로 넘어가면 그 이미지의 편집은 버린 것으로 기록한다.
+    """
+    FILE_NAME = ".annotation_journal.jsonl"
+    SYNC_INTERVAL = 1.0  # fsync 주기 (초)
+
+    def __init__(self, save_dir):
+        self.path = os.path.join(save_dir, self.FILE_NAME)
+        self._lock = threading.Lock()
+        self._counts = {}  # (이미지, 모드) -> 라벨 파일의 객체 수 (open 기록의 base)
+        self._open = set()  # 현재 로그 파일에 open/save 기록이 있는 (이미지, 모드)
+        self._unsaved = set()  # 마지막 저장 이후 명령이 기록된 (이미지, 모드)
+        self._saving = {}  # 기록 중인 저장 번호 -> (이미지, 모드)
+        self._next_seq = 1
+        self._recovered = self._read()  # (이미지, 모드) -> (base, 명령 기록 목록)
+        self._rewrite()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._dirty = False  # fsync하지 않은 기록이 있는지 여부
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._sync_loop, name="journal-sync", daemon=True)
+        self._thread.start()
+
+    @property
+    def recovered(self):
+        """복구할 편집이 남은 (이미지, 모드) 목록"""
+        return list(self._recovered)
+
+    def discard_recovered(self):
+        """복구하지 않기로 한 기록 삭제"""
+        with self._lock:
+            self._recovered.clear()
+            self._unsaved.clear()
+            self._truncate()
+
+    def begin(self, image, mode, count):
+        """라벨을 불러온 직후 호출 - 복구할 편집이 있으면 명령 기록 목록을 반환
+
+        불러온 객체 수가 기록된 base와 다르면 (라벨 파일이 그사이 바뀜) 복구하지 않는다.
+        저장하지 않고 떠난 다른 이미지의 편집은 여기서 버린다 (복구를 기다리는 항목 제외).
+        """
+        key = (image, mode)
+        with self._lock:
+            abandoned = [k for k in self._unsaved if k[0] != image and k not in self._recovered]
+            for other in abandoned:
+                self._write_open(other, self._counts[other])
+                self._unsaved.discard(other)
+            self._counts[key] = count
+            recovered = self._recovered.pop(key, None)
+            if recovered is not None:
+                base, records = recovered
+                if base == count:
+                    return records  # 기록은 파일에 그대로 두고 이어서 씀
+                print(f"라벨 파일이 바뀌어 복구하지 않습니다: {image} ({mode})")
+            self._open.discard(key)  # 다음 편집은 불러온 상태에서 새로 시작
+            if key in self._unsaved:
+                # 저장하지 않고 다시 불러온 경우 이전 편집은 버림
+                self._unsaved.discard(key)
+                self._write_open(key, count)
+                abandoned.append(key)
+            if abandoned:
+                self._compact()
+        return None
+
+    def record(self, image, mode, command):
+        """편집 명령 기록"""
+        self._append(image, mode, dict(command_to_record(command), op='edit'))
+
+    def record_undo(self, image, mode):
+        self._append(image, mode, {'op': 'undo'})
+
+    def record_redo(self, image, mode):
+        self._append(image, mode, {'op': 'redo'})
+
+    def checkpoint(self, image, mode, count):
+        """저장을 시작할 때 호출 - 저장이 디스크에 기록되면 saved(반환된 번호)를 호출"""
+        key = (image, mode)
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            if key not in self._open:
+                # 저장이 기록되기 전에 중단되면 이후 편집은 이전 라벨 파일 상태에서 이어서 복구
+                self._write_open(key, self._counts.get(key, count))
+            self._counts[key] = count
+            self._unsaved.discard(key)
+            self._saving[seq] = key
+            self._write({'op': 'save', 'image': image, 'mode': mode, 'count': count, 'seq': seq})
+        return seq
+
+    def saved(self, seq):
+        """저장이 디스크에 기록됨 (저장 작업 스레드에서 호출)"""
+        with self._lock:
+            self._saving.pop(seq, None)
+            if not self._compact():
+                self._write({'op': 'saved', 'seq': seq})
+
+    def close(self):
+        """남은 기록을 동기화하고 닫음"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._thread.join()
+        with self._lock:
+            self._sync()
+            self._file.close()
+
+    def _append(self, image, mode, record):
+        key = (image, mode)
+        with self._lock:
+            if key not in self._open:
+                self._write_open(key, self._counts[key])
+            self._unsaved.add(key)
+            record.update(image=image, mode=mode)
+            self._write(record)
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._dirty = True
+
+    def _write_open(self, key, count):
+        """key의 편집 구간을 객체 수 count인 라벨 파일 상태에서 새로 시작"""
+        self._write({'op': 'open', 'image': key[0], 'mode': key[1], 'count': count})
+        self._open.add(key)
+
+    def _compact(self):
+        """남은 편집이 모두 라벨 파일에 들어갔으면 로그를 비우고 True 반환"""
+        if self._unsaved or self._saving or self._recovered:
+            return False
+        self._truncate()
+        return True
+
+    def _truncate(self):
+        self._file.truncate(0)
+        self._open.clear()  # 이후 편집은 open 기록부터 다시 씀
+        self._dirty = True
+
+    def _sync(self):
+        if self._dirty:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._dirty = False
+
+    def _sync_loop(self):
+        while not self._closed.wait(self.SYNC_INTERVAL):
+            with self._lock:
+                try:
+                    self._sync()
+                except (OSError, ValueError) as e:
+                    print(f"편집 기록 동기화 중 오류 발생: {e}")
+
+    def _read(self):
+        """로그를 읽어 마지막으로 기록된 저장 이후 명령이 남은 항목을 찾음"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return {}
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break  # 기록 도중 끊긴 마지막 줄
+        durable = {r['seq'] for r in records if r.get('op') == 'saved'}
+
+        segments = {}  # (이미지, 모드) -> [base, 명령 기록 목록]
+        for r in records:
+            op = r.get('op')
+            if op == 'saved':
+                continue
+            key = (r['image'], r['mode'])
+            if op == 'open' or (op == 'save' and r['seq'] in durable):
+                segments[key] = [r['count'], []]
+            elif op in ('edit', 'undo', 'redo') and key in segments:
+                segments[key][1].append(r)
+        return {key: (base, ops) for key, (base, ops) in segments.items() if ops}
+
+    def _rewrite(self):
+        """복구 대상 기록만 남기도록 로그를 다시 씀"""
+        if not self._recovered and not os.path.exists(self.path):
+            return
+        lines = []
+        for (image, mode), (base, ops) in self._recovered.items():
+            lines.append({'op': 'open', 'image': image, 'mode': mode, 'count': base})
+            lines.extend(ops)
+            self._unsaved.add((image, mode))
+            self._counts[(image, mode)] = base
+            self._open.add((image, mode))
+        atomic_write(self.path, ''.join(json.dumps(r, separators=(',', ':')) + '\n' for r in lines).encode('utf-8'))
+
+
+def replay(records, store):
+    """기록된 편집 명령을 저장소에 다시 적용"""
+    history = EditHistory(max_bytes=float('inf'))  # 실행 취소 기록은 잘라내지 않고 그대로 재현
+    for record in records:
+        op = record['op']
+        if op == 'edit':
+            command = command_from_record({k: v for k, v in record.items() if k not in ('op', 'image', 'mode')})
+            command.redo(store)
+            history.record(command)
+        elif op == 'undo':
+            history.undo(store)
+        elif op == 'redo':
+            history.redo(store)
@@ -0,0 +1,308 @@
+import itertools
+
+import numpy as np
+
+_revision_counter = itertools.count(1)  # 모든 저장소가 공유하는 변경 번호 (겹치지 않음)
+
+
+def _next_revisions(index):
+    """index (정수 또는 구간)의 행마다 새 변경 번호
+
+    구간의 행들이 같은 번호를 받으면 삭제로 행이 당겨졌을 때 변경을 알아챌 수 없으므로 모두 다르게 준다.
+    """
+    if isinstance(index, slice):
+        return np.fromiter(itertools.islice(_revision_counter, index.stop - index.start), dtype=np.int64)
+    return next(_revision_counter)
+
+
+def _grow(array, needed):
+    """needed 행을 담을 수 있도록 배열 용량을 두 배씩 늘림"""
+    if needed <= len(array):
+        return array
+    capacity = max(needed, 2 * len(array), 16)
+    grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class BoxStore:
+    """박스 (x1, y1, x2, y2, class_id)를 (N, 5) float32 배열에 연속으로 저장하는 클래스
+
+    인덱싱/순회 시 (x1, y1, x2, y2, class_id) 튜플을 돌려주므로 기존 리스트처럼 사용할 수 있고,
+    화면 좌표 변환과 정규화는 배열 전체에 한 번에 적용한다.
+    변경될 때마다 version과 해당 행의 revision이 새 번호로 바뀐다.
+    """
+    def __init__(self):
+        self._data = np.zeros((0, 5), dtype=np.float32)
+        self._revisions = np.zeros(0, dtype=np.int64)  # 행별 마지막 변경 번호
+        self._count = 0
+        self.version = next(_revision_counter)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def __getitem__(self, index):
+        x1, y1, x2, y2, class_id = self._data[self._check(index)].tolist()
+        return (x1, y1, x2, y2, int(class_id))
+
+    def __setitem__(self, index, box):
+        index = self._check(index)
+        self._data[index] = box[:5]
+        self._touch(index)
+
+    @property
+    def array(self):
+        """(N, 5) 배열 뷰 (읽기 전용으로 사용)"""
+        return self._data[:self._count]
+
+    @property
+    def class_ids(self):
+        return self._data[:self._count, 4].astype(np.int32)
+
+    @property
+    def revisions(self):
+        return self._revisions[:self._count]
+
+    def append(self, box):
+        self.extend([box])
+
+    def extend(self, boxes):
+        if not isinstance(boxes, np.ndarray):
+            boxes = list(boxes)
+        rows = np.asarray(boxes, dtype=np.float32).reshape(-1, 5)
+        start, end = self._count, self._count + len(rows)
+        self._data = _grow(self._data, end)
+        self._revisions = _grow(self._revisions, end)
+        self._data[start:end] = rows
+        self._count = end
+        self._touch(slice(start, end))
+
+    def insert(self, index, box):
+        """index 위치에 박스를 끼워 넣음 (뒤의 박스는 한 칸씩 밀림)"""
+        index = min(max(index, 0), self._count)
+        self._data = _grow(self._data, self._count + 1)
+        self._revisions = _grow(self._revisions, self._count + 1)
+        self._data[index + 1:self._count + 1] = self._data[index:self._count].copy()
+        self._revisions[index + 1:self._count + 1] = self._revisions[index:self._count].copy()
+        self._data[index] = box[:5]
+        self._count += 1
+        self._touch(index)
+
+    def pop(self, index):
+        index = self._check(index)
+        box = self[index]
+        self._data[index:self._count - 1] = self._data[index + 1:self._count]
+        self._revisions[index:self._count - 1] = self._revisions[index + 1:self._count]
+        self._count -= 1
+        self.version = next(_revision_counter)
+        return box
+
+    def truncate(self, count):
+        """앞의 count개만 남기고 뒤의 박스를 지움"""
+        self._count = min(max(count, 0), self._count)
+        self.version = next(_revision_counter)
+
+    def clear(self):
+        self._count = 0
+        self.version = next(_revision_counter)
+
+    def bounds(self):
+        """박스별 경계 사각형 (N, 4) [x0, y0, x1, y1]"""
+        coords = self.array[:, :4].astype(np.float64)
+        return np.concatenate([np.minimum(coords[:, :2], coords[:, 2:]),
+                               np.maximum(coords[:, :2], coords[:, 2:])], axis=1)
+
+    def scaled(self, scale, origin=(0, 0)):
+        """화면 좌표 (N, 4) int32 - 좌표에 scale을 곱해 정수로 자른 뒤 origin을 뺌"""
+        coords = (self.array[:, :4].astype(np.float64) * scale).astype(np.int32)
+        return coords - np.array([origin[0], origin[1], origin[0], origin[1]], dtype=np.int32)
+
+    def normalized(self, width, height):
+        """YOLO 형식 (N, 4) [x_center, y_center, width, height] (이미지 크기로 정규화)"""
+        coords = self.array[:, :4].astype(np.float64)
+        size = np.array([width, height], dtype=np.float64)
+        center = (coords[:, :2] + coords[:, 2:]) / (2 * size)
+        extent = (coords[:, 2:] - coords[:, :2]) / size
+        return np.concatenate([center, extent], axis=1)
+
+    def _check(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("box index out of range")
+        return index
+
+    def _touch(self, index):
+        self._revisions[index] = _next_revisions(index)
+        self.version = next(_revision_counter)
+
+
+class PolygonStore:
+    """폴리곤을 하나의 꼭지점 버퍼 (V, 2) float32와 폴리곤별 시작 위치(offsets)로 저장하는 클래스
+
+    polygon i의 꼭지점은 vertices[offsets[i]:offsets[i + 1]] 이다.
+    인덱싱/순회 시 (꼭지점 배열 뷰, class_id)를 돌려주며, 꼭지점 수정은 move_vertex/translate로 한다.
+    변경될 때마다 version과 해당 폴리곤의 revision이 새 번호로 바뀐다.
+    """
+    def __init__(self):
+        self._vertices = np.zeros((0, 2), dtype=np.float32)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._class_ids = np.zeros(0, dtype=np.int32)
+        self._revisions = np.zeros(0, dtype=np.int64)
+        self._count = 0
+        self.version = next(_revision_counter)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def __getitem__(self, index):
+        index = self._check(index)
+        return self.points(index), int(self._class_ids[index])
+
+    @property
+    def vertices(self):
+        """모든 폴리곤의 꼭지점 (V, 2) 배열 뷰 (읽기 전용으로 사용)"""
+        return self._vertices[:self._offsets[self._count]]
+
+    @property
+    def offsets(self):
+        """폴리곤별 꼭지점 시작 위치 (N + 1,)"""
+        return self._offsets[:self._count + 1]
+
+    @property
+    def class_ids(self):
+        return self._class_ids[:self._count]
+
+    @property
+    def revisions(self):
+        return self._revisions[:self._count]
+
+    def points(self, index):
+        """폴리곤 하나의 꼭지점 (k, 2) 배열 뷰"""
+        index = self._check(index)
+        return self._vertices[self._offsets[index]:self._offsets[index + 1]]
+
+    def append(self, points, class_id):
+        self.extend([(points, class_id)])
+
+    def extend(self, polygons):
+        polygons = [(np.asarray(points, dtype=np.float32).reshape(-1, 2), class_id)
+                    for points, class_id in polygons]
+        if not polygons:
+            return
+        vertices = np.concatenate([points for points, _ in polygons])
+        offsets = np.concatenate([[0], np.cumsum([len(points) for points, _ in polygons])])
+        self.extend_flat(vertices, offsets, [class_id for _, class_id in polygons])
+
+    def extend_flat(self, vertices, offsets, class_ids):
+        """(꼭지점 (V, 2), 시작 위치 (N + 1,), 클래스 (N,)) 형태의 폴리곤들을 한 번에 추가"""
+        offsets = np.asarray(offsets, dtype=np.int64)
+        count = len(offsets) - 1
+        if count <= 0:
+            return
+        start, end = self._count, self._count + count
+        vertex_start = self._offsets[start]
+        vertex_end = vertex_start + offsets[-1] - offsets[0]
+        self._vertices = _grow(self._vertices, vertex_end)
+        self._offsets = _grow(self._offsets, end + 1)
+        self._class_ids = _grow(self._class_ids, end)
+        self._revisions = _grow(self._revisions, end)
+        self._vertices[vertex_start:vertex_end] = np.asarray(vertices).reshape(-1, 2)[offsets[0]:offsets[-1]]
+        self._offsets[start + 1:end + 1] = offsets[1:] - offsets[0] + vertex_start
+        self._class_ids[start:end] = class_ids
+        self._count = end
+        self._touch(slice(start, end))
+
+    def insert(self, index, points, class_id):
+        """index 위치에 폴리곤을 끼워 넣음 (뒤의 폴리곤과 꼭지점은 밀림)"""
+        index = min(max(index, 0), self._count)
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+        k = len(points)
+        v0, vertex_end = self._offsets[index], self._offsets[self._count]
+        self._vertices = _grow(self._vertices, vertex_end + k)
+        self._offsets = _grow(self._offsets, self._count + 2)
+        self._class_ids = _grow(self._class_ids, self._count + 1)
+        self._revisions = _grow(self._revisions, self._count + 1)
+        self._vertices[v0 + k:vertex_end + k] = self._vertices[v0:vertex_end].copy()
+        self._vertices[v0:v0 + k] = points
+        self._offsets[index + 1:self._count + 2] = self._offsets[index:self._count + 1] + k
+        self._class_ids[index + 1:self._count + 1] = self._class_ids[index:self._count].copy()
+        self._revisions[index + 1:self._count + 1] = self._revisions[index:self._count].copy()
+        self._class_ids[index] = class_id
+        self._count += 1
+        self._touch(index)
+
+    def pop(self, index):
+        index = self._check(index)
+        polygon = (self.points(index).copy(), int(self._class_ids[index]))
+        v0, v1 = self._offsets[index], self._offsets[index + 1]
+        vertex_end = self._offsets[self._count]
+        self._vertices[v0:vertex_end - (v1 - v0)] = self._vertices[v1:vertex_end]
+        self._offsets[index + 1:self._count] = self._offsets[index + 2:self._count + 1] - (v1 - v0)
+        self._class_ids[index:self._count - 1] = self._class_ids[index + 1:self._count]
+        self._revisions[index:self._count - 1] = self._revisions[index + 1:self._count]
+        self._count -= 1
+        self.version = next(_revision_counter)
+        return polygon
+
+    def truncate(self, count):
+        """앞의 count개만 남기고 뒤의 폴리곤을 지움"""
+        self._count = min(max(count, 0), self._count)
+        self.version = next(_revision_counter)
+
+    def clear(self):
+        self._count = 0
+        self.version = next(_revision_counter)
+
+    def move_vertex(self, index, vertex, x, y):
+        """꼭지점 하나를 (x, y)로 이동"""
+        index = self._check(index)
+        self._vertices[self._offsets[index] + vertex] = (x, y)
+        self._touch(index)
+
+    def translate(self, index, dx, dy):
+        """폴리곤 전체를 (dx, dy)만큼 이동"""
+        index = self._check(index)
+        self._vertices[self._offsets[index]:self._offsets[index + 1]] += (dx, dy)
+        self._touch(index)
+
+    def bounds(self):
+        """폴리곤별 경계 사각형 (N, 4) [x0, y0, x1, y1] (꼭지점이 없는 폴리곤은 NaN)"""
+        result = np.full((self._count, 4), np.nan)
+        if self._count == 0:
+            return result
+        starts = self.offsets[:-1]
+        nonempty = np.flatnonzero(np.diff(self.offsets) > 0)
+        if len(nonempty):
+            vertices = self.vertices.astype(np.float64)
+            result[nonempty, :2] = np.minimum.reduceat(vertices, starts[nonempty])
+            result[nonempty, 2:] = np.maximum.reduceat(vertices, starts[nonempty])
+        return result
+
+    def scaled(self, scale, origin=(0, 0)):
+        """모든 꼭지점의 화면 좌표 (V, 2) int32 - scale을 곱해 정수로 자른 뒤 origin을 뺌"""
+        coords = (self.vertices.astype(np.float64) * scale).astype(np.int32)
+        return coords - np.array(origin, dtype=np.int32)
+
+    def normalized(self, width, height):
+        """이미지 크기로 정규화한 모든 꼭지점 (V, 2)"""
+        return self.vertices.astype(np.float64) / np.array([width, height], dtype=np.float64)
+
+    def _check(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("polygon index out of range")
+        return index
+
+    def _touch(self, index):
+        self._revisions[index] = _next_revisions(index)
+        self.version = next(_revision_counter)
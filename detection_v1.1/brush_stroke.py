@@ -0,0 +1,105 @@
+import math
+
+import cv2
+import numpy as np
+
+from display_renderer import clip_rect, union_rect
+
+
+class BrushStroke:
+    """이미지 좌표계의 브러시 스트로크
+
+    마우스 샘플 점들을 선분으로 이어 빠르게 그어도 틈이 생기지 않게 하고,
+    스트로크가 덮는 영역(경계 사각형)을 누적하여 박스 변환과 윤곽선 추출이
+    이미지 전체가 아닌 스트로크 영역에서만 이루어지도록 한다.
+    """
+    def __init__(self, radius, image_size):
+        self.radius = max(1.0, float(radius))  # 이미지 픽셀 단위 브러시 반지름
+        self.image_width, self.image_height = image_size
+        self.points = []  # 이미지 좌표 샘플 점 [(x, y), ...] (추가만 함)
+        self.bounds = None  # 스트로크가 덮는 영역 (x0, y0, x1, y1), 이미지 밖 포함
+        self._end = None  # 스냅샷이면 공유하는 points 중 사용할 점 수
+
+    def add_point(self, x, y):
+        """점을 추가하고 직전 점과의 구간이 덮는 영역을 반환 (이미지 좌표)"""
+        prev = self.points[-1] if self.points else (x, y)
+        self.points.append((x, y))
+        r = self.radius
+        rect = (min(prev[0], x) - r, min(prev[1], y) - r, max(prev[0], x) + r, max(prev[1], y) + r)
+        self.bounds = union_rect(self.bounds, rect)
+        return rect
+
+    def snapshot(self):
+        """현재까지의 스트로크 (작업 스레드에 넘길 때 이후 추가되는 점과 분리)
+
+        점 목록은 추가만 되므로 복사하지 않고 공유하며 지금까지의 점 수만 기억한다 (읽기 전용).
+        """
+        stroke = BrushStroke(self.radius, (self.image_width, self.image_height))
+        stroke.points = self.points
+        stroke.bounds = self.bounds
+        stroke._end = len(self.points)
+        return stroke
+
+    def clipped_bounds(self):
+        """이미지 범위로 자른 정수 경계 (x0, y0, x1, y1), 이미지와 겹치지 않으면 None"""
+        if self.bounds is None:
+            return None
+        x0, y0, x1, y1 = self.bounds
+        return clip_rect((math.floor(x0), math.floor(y0), math.ceil(x1) + 1, math.ceil(y1) + 1),
+                         self.image_width, self.image_height)
+
+    def draw(self, target, scale=1.0, origin=(0, 0), start=0):
+        """points[start:]와 그 직전 점을 잇는 구간을 target에 그리고 갱신 영역을 반환
+
+        점은 scale 배율을 적용한 뒤 origin을 뺀 target 좌표로 그린다.
+        """
+        r = max(1, int(round(self.radius * scale)))
+
+        def to_target(point):
+            return (int(round(point[0] * scale - origin[0])), int(round(point[1] * scale - origin[1])))
+
+        prev = to_target(self.points[start - 1]) if start > 0 else None
+        rect = None
+        for point in self.points[start:self._end]:
+            cur = to_target(point)
+            cv2.circle(target, cur, r, 255, -1)
+            if prev is None:
+                prev = cur
+            elif prev != cur:
+                cv2.line(target, prev, cur, 255, 2 * r + 1)
+            rect = union_rect(rect, (min(prev[0], cur[0]) - r - 1, min(prev[1], cur[1]) - r - 1,
+                                     max(prev[0], cur[0]) + r + 2, max(prev[1], cur[1]) + r + 2))
+            prev = cur
+        return rect
+
+    def rasterize(self):
+        """스트로크 영역 크기의 마스크를 만들어 (마스크, 이미지에서의 좌상단 위치) 반환"""
+        rect = self.clipped_bounds()
+        if rect is None:
+            return None, None
+        x0, y0, x1, y1 = rect
+        mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        self.draw(mask, origin=(x0, y0))
+        return mask, (x0, y0)
+
+    def to_box(self):
+        """스트로크를 감싸는 박스 (x1, y1, x2, y2) - 점 목록과 경계만 사용하므로 O(스트로크)"""
+        rect = self.clipped_bounds()
+        if rect is None:
+            return None
+        x0, y0, x1, y1 = rect
+        return (x0, y0, x1 - 1, y1 - 1)
+
+    def to_polygon(self, epsilon_ratio=0.005):
+        """스트로크 영역에서만 윤곽선을 찾아 단순화한 폴리곤 점 목록 (이미지 좌표)"""
+        mask, origin = self.rasterize()
+        if mask is None:
+            return []
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, offset=origin)
+        if not contours:
+            return []
+        # 가장 큰 윤곽선 선택 후 단순화
+        max_contour = max(contours, key=cv2.contourArea)
+        epsilon = epsilon_ratio * cv2.arcLength(max_contour, True)
+        approx = cv2.approxPolyDP(max_contour, epsilon, True)
+        return [(float(x), float(y)) for x, y in approx[:, 0]]
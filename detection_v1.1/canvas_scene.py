@@ -0,0 +1,166 @@
+def bgr_to_hex(color):
+    """OpenCV BGR 색상을 Tk 색상 문자열로 변환"""
+    b, g, r = color
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+class CanvasScene:
+    """박스/폴리곤을 캔버스 아이템으로 유지하는 리테인드 모드 장면
+
+    주석마다 고정된 캔버스 아이템 ID를 가지며, 드래그 중에는 해당 주석의 아이템 좌표만 갱신한다.
+    화면 이동은 태그 단위 move 한 번으로 처리하고, 주석 내용이나 스케일이 바뀔 때만 전체를 맞춘다.
+    """
+    TAG = "annotation"
+    LABEL_COLOR = "#ff0000"
+    LABEL_FONT = ("TkDefaultFont", 9, "bold")
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.box_items = []  # [{'rect': id, 'label': id, 'handles': [id, ...]}, ...]
+        self.polygon_items = []  # [{'shape': id, 'label': id, 'vertices': [id, ...]}, ...]
+        self.key = None  # 마지막으로 반영한 주석 상태
+        self.view = None  # 마지막으로 반영한 (scale, image_x, image_y)
+
+    def clear(self):
+        """장면의 모든 아이템 삭제"""
+        if self.box_items or self.polygon_items:
+            self.canvas.delete(self.TAG)
+        self.box_items = []
+        self.polygon_items = []
+        self.key = None
+        self.view = None
+
+    def sync(self, app):
+        """앱의 주석 상태를 캔버스 아이템에 반영 (바뀐 것이 없으면 아무 것도 하지 않음)"""
+        key = app.get_annotation_key()
+        view = (app.scale, app.image_x, app.image_y)
+        if key == self.key and self.view is not None and view[0] == self.view[0]:
+            if view != self.view:
+                # 화면 이동만 있었던 경우 아이템 전체를 한 번에 이동
+                self.canvas.move(self.TAG, view[1] - self.view[1], view[2] - self.view[2])
+                self.view = view
+            return
+
+        self.key = key
+        self.view = view
+        mode = app.label_mode.get()
+        boxes = app.boxes if mode == "bbox" else []
+        polygons = app.polygons if mode == "polygon" else []
+
+        created = self._resize(self.box_items, len(boxes), self._create_box_items)
+        created |= self._resize(self.polygon_items, len(polygons), self._create_polygon_items)
+        for i in range(len(boxes)):
+            self.move_box(app, i)
+            self._style_box(app, i)
+        for i in range(len(polygons)):
+            self._ensure_vertices(i, len(polygons[i][0]))
+            self.move_polygon(app, i)
+            self._style_polygon(app, i)
+        if created:
+            self.canvas.tag_raise(self.TAG)
+
+    def remove_box(self, index):
+        """박스 아이템 삭제 (남은 박스의 아이템 ID는 유지)"""
+        if index < len(self.box_items):
+            self._delete_items(self.box_items.pop(index))
+
+    def remove_polygon(self, index):
+        """폴리곤 아이템 삭제 (남은 폴리곤의 아이템 ID는 유지)"""
+        if index < len(self.polygon_items):
+            self._delete_items(self.polygon_items.pop(index))
+
+    def move_box(self, app, index):
+        """박스 하나의 아이템 좌표만 갱신"""
+        items = self.box_items[index]
+        x1, y1, x2, y2 = self._to_canvas(app, app.boxes[index][:4])
+        self.canvas.coords(items['rect'], x1, y1, x2, y2)
+        self.canvas.coords(items['label'], x1, y1 - 2)
+        r = max(4, int(4 * app.scale))
+        mid_x, mid_y = (x1 + x2) / 2, (y1 + y2) / 2
+        centers = [(x1, y1), (x2, y1), (x1, y2), (x2, y2),
+                   (mid_x, y1), (mid_x, y2), (x1, mid_y), (x2, mid_y)]
+        for handle, (cx, cy) in zip(items['handles'], centers):
+            self.canvas.coords(handle, cx - r, cy - r, cx + r, cy + r)
+
+    def move_polygon(self, app, index):
+        """폴리곤 하나의 아이템 좌표만 갱신"""
+        items = self.polygon_items[index]
+        points = app.polygons.points(index)
+        coords = (points * app.scale + (app.image_x, app.image_y)).ravel().tolist()
+        if len(points) >= 3:
+            self.canvas.coords(items['shape'], *coords)
+            self.canvas.coords(items['label'], coords[0], coords[1] - 2)
+        for j, vertex in enumerate(items['vertices']):
+            cx, cy = coords[2 * j], coords[2 * j + 1]
+            self.canvas.coords(vertex, cx - 4, cy - 4, cx + 4, cy + 4)
+
+    def _to_canvas(self, app, values):
+        """이미지 좌표 [x, y, x, y, ...]를 캔버스 좌표로 변환"""
+        return [v * app.scale + (app.image_x if k % 2 == 0 else app.image_y)
+                for k, v in enumerate(values)]
+
+    def _resize(self, items, count, create):
+        """아이템 묶음 수를 count에 맞추고 새로 만든 아이템이 있는지 반환"""
+        while len(items) > count:
+            self._delete_items(items.pop())
+        created = len(items) < count
+        while len(items) < count:
+            items.append(create())
+        return created
+
+    def _create_box_items(self):
+        c = self.canvas
+        return {
+            'rect': c.create_rectangle(0, 0, 0, 0, width=2, tags=(self.TAG,)),
+            'label': c.create_text(0, 0, anchor='sw', fill=self.LABEL_COLOR,
+                                   font=self.LABEL_FONT, tags=(self.TAG,)),
+            'handles': [c.create_oval(0, 0, 0, 0, width=0, state='hidden', tags=(self.TAG,))
+                        for _ in range(8)],
+        }
+
+    def _create_polygon_items(self):
+        c = self.canvas
+        return {
+            'shape': c.create_polygon(0, 0, 0, 0, 0, 0, fill='', width=2, tags=(self.TAG,)),
+            'label': c.create_text(0, 0, anchor='sw', fill=self.LABEL_COLOR,
+                                   font=self.LABEL_FONT, tags=(self.TAG,)),
+            'vertices': [],
+        }
+
+    def _ensure_vertices(self, index, count):
+        vertices = self.polygon_items[index]['vertices']
+        while len(vertices) > count:
+            self.canvas.delete(vertices.pop())
+        while len(vertices) < count:
+            vertices.append(self.canvas.create_oval(0, 0, 0, 0, width=0, state='hidden',
+                                                    tags=(self.TAG,)))
+
+    def _delete_items(self, items):
+        for value in items.values():
+            for item in (value if isinstance(value, list) else [value]):
+                self.canvas.delete(item)
+
+    def _style_box(self, app, index):
+        items = self.box_items[index]
+        class_id = app.boxes[index][4]
+        selected = app.edit_mode and index == app.selected_box
+        self.canvas.itemconfigure(items['rect'], outline=bgr_to_hex(app.get_box_color(index, class_id)),
+                                  fill='#00ffff' if selected else '', stipple='gray12' if selected else '')
+        self.canvas.itemconfigure(items['label'], text=str(class_id))
+        handle_color = (255, 0, 0) if index == app.selected_box else (0, 255, 255)
+        for handle in items['handles']:
+            self.canvas.itemconfigure(handle, fill=bgr_to_hex(handle_color),
+                                      state='normal' if app.edit_mode else 'hidden')
+
+    def _style_polygon(self, app, index):
+        items = self.polygon_items[index]
+        points, class_id = app.polygons[index]
+        visible = len(points) >= 3
+        color = bgr_to_hex(app.get_polygon_color(index, class_id))
+        self.canvas.itemconfigure(items['shape'], outline=color, state='normal' if visible else 'hidden')
+        self.canvas.itemconfigure(items['label'], text=str(class_id), state='normal' if visible else 'hidden')
+        show_vertices = visible and app.edit_mode and index == app.selected_polygon
+        for j, vertex in enumerate(items['vertices']):
+            point_color = (255, 0, 0) if j == app.selected_point else (255, 255, 0)
+            self.canvas.itemconfigure(vertex, fill=bgr_to_hex(point_color),
+                                      state='normal' if show_vertices else 'hidden')
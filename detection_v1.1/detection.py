@@ -6,23 +6,67 @@ import tkinter as tk
 from PIL import Image, ImageTk
 import threading
 import sys
+import bisect
+import multiprocessing
+
+from annotation_journal import AnnotationJournal, replay
+from annotation_store import BoxStore, PolygonStore
+from canvas_scene import CanvasScene
+from filmstrip import Filmstrip
+from bmp_loader import load_image
+from brush_stroke import BrushStroke
+from display_renderer import DisplayRenderer
+from edit_history import (AddBox, AddBoxes, AddPolygon, AddPolygons, DeleteBox, DeletePolygon, EditHistory,
+                          MoveVertex, SetBox, TranslatePolygon)
+from image_cache import ImageCache
+from image_pyramid import ImagePyramid, decode_reduced
+from render_scheduler import RenderScheduler
+from spatial_index import SpatialIndex
+from image_scanner import ImageFolderScanner, natural_key
+from label_index import LabelIndex
+from label_codec import LabelCache, format_boxes, format_polygons
+from prelabel import Prelabeler, box_iou, proposals_to_polygons
+from save_queue import SaveQueue, atomic_write, is_same_content, link_or_copy
+from smart_brush import GRABCUT, SmartBrush
+from thumbnail_cache import ThumbnailCache
 
 class DetectionApp:
+    TARGET_FPS = 60  # 마우스 이동 중 화면 갱신 목표 FPS (드래그 중 다시 그리는 최대 횟수)
+    PYRAMID_POLL_MS = 50  # 피라미드 생성 완료 확인 주기
+    SAVE_POLL_MS = 100  # 백그라운드 저장 결과 확인 주기
+    SCAN_POLL_MS = 200  # 이미지 폴더 스캔/감시 결과 확인 주기
+    THUMB_POLL_MS = 100  # 썸네일 생성 완료 확인 주기
+    PREDICT_POLL_MS = 100  # 자동 라벨 예측 완료 확인 주기
+    SMART_POLL_MS = 30  # 스마트 브러시 계산 완료 확인 주기
+    SMART_BRUSH_METHOD = GRABCUT  # 스마트 브러시 경계 보정 방식 (GRABCUT 또는 WATERSHED)
+    PRELABEL_AHEAD = 8  # 현재 이미지 다음으로 미리 예측할 이미지 수
+    PRELABEL_DUPLICATE_IOU = 0.5  # 같은 클래스의 기존 주석과 이 IoU보다 겹치는 제안은 추가하지 않음
+    PRELABEL_TILE_SIZE = 640  # 타일 예측의 타일 크기 (원본 픽셀)
+    PRELABEL_TILE_OVERLAP = 0.2  # 이웃 타일과 겹치는 비율
+    PRELABEL_TILE_WORKERS = 2  # 타일을 나눠 예측할 스레드 수
+    SCAN_STARTUP_WAIT = 0.5  # 시작 시 폴더 스캔이 끝나기를 기다리는 최대 시간 (초)
+    VERTEX_PICK_PX = 5  # 폴리곤 꼭지점 선택 범위 (화면 픽셀)
+    HANDLE_SIZE_PX = 12  # 박스 크기 조절 핸들 범위 (화면 픽셀)
+
     def __init__(self, window):
         self.window = window
         self.window.title("객체 검출 라벨링 도구")
         
         # 기본 설정
         self.target_size = (800, 600)  # 디스플레이 크기를 800x600으로 조정
-        self.scale = 1.0  # 기본 스케일
-        self.min_scale = 0.1  # 최소 스케일
-        self.max_scale = 5.0  # 최대 스케일
+        self.scale = 1.0  # 화면 배율 (원본 이미지 1픽셀이 화면에서 차지하는 픽셀 수)
+        self.fit_scale = 1.0  # 이미지를 캔버스에 맞추는 배율
+        self.min_scale = 0.1  # 최소 스케일 (캔버스에 맞춘 배율 기준)
+        self.max_scale = 5.0  # 최대 스케일 (원본 픽셀 기준)
         self.save_dir = None  # 저장 경로 초기화
         self.image_dir = None  # 이미지 폴더 초기화
         
         # 라벨링 모드 설정
         self.label_mode = tk.StringVar(value="bbox")  # 기본값을 bbox로 설정
         
+        # 주석을 캔버스 아이템으로 표시할지 여부 (V 키로 전환)
+        self.vector_annotations = tk.BooleanVar(value=False)
+        
         # 모드별 이미지 인덱스 관리
         self.mode_indices = {
             "bbox": 0,
@@ -65,12 +109,9 @@ class DetectionApp:
             self.window.quit()
             return
             
-        # 이미지 파일 리스트 가져오기
-        self.image_files = [f for f in os.listdir(self.image_dir) 
-                          if f.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp'))]
-        self.image_files.sort()
-        
-        if not self.image_files:
+        # 이미지 파일 리스트 가져오기 (백그라운드 스캔, 이후 새 파일 감시)
+        self.image_scanner = None
+        if not self.scan_image_folder(self.image_dir):
             messagebox.showwarning("경고", "선택한 폴더에 이미지 파일이 없습니다.")
             self.window.quit()
             return
@@ -86,25 +127,76 @@ class DetectionApp:
         self.current_index = 0
         self.drawing = False
         self.brush_size = 20
-        self.mask = None
+        self.stroke = None  # 진행 중인 브러시 스트로크 (이미지 좌표)
+        
+        # 폴리곤 브러시를 물체 경계에 맞게 보정하는 스마트 브러시 (G 키, 작업 스레드에서 계산)
+        self.smart_brush_enabled = tk.BooleanVar(value=False)
+        self.smart_brush = SmartBrush(self.SMART_BRUSH_METHOD)
+        self.smart_preview = None  # (스트로크, 보정된 점 목록) - 그리는 중 표시할 미리보기
+        self.smart_pending = {}  # 최종 보정을 기다리는 스트로크 -> (이미지 파일, 클래스)
         self.current_class = 0
         self.delete_mode = False
         self.edit_mode = False  # 편집 모드 추가
         self.selected_box = None
         self.drag_start = None
         self.resize_handle = None  # 크기 조절 핸들 위치
-        self.boxes = []
+        self.boxes = BoxStore()  # (N, 5) 배열 [x1, y1, x2, y2, class_id]
         self.temp_image = None
-        self.original = None
+        self.original = None  # 원본 해상도 이미지 (미리보기를 표시 중이면 디코딩이 끝날 때까지 None)
+        self.image_size = None  # 원본 크기 (width, height) - 라벨 좌표 기준
+        self.image_entry = None  # 현재 이미지의 캐시 항목 (디코딩된 이미지)
+        
+        # 이미지 미리 디코딩 캐시
+        self.prefetch_ahead = 3  # 미리 디코딩할 다음 이미지 수
+        self.prefetch_behind = 1  # 미리 디코딩할 이전 이미지 수
+        self.image_cache = ImageCache(self.load_image_entry, max_bytes=512 * 1024 * 1024)
+        self.label_cache = LabelCache()  # 파싱한 라벨 파일 (경로와 수정 시간으로 검증)
+        
+        # 저장 경로 전체의 라벨 색인 (미라벨/클래스별 이미지 찾기)
+        self.label_index = LabelIndex(self.save_dir)
+        self.label_index.refresh_async()
+        
+        # 필름 스트립 썸네일 (프로세스 풀에서 생성, 저장 경로 아래에 디스크 캐시)
+        self.thumbnails = ThumbnailCache(os.path.join(self.save_dir, ".thumbnails"))
+        
+        # 모델 자동 라벨 (모델을 선택하면 작업 스레드에서 다음 이미지들을 미리 예측)
+        self.prelabeler = None
+        self.prelabel_model = None  # 선택한 ONNX 모델 경로
+        self.prelabel_loading = False  # 작업 스레드에서 모델을 불러오는 중인지 여부
+        self.prelabel_auto = tk.BooleanVar(value=False)  # 라벨이 없는 이미지를 열면 제안을 바로 추가
+        self.prelabel_tiled = tk.BooleanVar(value=False)  # 큰 이미지를 타일로 나눠 예측 (작은 객체용)
+        self.prediction_pending = None  # 예측이 끝나면 적용할 (이미지 경로, 자동 여부)
+        
+        # 백그라운드 저장 큐 (종료 시 남은 저장을 모두 기록)
+        self.save_queue = SaveQueue(maxsize=16)
+        self.window.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # 저장하지 않은 편집의 복구용 기록 (비정상 종료 대비)
+        self.journal = AnnotationJournal(self.save_dir)
+        recover_index = self.check_journal_recovery()
+        if recover_index is not None:
+            self.current_index = recover_index
         self.photo = None
+        self.image_item = None  # 캔버스의 이미지 아이템 (프레임마다 재생성하지 않음)
+        self.renderer = DisplayRenderer()  # 레이어 캐시 렌더러
+        self.pyramid = None  # 현재 이미지의 축소 피라미드
+        self.pyramid_max_bytes = 64 * 1024 * 1024  # 피라미드 메모리 상한
+        self.render_scheduler = RenderScheduler(self.window, self.render_frame, self.TARGET_FPS)
         
         # 폴리곤 관련 변수
-        self.polygons = []  # [(points, class_id), ...]
+        self.polygons = PolygonStore()  # 꼭지점 버퍼 + 폴리곤별 시작 위치
+        self.saved_versions = {}  # 모드별 마지막으로 불러오거나 저장한 저장소 버전 (변경 추적)
+        self.history = {"bbox": EditHistory(), "polygon": EditHistory()}  # 모드별 실행 취소 기록 (이미지별)
+        self.edit_before = None  # 편집 드래그 시작 시점의 대상 상태 (놓을 때 명령 하나로 기록)
         self.current_polygon = []  # 현재 그리고 있는 폴리곤의 점들
         self.selected_polygon = None  # 선택된 폴리곤 인덱스
         self.selected_point = None  # 선택된 점 인덱스
         self.polygon_edit_mode = False  # 폴리곤 편집 모드
         
+        # 클릭 위치의 주석을 찾기 위한 공간 인덱스 (주석 목록이 바뀌면 바뀐 항목만 갱신)
+        self.box_index = SpatialIndex()
+        self.polygon_index = SpatialIndex()
+        
         # 화면 이동 관련 변수
         self.panning = False  # 화면 이동 중인지 여부
         self.pan_start_x = 0  # 화면 이동 시작 X 좌표
@@ -115,8 +207,14 @@ class DetectionApp:
         # GUI 초기화
         self.initialize_gui()
         
-        # 첫 이미지 로드
+        # 첫 이미지 로드 (복구할 편집이 있으면 그 이미지부터)
+        self.mode_indices[self.label_mode.get()] = self.current_index
         self.load_current_image()
+        self.window.after(self.SAVE_POLL_MS, self.poll_save_results)
+        self.window.after(self.SCAN_POLL_MS, self.poll_image_scanner)
+        self.window.after(self.THUMB_POLL_MS, self.poll_thumbnails)
+        self.window.after(self.PREDICT_POLL_MS, self.poll_predictions)
+        self.window.after(self.SMART_POLL_MS, self.poll_smart_brush)
         
     def initialize_gui(self):
         """GUI를 초기화합니다."""
@@ -173,6 +271,7 @@ class DetectionApp:
         self.canvas = tk.Canvas(self.image_frame, width=self.target_size[0], height=self.target_size[1],
                               bg='gray90', highlightthickness=1, highlightbackground='gray70')
         self.canvas.pack(fill=tk.BOTH, expand=True, padx=2, pady=2)  # 패딩 추가
+        self.scene = CanvasScene(self.canvas)  # 캔버스 아이템 주석 장면
         
         # 마우스 이벤트 바인딩
         self.canvas.bind('<Button-1>', self.on_mouse_down)
@@ -187,6 +286,11 @@ class DetectionApp:
         self.window.bind('<space>', self.on_space_press)
         self.window.bind('<KeyRelease-space>', self.on_space_release)
         
+        # 주변 이미지 썸네일 필름 스트립 (클릭하면 해당 이미지로 이동)
+        self.filmstrip_canvas = tk.Canvas(self.frame, height=Filmstrip.HEIGHT, bg='gray85', highlightthickness=0)
+        self.filmstrip_canvas.pack(fill=tk.X, padx=2, pady=(5, 0))
+        self.filmstrip = Filmstrip(self.filmstrip_canvas, self.thumbnails, self.jump_to_image)
+        
         # 구분선
         ttk.Separator(self.frame, orient='horizontal').pack(fill='x', pady=5)
         
@@ -225,6 +329,22 @@ class DetectionApp:
         self.delete_btn = ttk.Button(self.tool_frame, text="삭제 (R)", width=8, command=self.toggle_delete_mode)  # 너비 조정
         self.delete_btn.pack(side=tk.LEFT, padx=2)
         
+        # 캔버스 아이템 표시 토글
+        ttk.Checkbutton(self.tool_frame, text="벡터 (V)", variable=self.vector_annotations,
+                       command=self.update_display).pack(side=tk.LEFT, padx=2)
+        
+        # 스마트 브러시 토글 (폴리곤 모드)
+        ttk.Checkbutton(self.tool_frame, text="스마트 (G)", variable=self.smart_brush_enabled).pack(side=tk.LEFT, padx=2)
+        
+        # 모델 자동 라벨 프레임
+        self.prelabel_frame = ttk.LabelFrame(self.bottom_frame, text="자동 라벨")
+        self.prelabel_frame.pack(side=tk.LEFT, padx=5)
+        ttk.Button(self.prelabel_frame, text="모델", width=6, command=self.open_model).pack(side=tk.LEFT, padx=2)
+        ttk.Button(self.prelabel_frame, text="적용 (P)", width=8, command=self.apply_predictions).pack(side=tk.LEFT, padx=2)
+        ttk.Checkbutton(self.prelabel_frame, text="자동", variable=self.prelabel_auto).pack(side=tk.LEFT, padx=2)
+        ttk.Checkbutton(self.prelabel_frame, text="타일", variable=self.prelabel_tiled,
+                       command=self.on_prelabel_tiled).pack(side=tk.LEFT, padx=2)
+        
         # 이미지 탐색 프레임
         self.nav_frame = ttk.LabelFrame(self.bottom_frame, text="이미지 탐색")
         self.nav_frame.pack(side=tk.LEFT, padx=5)
@@ -233,6 +353,8 @@ class DetectionApp:
         ttk.Button(self.nav_frame, text="이전 (A)", width=8, command=self.prev_image).pack(side=tk.LEFT, padx=2)  # 너비 조정
         ttk.Button(self.nav_frame, text="다음 (D)", width=8, command=self.next_image).pack(side=tk.LEFT, padx=2)  # 너비 조정
         ttk.Button(self.nav_frame, text="저장 (S)", width=8, command=self.save_result).pack(side=tk.LEFT, padx=2)  # 너비 조정
+        ttk.Button(self.nav_frame, text="미라벨 (N)", width=9, command=self.next_unlabeled).pack(side=tk.LEFT, padx=2)
+        ttk.Button(self.nav_frame, text="클래스 (F)", width=9, command=self.next_with_class).pack(side=tk.LEFT, padx=2)
         
         # 상태 표시 레이블
         self.status_label = ttk.Label(self.frame, text="")
@@ -240,6 +362,9 @@ class DetectionApp:
         
         # 키보드 단축키 바인딩
         self.window.bind('<Key>', self.on_key_press)
+        self.window.bind('<Control-z>', lambda event: self.undo())
+        self.window.bind('<Control-Z>', lambda event: self.redo())  # Ctrl+Shift+Z
+        self.window.bind('<Control-y>', lambda event: self.redo())
         
         # 윈도우가 포커스를 가질 때 키보드 이벤트 활성화
         self.window.focus_force()
@@ -272,8 +397,8 @@ class DetectionApp:
             self.prev_image()  # 이전 이미지로 이동
             event.processed = True
         elif key in ['q', 'q']:
-            # 스케일 리셋 및 화면 중앙 정렬
-            self.scale = 1.0
+            # 스케일 리셋 (캔버스에 맞춤) 및 화면 중앙 정렬
+            self.scale = self.fit_scale
             self.image_offset_x = 0
             self.image_offset_y = 0
             self.update_display()
@@ -282,6 +407,26 @@ class DetectionApp:
         elif key in ['d', 'd']:
             self.next_image()
             event.processed = True
+        elif key == 'n':  # 현재 모드의 라벨이 없는 다음 이미지로 이동
+            self.next_unlabeled()
+            event.processed = True
+        elif key == 'f':  # 선택한 클래스가 있는 다음 이미지로 이동
+            self.next_with_class()
+            event.processed = True
+        elif key == 'c':  # 클래스별 객체 수 표시
+            self.show_class_counts()
+            event.processed = True
+        elif key == 'g':  # 스마트 브러시 전환
+            self.smart_brush_enabled.set(not self.smart_brush_enabled.get())
+            self.update_status(f"스마트 브러시: {'켜짐' if self.smart_brush_enabled.get() else '꺼짐'}")
+            event.processed = True
+        elif key == 'p':  # 모델 예측을 현재 이미지에 추가
+            self.apply_predictions()
+            event.processed = True
+        elif key == 'v':  # V 키로 캔버스 아이템 표시 전환
+            self.vector_annotations.set(not self.vector_annotations.get())
+            self.update_display()
+            event.processed = True
         elif key.isdigit():  # 숫자키를 클래스 선택으로 사용 (1->0, 2->1, ...)
             pressed_key = int(key)
             if pressed_key > 0:  # 0번 키는 무시
@@ -352,11 +497,43 @@ class DetectionApp:
         canvas_y = y * self.scale + self.image_y
         return canvas_x, canvas_y
         
+    def start_stroke(self, x, y):
+        """이미지 좌표 (x, y)에서 브러시 스트로크 시작 (브러시 크기는 화면 픽셀 기준)"""
+        self.stroke = BrushStroke(self.brush_size / self.scale, self.image_size)
+        self.stroke.add_point(x, y)
+        self.request_redraw()
+        
     def is_point_in_box(self, x, y, box):
         """점이 박스 내부에 있는지 확인 (이미지 좌표 기준)"""
         x1, y1, x2, y2 = box[:4]
         return x1 <= x <= x2 and y1 <= y <= y2
         
+    def find_polygon_vertex(self, x, y, tolerance):
+        """(x, y)에서 tolerance 안에 있는 첫 꼭지점 (폴리곤 인덱스, 점 인덱스), 없으면 None"""
+        self.polygon_index.sync(self.polygons)
+        for i in self.polygon_index.query(x, y, tolerance):
+            near = np.all(np.abs(self.polygons.points(i) - (x, y)) <= tolerance, axis=1)
+            if near.any():
+                return i, int(np.argmax(near))
+        return None
+        
+    def find_polygon_at(self, x, y):
+        """(x, y)를 포함하는 첫 폴리곤 인덱스, 없으면 None"""
+        self.polygon_index.sync(self.polygons)
+        for i in self.polygon_index.query(x, y):
+            if self.is_point_in_polygon(x, y, self.polygons.points(i)):
+                return i
+        return None
+        
+    def find_box_at(self, x, y, handle_size=0):
+        """(x, y)를 포함하거나 크기 조절 핸들이 (x, y)에 있는 첫 박스 인덱스, 없으면 None"""
+        self.box_index.sync(self.boxes)
+        for i in self.box_index.query(x, y, handle_size):
+            box = self.boxes[i]
+            if self.is_point_in_box(x, y, box) or (handle_size and self.get_resize_handle(x, y, box)):
+                return i
+        return None
+        
     def on_mouse_down(self, event):
         """마우스 버튼 누름 이벤트"""
         if self.panning:  # 화면 이동 중이면 다른 동작 무시
@@ -368,66 +545,64 @@ class DetectionApp:
         
         if self.label_mode.get() == "polygon":
             if self.edit_mode:
-                # 폴리곤 편집 모드
-                for i, (points, class_id) in enumerate(self.polygons):
-                    for j, (px, py) in enumerate(points):
-                        if abs(x - px) <= 5 and abs(y - py) <= 5:
-                            self.selected_polygon = i
-                            self.selected_point = j
-                            self.drag_start = (x, y)
-                            return
-                            
+                # 폴리곤 편집 모드 (꼭지점 선택 범위는 화면 기준이므로 확대 배율로 나눔)
+                vertex = self.find_polygon_vertex(x, y, self.VERTEX_PICK_PX / self.scale)
+                if vertex is not None:
+                    self.selected_polygon, self.selected_point = vertex
+                    self.drag_start = (x, y)
+                    self.edit_before = tuple(self.polygons.points(vertex[0])[vertex[1]].tolist())
+                    return
+                    
                 # 폴리곤 선택
-                for i, (points, class_id) in enumerate(self.polygons):
-                    if self.is_point_in_polygon(x, y, points):
-                        self.selected_polygon = i
-                        self.drag_start = (x, y)
-                        return
+                i = self.find_polygon_at(x, y)
+                if i is not None:
+                    self.selected_polygon = i
+                    self.drag_start = (x, y)
+                    self.edit_before = tuple(self.polygons.points(i)[0].tolist())  # 이동량 기준 꼭지점
+                    return
                         
             elif self.delete_mode:
                 # 폴리곤 삭제 모드
-                for i, (points, class_id) in enumerate(self.polygons):
-                    if self.is_point_in_polygon(x, y, points):
-                        self.polygons.pop(i)
-                        self.update_display()
-                        self.update_status(f"폴리곤 {i} 삭제됨")
-                        return
+                i = self.find_polygon_at(x, y)
+                if i is not None:
+                    self.record_edit(DeletePolygon(i, *self.polygons.pop(i)))
+                    self.scene.remove_polygon(i)
+                    self.update_display()
+                    self.update_status(f"폴리곤 {i} 삭제됨")
+                    return
                         
             else:
-                # 브러시 모드에서 마스크 초기화
-                self.mask = np.zeros((self.target_size[1], self.target_size[0]), dtype=np.uint8)
-                cv2.circle(self.mask, (event.x, event.y), self.brush_size, 255, -1)
+                # 브러시 모드에서 스트로크 시작
+                self.start_stroke(x, y)
                 
         else:  # bbox mode
             if self.edit_mode:
                 # 이미지 좌표 기준으로 박스 선택
-                found_box = False
-                for i, box in enumerate(self.boxes):
-                    if self.is_point_in_box(x, y, box):
-                        self.selected_box = i
-                        # 크기 조절 핸들 위치 계산 (이미지 좌표 기준)
-                        self.resize_handle = self.get_resize_handle(x, y, box)
-                        self.drag_start = (x, y)
-                        found_box = True
-                        self.update_status(f"박스 {i} 선택됨 (클래스 {box[4]})")
-                        break
-                if not found_box:
+                i = self.find_box_at(x, y, self.HANDLE_SIZE_PX / self.scale)
+                if i is not None:
+                    box = self.boxes[i]
+                    self.selected_box = i
+                    # 크기 조절 핸들 위치 계산 (이미지 좌표 기준)
+                    self.resize_handle = self.get_resize_handle(x, y, box)
+                    self.drag_start = (x, y)
+                    self.edit_before = box
+                    self.update_status(f"박스 {i} 선택됨 (클래스 {box[4]})")
+                else:
                     self.selected_box = None
                     self.resize_handle = None
                     self.drag_start = None
                     self.update_status("편집 모드: 박스를 선택하세요")
             elif self.delete_mode:
                 # 이미지 좌표 기준으로 박스 선택
-                for i, (x1, y1, x2, y2, class_id) in enumerate(self.boxes):
-                    if self.is_point_in_box(x, y, (x1, y1, x2, y2)):
-                        self.boxes.pop(i)
-                        self.update_display()
-                        self.update_status(f"박스 {i} 삭제됨")
-                        break
+                i = self.find_box_at(x, y)
+                if i is not None:
+                    self.record_edit(DeleteBox(i, self.boxes.pop(i)))
+                    self.scene.remove_box(i)
+                    self.update_display()
+                    self.update_status(f"박스 {i} 삭제됨")
             else:
-                # 브러시 모드에서 마스크 초기화 (캔버스 좌표 기준)
-                self.mask = np.zeros((self.target_size[1], self.target_size[0]), dtype=np.uint8)
-                cv2.circle(self.mask, (event.x, event.y), self.brush_size, 255, -1)
+                # 브러시 모드에서 스트로크 시작 (이미지 좌표 기준)
+                self.start_stroke(x, y)
                 
     def on_mouse_move(self, event):
         """마우스 이동 이벤트"""
@@ -438,7 +613,7 @@ class DetectionApp:
             self.image_offset_y += dy
             self.pan_start_x = event.x
             self.pan_start_y = event.y
-            self.update_display()
+            self.request_redraw()
             return
             
         if not self.drawing or self.panning:  # 그리기 중이 아니거나 화면 이동 중이면 무시
@@ -451,22 +626,26 @@ class DetectionApp:
             if self.edit_mode and self.selected_polygon is not None:
                 if self.selected_point is not None:
                     # 점 이동
-                    points, class_id = self.polygons[self.selected_polygon]
-                    points[self.selected_point] = (x, y)
-                    self.polygons[self.selected_polygon] = (points, class_id)
+                    self.polygons.move_vertex(self.selected_polygon, self.selected_point, x, y)
                 else:
                     # 폴리곤 전체 이동
-                    points, class_id = self.polygons[self.selected_polygon]
                     dx = x - self.drag_start[0]
                     dy = y - self.drag_start[1]
-                    new_points = [(px + dx, py + dy) for px, py in points]
-                    self.polygons[self.selected_polygon] = (new_points, class_id)
+                    self.polygons.translate(self.selected_polygon, dx, dy)
                     self.drag_start = (x, y)
-                self.update_display()
-            elif not self.delete_mode and self.mask is not None:
-                # 브러시 모드에서 마스크 그리기
-                cv2.circle(self.mask, (event.x, event.y), self.brush_size, 255, -1)
-                self.update_display()
+                if self.vector_annotations.get():
+                    # 캔버스 아이템 모드: 해당 폴리곤의 좌표만 갱신
+                    self.scene.move_polygon(self, self.selected_polygon)
+                else:
+                    self.request_redraw()
+            elif not self.delete_mode and self.stroke is not None:
+                # 브러시 모드에서 스트로크 이어 그리기
+                self.stroke.add_point(x, y)
+                if self.smart_brush_enabled.get():
+                    # 경계 보정 미리보기는 작업 스레드에서 (끝나면 poll_smart_brush가 표시)
+                    self.smart_brush.request((self.stroke, False), self.get_refine_image(), self.image_size,
+                                             self.stroke.snapshot())
+                self.request_redraw()
                 
         else:  # bbox mode
             if self.edit_mode and self.selected_box is not None and self.drag_start is not None:
@@ -474,10 +653,10 @@ class DetectionApp:
                 dx = x - self.drag_start[0]
                 dy = y - self.drag_start[1]
                 x1, y1, x2, y2, class_id = self.boxes[self.selected_box]
+                min_size = 10 / self.scale  # 최소 크기
                 
                 if self.resize_handle:
                     # 크기 조절 (이미지 좌표 기준)
-                    min_size = 10 / self.scale  # 최소 크기
                     if 'n' in self.resize_handle:
                         y1 = min(y1 + dy, y2 - min_size)
                     if 's' in self.resize_handle:
@@ -492,7 +671,7 @@ class DetectionApp:
                     y1, y2 = y1 + dy, y2 + dy
                     
                 # 경계 체크 (이미지 좌표 기준)
-                h, w = self.original.shape[:2]
+                w, h = self.image_size
                 x1 = max(0, min(x1, w - min_size))
                 y1 = max(0, min(y1, h - min_size))
                 x2 = max(x1 + min_size, min(x2, w))
@@ -500,62 +679,63 @@ class DetectionApp:
                 
                 self.boxes[self.selected_box] = (x1, y1, x2, y2, class_id)
                 self.drag_start = (x, y)
-                self.update_display()
+                if self.vector_annotations.get():
+                    # 캔버스 아이템 모드: 해당 박스의 좌표만 갱신
+                    self.scene.move_box(self, self.selected_box)
+                else:
+                    self.request_redraw()
                 
                 # 상태 업데이트
                 if self.resize_handle:
                     self.update_status(f"박스 크기 조절 중... ({int(x2-x1)}x{int(y2-y1)})")
                 else:
                     self.update_status(f"박스 이동 중... ({int(x1)},{int(y1)})")
-            elif not self.delete_mode and self.mask is not None:
-                # 브러시 모드에서 마스크 그리기 (캔버스 좌표 기준)
-                cv2.circle(self.mask, (event.x, event.y), self.brush_size, 255, -1)
-                self.update_display()
+            elif not self.delete_mode and self.stroke is not None:
+                # 브러시 모드에서 스트로크 이어 그리기 (이미지 좌표 기준)
+                self.stroke.add_point(x, y)
+                self.request_redraw()
                 
     def on_mouse_up(self, event):
         """마우스 버튼 뗌 이벤트"""
         if self.panning:  # 화면 이동 중이면 다른 동작 무시
             return
             
-        if self.drawing and not self.delete_mode and not self.edit_mode and self.mask is not None:
-            if self.label_mode.get() == "polygon":
-                # 마스크에서 윤곽선 찾기
-                contours, _ = cv2.findContours(self.mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                if contours:
-                    # 가장 큰 윤곽선 선택
-                    max_contour = max(contours, key=cv2.contourArea)
-                    # 윤곽선 단순화
-                    epsilon = 0.005 * cv2.arcLength(max_contour, True)
-                    approx = cv2.approxPolyDP(max_contour, epsilon, True)
-                    
-                    # 윤곽선을 폴리곤으로 변환
-                    points = []
-                    for point in approx:
-                        x, y = point[0]
-                        points.append((float(x), float(y)))
-                    
-                    if len(points) >= 3:  # 최소 3개의 점이 필요
-                        # 잠시 대기하여 사용자가 변환 과정을 볼 수 있게 함
-                        self.update_display()
-                        self.window.after(100)  # 100ms 대기
-                        self.polygons.append((points, self.current_class))
-                        self.update_status(f"폴리곤 추가됨 (클래스 {self.current_class})")
-                        print(f"폴리곤 추가됨: {len(points)}개의 점, 클래스 {self.current_class}")  # 디버깅용
-                    else:
-                        self.update_status("폴리곤을 생성하기에는 점이 부족합니다.")
-                self.mask = None
+        if self.drawing and not self.delete_mode and not self.edit_mode and self.stroke is not None:
+            if self.is_smart_brush():
+                # 최종 경계 보정도 작업 스레드에서 - 끝나면 poll_smart_brush가 폴리곤으로 추가
+                # (그때까지 스트로크와 미리보기를 계속 표시)
+                self.smart_pending[self.stroke] = (self.image_files[self.current_index], self.current_class)
+                self.smart_brush.request((self.stroke, True), self.get_refine_image(), self.image_size,
+                                         self.stroke.snapshot(), final=True)
+                self.update_status("스마트 브러시 경계 계산 중...")
+            elif self.label_mode.get() == "polygon":
+                # 스트로크 영역에서만 윤곽선을 찾아 폴리곤으로 변환
+                points = self.stroke.to_polygon()
+                if len(points) >= 3:  # 최소 3개의 점이 필요
+                    # 잠시 대기하여 사용자가 변환 과정을 볼 수 있게 함
+                    self.update_display()
+                    self.window.after(100)  # 100ms 대기
+                    self.polygons.append(points, self.current_class)
+                    self.record_edit(AddPolygon(len(self.polygons) - 1, points, self.current_class))
+                    self.update_status(f"폴리곤 추가됨 (클래스 {self.current_class})")
+                    print(f"폴리곤 추가됨: {len(points)}개의 점, 클래스 {self.current_class}")  # 디버깅용
+                else:
+                    self.update_status("폴리곤을 생성하기에는 점이 부족합니다.")
+                self.stroke = None
                 self.update_display()
             else:  # bbox mode
-                # 마스크를 박스로 변환
-                y_indices, x_indices = np.where(self.mask == 255)
-                if len(y_indices) > 0 and len(x_indices) > 0:
-                    min_y, max_y = np.min(y_indices), np.max(y_indices)
-                    min_x, max_x = np.min(x_indices), np.max(x_indices)
-                    self.boxes.append((min_x, min_y, max_x, max_y, self.current_class))
-                    self.mask = None
+                # 스트로크 경계를 박스로 변환
+                box = self.stroke.to_box()
+                self.stroke = None
+                if box is not None:
+                    self.boxes.append(box + (self.current_class,))
+                    self.record_edit(AddBox(len(self.boxes) - 1, self.boxes[-1]))
                     self.update_display()
                     self.update_status(f"새 박스 추가됨 (클래스 {self.current_class})")
+                else:
+                    self.update_display()
                     
+        self.finish_drag_edit()
         self.drawing = False
         self.selected_box = None
         self.selected_polygon = None
@@ -563,22 +743,112 @@ class DetectionApp:
         self.resize_handle = None
         self.drag_start = None
         
+    def is_smart_brush(self):
+        """폴리곤 모드에서 스마트 브러시를 사용 중인지 확인"""
+        return self.smart_brush_enabled.get() and self.label_mode.get() == "polygon"
+        
+    def get_refine_image(self):
+        """스마트 브러시가 경계를 찾을 이미지 (원본 디코딩 전이면 축소 미리보기)"""
+        return self.original if self.original is not None else self.temp_image
+        
+    def poll_smart_brush(self):
+        """작업 스레드에서 끝난 스마트 브러시 결과를 미리보기로 표시하거나 폴리곤으로 추가"""
+        for (stroke, final), points in self.smart_brush.poll():
+            if final:
+                pending = self.smart_pending.pop(stroke, None)
+                if pending is not None:
+                    self.add_smart_polygon(stroke, points, *pending)
+            elif stroke is self.stroke and self.drawing:
+                self.smart_preview = (stroke, points)
+                self.request_redraw()
+        self.window.after(self.SMART_POLL_MS, self.poll_smart_brush)
+        
+    def add_smart_polygon(self, stroke, points, image_file, class_id):
+        """스마트 브러시로 보정한 폴리곤 추가 (보정에 실패하면 브러시 영역의 윤곽선 사용)"""
+        if image_file != self.image_files[self.current_index]:
+            return
+        if len(points) < 3:
+            points = stroke.to_polygon()
+        if len(points) >= 3:
+            self.polygons.append(points, class_id)
+            self.record_edit(AddPolygon(len(self.polygons) - 1, points, class_id))
+            self.update_status(f"폴리곤 추가됨 (클래스 {class_id}, 스마트 브러시)")
+        else:
+            self.update_status("폴리곤을 생성하기에는 점이 부족합니다.")
+        if self.stroke is stroke:
+            self.stroke = None
+            self.smart_preview = None
+        self.update_display()
+        
+    def cancel_smart_brush(self):
+        """계산 중인 스마트 브러시 결과를 버림 (이미지/모드 변경 시)"""
+        self.smart_brush.cancel()
+        self.smart_pending.clear()
+        self.smart_preview = None
+        
+    def record_edit(self, command):
+        """저장소에 이미 적용한 편집을 현재 모드의 실행 취소 기록과 복구용 기록에 추가"""
+        mode = self.label_mode.get()
+        self.history[mode].record(command)
+        self.journal.record(self.image_files[self.current_index], mode, command)
+        
+    def finish_drag_edit(self):
+        """편집 모드 드래그가 끝나면 시작 상태와 비교하여 바뀐 경우 명령 하나로 기록"""
+        before, self.edit_before = self.edit_before, None
+        if before is None:
+            return
+        if self.label_mode.get() == "polygon":
+            if self.selected_polygon is None:
+                return
+            points = self.polygons.points(self.selected_polygon)
+            if self.selected_point is not None:
+                after = tuple(points[self.selected_point].tolist())
+                if after != before:
+                    self.record_edit(MoveVertex(self.selected_polygon, self.selected_point, before, after))
+            else:
+                dx, dy = points[0, 0] - before[0], points[0, 1] - before[1]
+                if dx or dy:
+                    self.record_edit(TranslatePolygon(self.selected_polygon, float(dx), float(dy)))
+        elif self.selected_box is not None:
+            after = self.boxes[self.selected_box]
+            if after != before:
+                self.record_edit(SetBox(self.selected_box, before, after))
+                
+    def undo(self):
+        """현재 모드의 마지막 편집 되돌리기 (Ctrl+Z)"""
+        self.apply_history(self.history[self.label_mode.get()].undo, self.journal.record_undo,
+                           "실행 취소", "되돌릴 편집이 없습니다.")
+        
+    def redo(self):
+        """되돌린 편집 다시 적용 (Ctrl+Y, Ctrl+Shift+Z)"""
+        self.apply_history(self.history[self.label_mode.get()].redo, self.journal.record_redo,
+                           "다시 실행", "다시 실행할 편집이 없습니다.")
+        
+    def apply_history(self, step, log, action, empty_message):
+        if self.drawing or self.image_size is None:
+            return  # 드래그 중에는 무시
+        mode = self.label_mode.get()
+        command = step(self.get_store(mode))
+        if command is None:
+            self.update_status(empty_message)
+            return
+        log(self.image_files[self.current_index], mode)
+        self.selected_box = None
+        self.selected_polygon = None
+        self.selected_point = None
+        self.update_display()
+        self.update_status(f"{action}: {command.description}")
+        
     def is_point_in_polygon(self, x, y, points):
-        """점이 폴리곤 내부에 있는지 확인"""
-        n = len(points)
-        inside = False
-        p1x, p1y = points[0]
-        for i in range(n + 1):
-            p2x, p2y = points[i % n]
-            if y > min(p1y, p2y):
-                if y <= max(p1y, p2y):
-                    if x <= max(p1x, p2x):
-                        if p1y != p2y:
-                            xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
-                        if p1x == p2x or x <= xinters:
-                            inside = not inside
-            p1x, p1y = p2x, p2y
-        return inside
+        """점이 폴리곤 내부에 있는지 확인 (모든 변에 대해 한 번에 교차 판정)"""
+        points = np.asarray(points, dtype=np.float64)
+        p1x, p1y = points[:, 0], points[:, 1]
+        p2x, p2y = np.roll(p1x, -1), np.roll(p1y, -1)
+        # 변이 점의 수평선과 만나는 경우만 (수평 변은 여기서 제외되므로 분모가 0이 아님)
+        crossing = (y > np.minimum(p1y, p2y)) & (y <= np.maximum(p1y, p2y)) & (x <= np.maximum(p1x, p2x))
+        dy = np.where(p1y != p2y, p2y - p1y, 1.0)
+        xinters = (y - p1y) * (p2x - p1x) / dy + p1x
+        return bool(np.count_nonzero(crossing & ((p1x == p2x) | (x <= xinters))) % 2)
         
     def on_mouse_wheel(self, event):
         """마우스 휠 이벤트 처리 (확대/축소)"""
@@ -600,117 +870,146 @@ class DetectionApp:
         
         # 스케일 업데이트
         new_scale = self.scale * factor
-        if self.min_scale <= new_scale <= self.max_scale:
+        min_scale = self.min_scale * self.fit_scale
+        max_scale = max(self.max_scale, self.max_scale * self.fit_scale)
+        if min_scale <= new_scale <= max_scale and self.temp_image is not None:
+            # 마우스 아래의 이미지 위치가 그대로 남도록 오프셋 조정 (render_frame의 중앙 배치 기준)
+            img_x, img_y = self.get_canvas_to_image_coords(x, y)
+            scaled_w, scaled_h = self.renderer.scaled_size(new_scale)
+            self.image_offset_x = round(x - img_x * new_scale - (self.target_size[0] - scaled_w) // 2)
+            self.image_offset_y = round(y - img_y * new_scale - (self.target_size[1] - scaled_h) // 2)
             self.scale = new_scale
-            self.update_display()
+            self.request_redraw()
             self.update_status(f"확대/축소: {self.scale:.1f}x")
             
+    def request_redraw(self):
+        """다음 프레임에 화면을 다시 그리도록 예약 (연속 이벤트는 한 프레임으로 합쳐짐)"""
+        self.render_scheduler.request()
+
     def update_display(self):
-        """화면 업데이트"""
+        """화면과 상태 표시줄을 즉시 업데이트"""
+        self.render_frame()
+        
+        # 상태 업데이트
+        self.update_status_bar()
+
+    def render_frame(self):
+        """화면 업데이트 (변경된 레이어와 영역만 다시 그림)"""
         if self.temp_image is None:
             return
-            
-        # 캔버스 초기화
-        self.canvas.delete("all")
-        
-        # 배경색 설정
-        self.canvas.configure(bg='gray90')
-        
-        display = self.temp_image.copy()
-        
-        # 현재 이미지 크기 계산
-        h, w = display.shape[:2]
-        scaled_w = int(w * self.scale)
-        scaled_h = int(h * self.scale)
-        
-        # 이미지 크기 조정
-        if self.scale != 1.0:
-            display = cv2.resize(display, (scaled_w, scaled_h), interpolation=cv2.INTER_LINEAR)
-        
+        self.render_scheduler.mark_rendered()
+
+        vector = self.vector_annotations.get()
+        # 캔버스 아이템 모드에서는 주석이 바뀌어도 비트맵을 다시 그리지 않음
+        annotation_key = "vector" if vector else self.get_annotation_key()
+
+        # 이미지를 캔버스 중앙에 배치 (오프셋 적용)
+        scaled_w, scaled_h = self.renderer.scaled_size(self.scale)
+        self.canvas_width = self.target_size[0]
+        self.canvas_height = self.target_size[1]
+        self.image_x = (self.canvas_width - scaled_w) // 2 + self.image_offset_x
+        self.image_y = (self.canvas_height - scaled_h) // 2 + self.image_offset_y
+
+        # 캔버스에 보이는 영역만 렌더링 (스마트 브러시 결과가 있으면 윤곽선 대신 표시)
+        viewport = (self.image_x, self.image_y) + self.get_viewport_size()
+        preview_points = None
+        if self.smart_preview is not None and self.smart_preview[0] is self.stroke:
+            preview_points = self.smart_preview[1]
+        patch, origin, full = self.renderer.render(
+            self.scale, viewport, annotation_key, self.draw_annotations,
+            stroke=self.stroke, contour_preview=self.label_mode.get() == "polygon",
+            preview_points=preview_points)
+
+        if full:
+            # 베이스/주석 레이어가 바뀐 경우에만 PhotoImage를 새로 생성
+            self.photo = ImageTk.PhotoImage(image=Image.fromarray(patch))
+            if self.image_item is None:
+                self.image_item = self.canvas.create_image(0, 0, image=self.photo, anchor=tk.NW)
+            else:
+                self.canvas.itemconfigure(self.image_item, image=self.photo)
+        elif patch is not None:
+            # 변경된 영역만 기존 PhotoImage에 복사
+            patch_photo = ImageTk.PhotoImage(image=Image.fromarray(patch))
+            self.window.tk.call(str(self.photo), "copy", str(patch_photo), "-to", origin[0], origin[1])
+
+        # 렌더링된 영역의 위치에 이미지 아이템 배치
+        window_x, window_y = self.renderer.window[:2]
+        self.canvas.coords(self.image_item, self.image_x + window_x, self.image_y + window_y)
+
+        # 캔버스 아이템 주석 갱신
+        if vector:
+            self.scene.sync(self)
+        else:
+            self.scene.clear()
+
+    def get_viewport_size(self):
+        """캔버스의 실제 표시 크기 (아직 배치되지 않았으면 기본 크기)"""
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if width <= 1 or height <= 1:
+            return self.target_size
+        return width, height
+
+    def get_annotation_key(self):
+        """주석 레이어의 모양을 결정하는 상태 (바뀌었을 때만 주석 레이어를 다시 그림)"""
+        return (self.label_mode.get(), self.edit_mode, self.delete_mode,
+                self.selected_box, self.selected_polygon, self.selected_point,
+                self.boxes.version, self.polygons.version)
+
+    def get_box_color(self, index, class_id):
+        """모드와 선택 상태에 따른 박스 색상 (BGR)"""
+        if self.delete_mode:
+            return (0, 0, 255)
+        if self.edit_mode:
+            if index == self.selected_box:
+                return (255, 255, 0)  # 선택된 박스는 노란색
+            return (0, 255, 255)  # 편집 모드의 다른 박스는 청록색
+        return self.class_colors.get(class_id, (0, 255, 0))
+
+    def get_polygon_color(self, index, class_id):
+        """모드와 선택 상태에 따른 폴리곤 색상 (BGR)"""
+        if self.delete_mode:
+            return (0, 0, 255)
+        if self.edit_mode and index == self.selected_polygon:
+            return (255, 255, 0)
+        return self.class_colors.get(class_id, (0, 255, 0))
+
+    def draw_annotations(self, display, origin=(0, 0)):
+        """스케일이 적용된 베이스 이미지 위에 박스/폴리곤을 그림
+
+        origin은 display의 좌상단이 스케일 적용 이미지에서 차지하는 위치 (보이는 영역만 렌더링할 때 사용)
+        """
+        if self.vector_annotations.get():
+            return  # 캔버스 아이템으로 표시하는 경우 비트맵에는 그리지 않음
+        ox, oy = origin
+
         if self.label_mode.get() == "polygon":
-            # 마스크 표시 (브러시 영역)
-            if self.mask is not None:
-                # 브러시 영역을 반투명하게 표시
-                scaled_mask = cv2.resize(self.mask, (scaled_w, scaled_h), interpolation=cv2.INTER_NEAREST)
-                mask_overlay = display.copy()
-                mask_overlay[scaled_mask == 255] = [0, 255, 0]  # 초록색으로 표시
-                cv2.addWeighted(mask_overlay, 0.3, display, 0.7, 0, display)
-                
-                # 브러시 영역의 윤곽선 표시
-                contours, _ = cv2.findContours(scaled_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-                if contours:
-                    # 가장 큰 윤곽선 선택
-                    max_contour = max(contours, key=cv2.contourArea)
-                    # 윤곽선 단순화
-                    epsilon = 0.005 * cv2.arcLength(max_contour, True)
-                    approx = cv2.approxPolyDP(max_contour, epsilon, True)
-                    # 윤곽선 그리기
-                    cv2.drawContours(display, [approx], -1, (0, 255, 0), 2)
-                    # 윤곽선의 꼭지점 표시
-                    for point in approx:
-                        x, y = point[0]
-                        cv2.circle(display, (x, y), 4, (0, 255, 0), -1)
-            
-            # 폴리곤 표시 (크기 조정된 좌표 사용)
-            for i, (points, class_id) in enumerate(self.polygons):
-                try:
-                    if not points or len(points) < 3:
-                        continue
-                        
-                    color = self.class_colors.get(class_id, (0, 255, 0))
-                    if self.delete_mode:
-                        color = (0, 0, 255)
-                    elif self.edit_mode and i == self.selected_polygon:
-                        color = (255, 255, 0)
-                    
-                    # 점들을 스케일에 맞게 조정
-                    scaled_points = []
-                    for x, y in points:
-                        if isinstance(x, (int, float)) and isinstance(y, (int, float)):
-                            scaled_points.append([int(x * self.scale), int(y * self.scale)])
-                    
-                    if len(scaled_points) >= 3:
-                        points_array = np.array(scaled_points, np.int32)
-                        points_array = points_array.reshape((-1, 1, 2))
-                        cv2.polylines(display, [points_array], True, color, 2)
-                        
-                        if points_array.size > 0:
-                            x, y = points_array[0][0]
-                            cv2.putText(display, str(class_id), (x, y-5),
-                                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
-                        
-                        if self.edit_mode and i == self.selected_polygon:
-                            for j, (px, py) in enumerate(scaled_points):
-                                point_color = (255, 0, 0) if j == self.selected_point else (255, 255, 0)
-                                cv2.circle(display, (px, py), 4, point_color, -1)
-                except Exception as e:
-                    print(f"폴리곤 표시 중 오류 발생: {e}, 폴리곤 {i}")
+            # 폴리곤 표시 (모든 꼭지점을 한 번에 화면 좌표로 변환)
+            scaled = self.polygons.scaled(self.scale, origin)
+            offsets = self.polygons.offsets.tolist()
+            for i, class_id in enumerate(self.polygons.class_ids.tolist()):
+                points_array = scaled[offsets[i]:offsets[i + 1]]
+                if len(points_array) < 3:
                     continue
+                    
+                color = self.get_polygon_color(i, class_id)
+                cv2.polylines(display, [points_array.reshape((-1, 1, 2))], True, color, 2)
                 
-        else:  # bbox mode
-            # 기존 바운딩 박스 표시 코드
-            if self.mask is not None:
-                # 브러시 영역을 반투명하게 표시
-                scaled_mask = cv2.resize(self.mask, (scaled_w, scaled_h), interpolation=cv2.INTER_NEAREST)
-                mask_overlay = display.copy()
-                mask_overlay[scaled_mask == 255] = [0, 255, 0]
-                cv2.addWeighted(mask_overlay, 0.3, display, 0.7, 0, display)
+                x, y = points_array[0].tolist()
+                cv2.putText(display, str(class_id), (x, y-5),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
                 
-            for i, (x1, y1, x2, y2, class_id) in enumerate(self.boxes):
-                # 박스 좌표를 스케일에 맞게 조정
-                scaled_x1 = int(x1 * self.scale)
-                scaled_y1 = int(y1 * self.scale)
-                scaled_x2 = int(x2 * self.scale)
-                scaled_y2 = int(y2 * self.scale)
+                if self.edit_mode and i == self.selected_polygon:
+                    for j, (px, py) in enumerate(points_array.tolist()):
+                        point_color = (255, 0, 0) if j == self.selected_point else (255, 255, 0)
+                        cv2.circle(display, (px, py), 4, point_color, -1)
                 
-                color = self.class_colors.get(class_id, (0, 255, 0))
-                if self.delete_mode:
-                    color = (0, 0, 255)
-                elif self.edit_mode:
-                    if i == self.selected_box:
-                        color = (255, 255, 0)  # 선택된 박스는 노란색
-                    else:
-                        color = (0, 255, 255)  # 편집 모드의 다른 박스는 청록색
+        else:  # bbox mode
+            # 모든 박스 좌표를 한 번에 화면 좌표로 변환
+            scaled = self.boxes.scaled(self.scale, origin).tolist()
+            for i, class_id in enumerate(self.boxes.class_ids.tolist()):
+                scaled_x1, scaled_y1, scaled_x2, scaled_y2 = scaled[i]
+                
+                color = self.get_box_color(i, class_id)
                     
                 # 박스 그리기
                 cv2.rectangle(display, (scaled_x1, scaled_y1), (scaled_x2, scaled_y2), color, 2)
@@ -744,20 +1043,6 @@ class DetectionApp:
                         cv2.rectangle(overlay, (scaled_x1, scaled_y1), (scaled_x2, scaled_y2), (255, 255, 0), -1)
                         cv2.addWeighted(overlay, 0.1, display, 0.9, 0, display)  # 반투명 효과
         
-        # PIL 이미지로 변환 및 표시
-        display_rgb = cv2.cvtColor(display, cv2.COLOR_BGR2RGB)
-        self.photo = ImageTk.PhotoImage(image=Image.fromarray(display_rgb))
-        
-        # 이미지를 캔버스 중앙에 배치 (오프셋 적용)
-        self.canvas_width = self.target_size[0]
-        self.canvas_height = self.target_size[1]
-        self.image_x = (self.canvas_width - scaled_w) // 2 + self.image_offset_x
-        self.image_y = (self.canvas_height - scaled_h) // 2 + self.image_offset_y
-        self.canvas.create_image(self.image_x, self.image_y, image=self.photo, anchor=tk.NW)
-        
-        # 상태 업데이트
-        self.update_status_bar()
-        
     def update_status_bar(self):
         """상태 표시줄 업데이트"""
         mode = self.label_mode.get()
@@ -775,6 +1060,61 @@ class DetectionApp:
         """상태 메시지 업데이트"""
         self.status_label.config(text=message)
         
+    def scan_image_folder(self, folder):
+        """폴더 스캔을 시작하고 첫 이미지 목록을 받아 옴 (이미지가 하나라도 있으면 True)
+
+        작은 폴더는 SCAN_STARTUP_WAIT 안에 스캔이 끝나 정렬된 전체 목록으로 시작하고,
+        큰 폴더는 그때까지 찾은 파일로 먼저 시작한 뒤 나머지는 poll_image_scanner가 채운다.
+        """
+        if self.image_scanner is not None:
+            self.image_scanner.stop()
+        self.image_files = []
+        self.image_sort_keys = []  # image_files와 같은 순서의 자연 정렬 키
+        self.current_index = 0
+        self.image_scanner = ImageFolderScanner(folder)
+        self.image_scanner.start()
+        self.image_scanner.wait(self.SCAN_STARTUP_WAIT)
+        self.add_image_files(self.image_scanner.poll())
+        while not self.image_files and self.image_scanner.scanning:
+            self.image_scanner.wait(0.1)
+            self.add_image_files(self.image_scanner.poll())
+        return bool(self.image_files)
+        
+    def add_image_files(self, names):
+        """새 이미지 이름을 자연 정렬 위치에 끼워 넣음 (보고 있던 이미지는 그대로 유지)
+
+        새 이름만 정렬한 뒤 기존 목록의 구간 사이에 끼워 새 목록을 한 번에 만든다
+        (이름마다 삽입하면 삽입할 때마다 뒤쪽 전체를 옮김).
+        """
+        if not names:
+            return
+        current = self.image_files[self.current_index] if self.image_files else None
+        keys, files = [], []
+        start = 0
+        for key, name in sorted(((natural_key(name), name) for name in names), key=lambda item: item[0]):
+            index = bisect.bisect_right(self.image_sort_keys, key, start)
+            keys += self.image_sort_keys[start:index]
+            files += self.image_files[start:index]
+            keys.append(key)
+            files.append(name)
+            start = index
+        keys += self.image_sort_keys[start:]
+        files += self.image_files[start:]
+        self.image_sort_keys, self.image_files = keys, files
+        if current is not None:
+            self.current_index = self.image_files.index(current, bisect.bisect_left(self.image_sort_keys, natural_key(current)))
+            self.mode_indices[self.label_mode.get()] = self.current_index
+            
+    def poll_image_scanner(self):
+        """백그라운드 스캔/감시에서 찾은 새 이미지를 목록에 반영"""
+        names = self.image_scanner.poll()
+        if names:
+            self.add_image_files(names)
+            self.update_status_bar()
+            self.prefetch_neighbors()
+            self.update_filmstrip()
+        self.window.after(self.SCAN_POLL_MS, self.poll_image_scanner)
+        
     def change_directory(self):
         """이미지 폴더 변경"""
         new_dir = filedialog.askdirectory(title="라벨링할 이미지 폴더를 선택하세요")
@@ -783,11 +1123,8 @@ class DetectionApp:
             # 경로가 너무 길 경우 중간을 ...으로 표시
             display_path = self.shorten_path(new_dir)
             self.img_path_label.config(text=display_path)
-            self.image_files = [f for f in os.listdir(self.image_dir) 
-                              if f.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp'))]
-            self.image_files.sort()
             
-            if not self.image_files:
+            if not self.scan_image_folder(self.image_dir):
                 messagebox.showwarning("경고", "선택한 폴더에 이미지 파일이 없습니다.")
                 return
                 
@@ -799,6 +1136,25 @@ class DetectionApp:
         new_dir = filedialog.askdirectory(title="라벨 저장 경로를 선택하세요")
         if new_dir:
             self.save_dir = new_dir
+            self.label_index = LabelIndex(new_dir)
+            self.label_index.refresh_async()
+            self.save_queue.flush()  # 이전 경로의 저장을 마친 뒤 기록 교체
+            self.journal.close()
+            self.journal = AnnotationJournal(new_dir)
+            recover_index = self.check_journal_recovery()
+            if recover_index is not None:
+                self.jump_to_image(recover_index)
+            elif self.image_files and self.image_size is not None:
+                # 보고 있는 이미지는 다시 불러오지 않으므로 지금 상태에서 편집 기록을 시작
+                for mode in ("bbox", "polygon"):
+                    self.journal.begin(self.image_files[self.current_index], mode, len(self.get_store(mode)))
+            self.thumbnails.shutdown()
+            self.thumbnails = ThumbnailCache(os.path.join(new_dir, ".thumbnails"))
+            self.filmstrip.set_cache(self.thumbnails)
+            self.update_filmstrip()
+            if self.prelabel_model is not None:
+                self.start_prelabeler(self.prelabel_model)  # 예측 캐시도 새 경로 아래에
+                self.request_predictions()
             # 경로가 너무 길 경우 중간을 ...으로 표시
             display_path = self.shorten_path(new_dir)
             self.save_path_label.config(text=display_path)
@@ -839,43 +1195,49 @@ class DetectionApp:
         if not self.image_files:
             return
             
-        image_path = os.path.join(self.image_dir, self.image_files[self.current_index])
         try:
-            self.original = cv2.imdecode(np.fromfile(image_path, dtype=np.uint8), cv2.IMREAD_COLOR)
-            if self.original is None:
-                raise Exception("이미지를 읽을 수 없습니다.")
-                
-            # 이미지 크기 조정 - 여백 최소화
-            h, w = self.original.shape[:2]
-            canvas_aspect = self.target_size[0] / self.target_size[1]
-            image_aspect = w / h
-            
-            # 이미지가 캔버스보다 크면 크기 조정
-            if w > self.target_size[0] or h > self.target_size[1]:
-                if image_aspect > canvas_aspect:
-                    # 이미지가 더 넓은 경우
-                    new_w = self.target_size[0]
-                    new_h = int(new_w / image_aspect)
-                else:
-                    # 이미지가 더 높은 경우
-                    new_h = self.target_size[1]
-                    new_w = int(new_h * image_aspect)
-                    
-                self.original = cv2.resize(self.original, (new_w, new_h))
+            # 미리 디코딩된 이미지가 있으면 캐시에서 바로 사용
+            key = self.get_image_key(self.current_index)
+            self.image_entry = self.image_cache.peek(key)
+            preview = None
+            if self.image_entry is None:
+                # 없으면 화면 배율에 맞는 축소 디코딩(JPEG)으로 먼저 표시하고 원본은 백그라운드에서 디코딩
+                preview = decode_reduced(key[0], self.get_display_scale)
+            if preview is None:
+                self.image_entry = self.image_entry or self.image_cache.get(key)
+                self.original = self.image_entry['image']
+                self.temp_image = self.original
+                h, w = self.original.shape[:2]
+                self.image_size = (w, h)
+                base_level = 0
             else:
-                # 이미지가 캔버스보다 작은 경우 원본 크기 유지
-                pass
+                self.image_entry = None
+                self.original = None
+                self.temp_image, self.image_size, reduction = preview
+                base_level = reduction.bit_length() - 1
+                self.image_cache.prefetch([key])
+            self.prefetch_neighbors()
                 
-            # 이미지를 캔버스 중앙에 배치
-            self.canvas_width = self.target_size[0]
-            self.canvas_height = self.target_size[1]
-            self.image_x = (self.canvas_width - self.original.shape[1]) // 2
-            self.image_y = (self.canvas_height - self.original.shape[0]) // 2
+            # 원본 해상도를 그대로 유지하고, 화면에는 캔버스에 맞는 배율로 표시
+            # (이미지를 바꿔도 사용자가 확대/축소한 상대 배율은 유지)
+            self.scale = self.get_display_scale(self.image_size)
+            self.fit_scale = self.get_fit_scale()
             
-            self.temp_image = self.original.copy()
-            self.boxes = []
-            self.polygons = []  # 폴리곤 모드일 때도 초기화
-            self.mask = None
+            # 축소 표시용 피라미드는 백그라운드에서 생성
+            if self.pyramid is not None:
+                self.pyramid.cancel()
+            self.pyramid = ImagePyramid(self.temp_image, max_bytes=self.pyramid_max_bytes,
+                                        base_level=base_level, size=self.image_size)
+            self.renderer.set_image(self.temp_image, self.pyramid)
+            self.window.after(self.PYRAMID_POLL_MS, self.check_pyramid, self.pyramid)
+            if preview is not None:
+                self.window.after(self.PYRAMID_POLL_MS, self.check_full_image, key, self.pyramid)
+            self.boxes.clear()
+            self.polygons.clear()  # 폴리곤 모드일 때도 초기화
+            for history in self.history.values():
+                history.clear()
+            self.stroke = None
+            self.cancel_smart_brush()
             
             # 기존 라벨 로드
             self.load_existing_labels()
@@ -885,73 +1247,177 @@ class DetectionApp:
             self.image_offset_y = 0
             
             self.update_display()
+            self.update_filmstrip()
             self.update_status(f"이미지 로드됨: {self.image_files[self.current_index]}")
             
+            # 현재와 다음 이미지들의 자동 라벨 예측 요청
+            self.prediction_pending = None
+            self.request_predictions()
+            if self.prelabel_auto.get() and not self.get_store(self.label_mode.get()):
+                self.apply_predictions(auto=True)
+            
         except Exception as e:
             messagebox.showerror("오류", f"이미지 로드 중 오류 발생: {str(e)}")
             
-    def load_existing_labels(self):
-        """기존 라벨 파일 로드"""
-        if not self.save_dir:
+    def get_image_key(self, index):
+        """이미지 캐시 키 (경로, 수정 시간) - 파일이 바뀌면 캐시 미스가 됨"""
+        path = os.path.join(self.image_dir, self.image_files[index])
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        return (path, mtime)
+
+    def load_image_entry(self, key):
+        """이미지를 디코딩하고 두 모드의 라벨 파일을 미리 읽어 둠 (작업 스레드에서도 호출됨)
+
+        비압축 BMP는 디코딩하지 않고 메모리 맵 뷰를 그대로 사용한다 (읽기 전용).
+        """
+        path = key[0]
+        image = load_image(path)
+        if image is None:
+            raise Exception("이미지를 읽을 수 없습니다.")
+            
+        # 라벨 캐시를 미리 채워 두면 표시할 때 디스크를 읽지 않음
+        h, w = image.shape[:2]
+        if self.save_dir:
+            for mode in ("bbox", "polygon"):
+                try:
+                    self.label_cache.load(self.get_label_path(os.path.basename(path), mode), mode, w, h)
+                except Exception:
+                    pass  # 읽기 오류는 표시할 때 다시 읽어서 알림
+        return {'image': image}
+
+    def prefetch_neighbors(self):
+        """다음/이전 이미지들을 백그라운드에서 미리 디코딩"""
+        indices = [self.current_index + i for i in range(1, self.prefetch_ahead + 1)]
+        indices += [self.current_index - i for i in range(1, self.prefetch_behind + 1)]
+        self.image_cache.prefetch([self.get_image_key(i) for i in indices
+                                   if 0 <= i < len(self.image_files)])
+
+    def get_fit_scale(self, size=None):
+        """원본 이미지를 캔버스에 맞추는 배율 (캔버스보다 작은 이미지는 원본 크기 유지)"""
+        w, h = size or self.image_size
+        return min(1.0, self.target_size[0] / w, self.target_size[1] / h)
+        
+    def get_display_scale(self, size):
+        """원본 크기가 size인 이미지를 지금의 상대 배율로 표시할 때의 화면 배율"""
+        return self.scale / self.fit_scale * self.get_fit_scale(size)
+
+    def check_pyramid(self, pyramid):
+        """피라미드 생성이 끝나면 더 알맞은 레벨로 화면을 다시 그림"""
+        if pyramid is not self.pyramid:
+            return  # 이미 다른 이미지로 넘어감
+        if not pyramid.done:
+            self.window.after(self.PYRAMID_POLL_MS, self.check_pyramid, pyramid)
+        elif self.renderer.needs_upgrade():
+            self.update_display()
+            
+    def check_full_image(self, key, pyramid):
+        """미리보기를 표시 중인 이미지의 원본 디코딩이 끝나면 피라미드에 넣음
+
+        원본이 필요한 배율(미리보기 해상도 이상으로 확대)이면 바로 다시 그리고,
+        아니면 다음에 확대할 때 원본 레벨이 쓰인다.
+        """
+        if pyramid is not self.pyramid:
+            return  # 이미 다른 이미지로 넘어감
+        entry = self.image_cache.peek(key)
+        if entry is None and self.image_cache.is_pending(key):
+            self.window.after(self.PYRAMID_POLL_MS, self.check_full_image, key, pyramid)
             return
+        try:
+            # 미리 디코딩이 실패했거나 캐시에서 밀려난 경우 직접 디코딩
+            entry = entry or self.image_cache.get(key)
+        except Exception as e:
+            self.update_status(f"원본 이미지 로드 중 오류 발생: {str(e)}")
+            return
+        self.image_entry = entry
+        self.original = entry['image']
+        pyramid.set_full(self.original)
+        if self.renderer.needs_upgrade():
+            self.update_display()
             
-        mode = self.label_mode.get()
+    def get_label_path(self, image_file, mode):
+        """이미지 파일에 해당하는 모드별 라벨 파일 경로"""
         mode_folder = "bounding" if mode == "bbox" else "poly"
-        label_dir = os.path.join(self.save_dir, mode_folder, "label")
-        label_path = os.path.join(label_dir, os.path.splitext(self.image_files[self.current_index])[0] + '.txt')
+        return os.path.join(self.save_dir, mode_folder, "label", os.path.splitext(image_file)[0] + '.txt')
+
+    def add_parsed_labels(self, mode, parsed):
+        """라벨 코덱의 파싱 결과를 현재 모드의 주석 저장소에 추가 (저장소로 복사됨)"""
+        if mode == "polygon":
+            self.polygons.extend_flat(*parsed)
+        else:
+            self.boxes.extend(parsed)
+            
+    def get_store(self, mode):
+        """모드에 해당하는 주석 저장소"""
+        return self.polygons if mode == "polygon" else self.boxes
         
-        if os.path.exists(label_path):
+    def is_dirty(self, mode):
+        """모드의 주석이 마지막으로 불러오거나 저장한 뒤 바뀌었는지 확인"""
+        return self.saved_versions.get(mode) != self.get_store(mode).version
+        
+    def load_existing_labels(self):
+        """기존 라벨 파일 로드 (모드 전환 시 다시 읽지 않도록 두 모드를 모두 불러 둠)"""
+        if not self.save_dir:
+            return
+            
+        current_mode = self.label_mode.get()
+        w, h = self.image_size
+        for mode in ("bbox", "polygon"):
+            mode_folder = "bounding" if mode == "bbox" else "poly"
+            label_path = self.get_label_path(self.image_files[self.current_index], mode)
+            self.save_queue.wait_for(label_path)  # 아직 기록 중인 저장이 있으면 기다림
+            
+            if os.path.exists(label_path):
+                try:
+                    self.add_parsed_labels(mode, self.label_cache.load(label_path, mode, w, h))
+                    
+                    if mode == current_mode:
+                        count = len(self.get_store(mode))
+                        self.update_status(f"기존 라벨 로드 완료: {count}개의 객체 ({mode_folder} 모드)")
+                    
+                except Exception as e:
+                    if mode == current_mode:
+                        messagebox.showwarning("경고", f"라벨 로드 중 오류 발생: {str(e)}")
+                        self.update_status(f"라벨 로드 실패: {str(e)}")
+                    else:
+                        print(f"{mode_folder} 모드 라벨 로드 중 오류 발생: {e}")
+            elif mode == current_mode:
+                self.update_status(f"기존 라벨 없음 ({mode_folder} 모드)")
+        
+        # 불러온 상태를 저장된 상태로 기록
+        self.saved_versions = {mode: self.get_store(mode).version for mode in ("bbox", "polygon")}
+        
+        # 이전 실행에서 저장하지 않은 편집 복구 (저장되지 않은 변경으로 남음)
+        image_file = self.image_files[self.current_index]
+        for mode in ("bbox", "polygon"):
+            records = self.journal.begin(image_file, mode, len(self.get_store(mode)))
+            if not records:
+                continue
             try:
-                with open(label_path, 'r') as f:
-                    h, w = self.original.shape[:2]
-                    for line in f:
-                        values = line.strip().split()
-                        if not values:  # 빈 줄 건너뛰기
-                            continue
-                            
-                        class_id = int(values[0])
-                        
-                        if mode == "polygon":
-                            # 폴리곤 데이터 로드
-                            try:
-                                points = []
-                                for i in range(1, len(values), 2):
-                                    if i + 1 >= len(values):  # 좌표가 짝이 맞지 않는 경우
-                                        break
-                                    x = float(values[i]) * w
-                                    y = float(values[i+1]) * h
-                                    points.append((x, y))
-                                if len(points) >= 3:  # 최소 3개의 점이 있는 경우만 추가
-                                    self.polygons.append((points, class_id))
-                            except (ValueError, IndexError) as e:
-                                print(f"폴리곤 데이터 로드 중 오류 발생: {e}")
-                                continue
-                        else:
-                            # 바운딩 박스 데이터 로드
-                            try:
-                                if len(values) >= 5:  # 최소한 필요한 값이 있는지 확인
-                                    x_center, y_center, width, height = map(float, values[1:5])
-                                    x1 = int((x_center - width/2) * w)
-                                    y1 = int((y_center - height/2) * h)
-                                    x2 = int((x_center + width/2) * w)
-                                    y2 = int((y_center + height/2) * h)
-                                    self.boxes.append((x1, y1, x2, y2, class_id))
-                            except (ValueError, IndexError) as e:
-                                print(f"바운딩 박스 데이터 로드 중 오류 발생: {e}")
-                                continue
-                            
-                count = len(self.polygons) if mode == "polygon" else len(self.boxes)
-                self.update_status(f"기존 라벨 로드 완료: {count}개의 객체 ({mode_folder} 모드)")
-                
+                replay(records, self.get_store(mode))
+                if mode == current_mode:
+                    self.update_status(f"저장하지 않은 편집 {len(records)}개 복구됨 - 저장하면 라벨 파일에 반영됩니다")
             except Exception as e:
-                messagebox.showwarning("경고", f"라벨 로드 중 오류 발생: {str(e)}")
-                self.update_status(f"라벨 로드 실패: {str(e)}")
-        else:
-            self.update_status(f"기존 라벨 없음 ({mode_folder} 모드)")
+                print(f"편집 복구 중 오류 발생: {image_file} ({mode}): {e}")
+                
+    def check_journal_recovery(self):
+        """이전 실행에서 저장하지 않은 편집이 있으면 복구할지 묻고, 복구할 첫 이미지 인덱스 반환"""
+        images = {image for image, _ in self.journal.recovered}
+        if not images:
+            return None
+        if not messagebox.askyesno("편집 복구", f"저장하지 않은 편집이 있는 이미지가 {len(images)}개 있습니다.\n"
+                                               "복구하시겠습니까?"):
+            self.journal.discard_recovered()
+            return None
+        indices = [i for i, name in enumerate(self.image_files) if name in images]
+        return indices[0] if indices else None
         
     def save_result(self):
         """현재 작업 저장"""
-        if self.label_mode.get() == "polygon":
+        mode = self.label_mode.get()
+        if mode == "polygon":
             if not self.polygons:
                 messagebox.showwarning("경고", "저장할 폴리곤이 없습니다.")
                 return
@@ -966,63 +1432,245 @@ class DetectionApp:
             if not self.save_dir:
                 return
                 
+        self.save_labels(mode)
+        
+    def save_dirty_labels(self):
+        """두 모드 중 저장되지 않은 변경이 있는 모드의 라벨을 저장"""
+        modes = [mode for mode in ("bbox", "polygon") if self.is_dirty(mode) and self.get_store(mode)]
+        if not modes:
+            return
+        if not self.save_dir:
+            messagebox.showwarning("경고", "저장 경로가 선택되지 않았습니다.")
+            self.change_save_directory()
+            if not self.save_dir:
+                return
+        for mode in modes:
+            self.save_labels(mode)
+            
+    def save_labels(self, mode):
+        """모드의 라벨과 이미지를 백그라운드 저장 큐에 넣음"""
         try:
             # 모드별 저장 경로 설정
-            mode = self.label_mode.get()
             mode_folder = "bounding" if mode == "bbox" else "poly"
+            image_file = self.image_files[self.current_index]
             
-            # 저장 디렉토리 생성
             img_dir = os.path.join(self.save_dir, mode_folder, "img")
             label_dir = os.path.join(self.save_dir, mode_folder, "label")
-            os.makedirs(img_dir, exist_ok=True)
-            os.makedirs(label_dir, exist_ok=True)
-            
-            # 이미지 저장
-            img_path = os.path.join(img_dir, self.image_files[self.current_index])
-            cv2.imwrite(img_path, self.original)
+            img_path = os.path.join(img_dir, image_file)
+            label_path = os.path.join(label_dir, os.path.splitext(image_file)[0] + '.txt')
+            source_path = os.path.join(self.image_dir, image_file)
+            # 다른 모드 폴더에 이미 저장된 같은 이미지 (있으면 그 파일에 링크하여 데이터셋에 한 번만 저장)
+            other_folder = "poly" if mode_folder == "bounding" else "bounding"
+            other_img_path = os.path.join(self.save_dir, other_folder, "img", image_file)
             
-            # 라벨 저장
-            label_path = os.path.join(label_dir, os.path.splitext(self.image_files[self.current_index])[0] + '.txt')
+            # 라벨 내용은 현재 상태로 바로 만들어 두고, 디스크 기록만 백그라운드에서 처리
+            w, h = self.image_size
+            if mode == "polygon":
+                text = format_polygons(self.polygons.normalized(w, h), self.polygons.offsets, self.polygons.class_ids)
+            else:
+                text = format_boxes(self.boxes.normalized(w, h), self.boxes.class_ids)
+            label_data = text.encode()
+            image = self.original  # 이미지 배열은 수정되지 않으므로 복사하지 않음
+            journal = self.journal
+            label_index = self.label_index
+            seq = journal.checkpoint(image_file, mode, len(self.get_store(mode)))
             
-            h, w = self.original.shape[:2]
-            with open(label_path, 'w') as f:
-                if mode == "polygon":
-                    for points, class_id in self.polygons:
-                        try:
-                            # 폴리곤 포인트들을 정규화된 좌표로 변환
-                            normalized_points = []
-                            for x, y in points:
-                                if isinstance(x, (int, float)) and isinstance(y, (int, float)):
-                                    normalized_points.append((x/w, y/h))
-                            
-                            if normalized_points:  # 유효한 점이 있는 경우만 저장
-                                points_str = " ".join([f"{x:.6f} {y:.6f}" for x, y in normalized_points])
-                                f.write(f"{class_id} {points_str}\n")
-                        except Exception as e:
-                            print(f"폴리곤 저장 중 오류 발생: {e}")
-                            continue
+            def write():
+                os.makedirs(img_dir, exist_ok=True)
+                os.makedirs(label_dir, exist_ok=True)
+                # 픽셀은 수정하지 않으므로 원본 파일을 다시 인코딩하지 않고 링크 또는 복사
+                if os.path.exists(source_path):
+                    if is_same_content(source_path, other_img_path):
+                        link_or_copy(other_img_path, img_path)
+                    else:
+                        link_or_copy(source_path, img_path)
                 else:
-                    for x1, y1, x2, y2, class_id in self.boxes:
-                        try:
-                            x_center = (x1 + x2) / (2 * w)
-                            y_center = (y1 + y2) / (2 * h)
-                            width = (x2 - x1) / w
-                            height = (y2 - y1) / h
-                            f.write(f"{class_id} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}\n")
-                        except Exception as e:
-                            print(f"바운딩 박스 저장 중 오류 발생: {e}")
-                            continue
-                        
-            self.update_status(f"저장 완료: {self.image_files[self.current_index]} ({mode_folder} 모드)")
+                    # 원본 파일이 사라진 경우에만 메모리의 이미지를 인코딩 (한글 경로 처리를 위해 imencode 사용)
+                    if image is None:
+                        raise Exception(f"원본 이미지를 찾을 수 없습니다: {source_path}")
+                    is_success, buffer = cv2.imencode(os.path.splitext(img_path)[1], image)
+                    if not is_success:
+                        raise Exception(f"이미지 인코딩 실패: {img_path}")
+                    atomic_write(img_path, buffer.tobytes())
+                atomic_write(label_path, label_data)
+                journal.saved(seq)  # 라벨 파일에 반영된 편집 기록 정리
+                label_index.update(mode, os.path.splitext(image_file)[0], label_path)  # 필름 스트립의 라벨 여부 표시용
+                
+            self.save_queue.submit(write, (img_path, label_path), f"{image_file} ({mode_folder} 모드)")
+            self.saved_versions[mode] = self.get_store(mode).version
+            self.update_status(f"저장 중: {image_file} ({mode_folder} 모드)")
             
         except Exception as e:
             messagebox.showerror("오류", f"저장 중 오류 발생: {str(e)}")
             
+    def poll_save_results(self):
+        """백그라운드 저장 결과를 상태 표시줄과 필름 스트립의 라벨 여부 표시에 반영"""
+        saved = False
+        for success, description, error, paths in self.save_queue.poll_results():
+            if success:
+                self.update_status(f"저장 완료: {description}")
+                saved = True
+                continue
+            print(f"저장 중 오류 발생: {description}: {error}")
+            failed = [mode for mode in ("bbox", "polygon") if self.image_files and self.save_dir and
+                      self.get_label_path(self.image_files[self.current_index], mode) in paths]
+            if failed:
+                # 보고 있는 이미지면 해당 모드만 변경 있음으로 표시하여 다시 저장할 수 있게 함
+                for mode in failed:
+                    self.saved_versions.pop(mode, None)
+                self.update_status(f"저장 실패: {description} - {error} (다시 저장하세요)")
+            else:
+                # 이미 떠난 이미지는 저장하지 못한 파일을 알림 (편집 기록은 다음 실행 때 복구할 수 있음)
+                messagebox.showerror("오류", f"저장 실패: {description}\n{paths[-1]}\n{error}")
+        if saved:
+            self.update_filmstrip()  # 저장 작업에서 색인은 이미 갱신됨
+        self.window.after(self.SAVE_POLL_MS, self.poll_save_results)
+        
+    def update_filmstrip(self):
+        """필름 스트립을 현재 이미지 주변으로 갱신"""
+        if not self.image_files:
+            return
+        mode = self.label_mode.get()
+        
+        def is_labeled(index):
+            if index == self.current_index:
+                return len(self.get_store(mode)) > 0  # 현재 이미지는 편집 중인 상태 기준
+            return self.label_index.is_labeled(os.path.splitext(self.image_files[index])[0], mode)
+            
+        self.filmstrip.show(self.image_dir, self.image_files, self.current_index, is_labeled)
+        
+    def open_model(self):
+        """자동 라벨에 사용할 ONNX 모델 선택"""
+        model_path = filedialog.askopenfilename(title="자동 라벨 모델을 선택하세요",
+                                                filetypes=[("ONNX 모델", "*.onnx"), ("모든 파일", "*.*")])
+        if not model_path:
+            return
+        self.start_prelabeler(model_path)
+        self.request_predictions()
+        self.update_status(f"자동 라벨 모델 불러오는 중: {os.path.basename(model_path)}")
+            
+    def start_prelabeler(self, model_path):
+        """모델과 현재 저장 경로의 예측 캐시로 자동 라벨 작업 스레드 시작
+
+        모델은 작업 스레드에서 불러오며, 결과는 poll_predictions가 알린다.
+        """
+        if self.prelabeler is not None:
+            self.prelabeler.shutdown()
+        tiling = None
+        if self.prelabel_tiled.get():
+            tiling = {'tile_size': self.PRELABEL_TILE_SIZE, 'overlap': self.PRELABEL_TILE_OVERLAP,
+                      'workers': self.PRELABEL_TILE_WORKERS}
+        self.prelabeler = Prelabeler(model_path, os.path.join(self.save_dir, ".predictions"), tiling=tiling)
+        self.prelabel_model = model_path
+        self.prelabel_loading = True  # 모델 로드 결과를 아직 알리지 않음
+            
+    def on_prelabel_tiled(self):
+        """타일 예측 전환 - 선택한 모델이 있으면 새 설정으로 다시 시작"""
+        if self.prelabel_model is None:
+            return
+        self.prediction_pending = None
+        self.start_prelabeler(self.prelabel_model)
+        self.request_predictions()
+        mode = "타일" if self.prelabel_tiled.get() else "전체 이미지"
+        self.update_status(f"자동 라벨 예측 방식: {mode}")
+        
+    def request_predictions(self):
+        """현재 이미지와 다음 이미지들을 탐색 순서대로 예측 요청"""
+        if self.prelabeler is None or not self.image_files:
+            return
+        names = self.image_files[self.current_index:self.current_index + 1 + self.PRELABEL_AHEAD]
+        self.prelabeler.request([os.path.join(self.image_dir, name) for name in names])
+        
+    def apply_predictions(self, auto=False):
+        """모델 예측을 현재 모드의 주석으로 추가 (P) - 실행 취소 한 번으로 모두 되돌림
+
+        예측이 아직 끝나지 않았으면 끝나는 대로 적용한다.
+        자동 적용은 현재 이미지에 주석이 없을 때만 한다.
+        """
+        if self.prelabeler is None:
+            if not auto:
+                self.update_status("자동 라벨 모델을 먼저 선택하세요 (모델 버튼)")
+            return
+        if self.image_size is None or self.drawing:
+            return
+        mode = self.label_mode.get()
+        store = self.get_store(mode)
+        if auto and store:
+            return
+        path = os.path.join(self.image_dir, self.image_files[self.current_index])
+        prediction = self.prelabeler.get(path)
+        if prediction is None:
+            self.prediction_pending = (path, auto)
+            self.update_status("자동 라벨 예측 중...")
+            return
+        self.prediction_pending = None
+        
+        # 모르는 클래스와 같은 클래스의 기존 주석과 겹치는 제안은 제외
+        boxes = prediction['boxes']
+        class_ids = boxes[:, 4].astype(np.int64)
+        keep = np.isin(class_ids, list(self.classes))
+        if store and keep.any():
+            iou = box_iou(boxes[:, :4], np.nan_to_num(store.bounds()))
+            same_class = class_ids[:, None] == store.class_ids[None, :]
+            keep &= ~((iou > self.PRELABEL_DUPLICATE_IOU) & same_class).any(axis=1)
+        count = int(keep.sum())
+        if not count:
+            self.update_status("추가할 자동 라벨 제안이 없습니다.")
+            return
+        if mode == "polygon":
+            command = AddPolygons(len(store), *proposals_to_polygons(prediction, keep))
+        else:
+            command = AddBoxes(len(store), boxes[keep, :5])
+        command.redo(store)
+        self.record_edit(command)
+        self.update_display()
+        self.update_filmstrip()
+        self.update_status(f"자동 라벨 제안 {count}개 추가됨 - Ctrl+Z로 되돌릴 수 있습니다")
+        
+    def poll_predictions(self):
+        """예측이 끝난 이미지 중 적용을 기다리는 현재 이미지가 있으면 적용"""
+        if self.prelabeler is not None and self.prelabel_loading and self.prelabeler.loaded.is_set():
+            self.prelabel_loading = False
+            if self.prelabeler.error is not None:
+                messagebox.showerror("오류", f"모델 로드 중 오류 발생: {str(self.prelabeler.error)}")
+                self.prelabeler = None
+                self.prelabel_model = None
+                self.prediction_pending = None
+                self.update_status("자동 라벨 모델을 불러오지 못했습니다.")
+            else:
+                self.update_status(f"자동 라벨 모델 로드됨: {os.path.basename(self.prelabel_model)}")
+        if self.prelabeler is not None:
+            ready = self.prelabeler.poll()
+            if self.prediction_pending is not None and self.prediction_pending[0] in ready:
+                path, auto = self.prediction_pending
+                if path == os.path.join(self.image_dir, self.image_files[self.current_index]):
+                    self.apply_predictions(auto=auto)
+        self.window.after(self.PREDICT_POLL_MS, self.poll_predictions)
+        
+    def poll_thumbnails(self):
+        """프로세스 풀에서 완성된 썸네일을 필름 스트립에 반영"""
+        ready = self.thumbnails.poll()
+        if ready:
+            self.filmstrip.on_ready(ready)
+        self.window.after(self.THUMB_POLL_MS, self.poll_thumbnails)
+        
+    def on_close(self):
+        """창 닫기: 밀린 저장을 모두 기록한 뒤 종료"""
+        self.update_status("저장 중인 작업을 마무리하는 중...")
+        self.save_queue.close()
+        self.journal.close()
+        self.image_cache.shutdown()
+        self.thumbnails.shutdown()
+        if self.prelabeler is not None:
+            self.prelabeler.shutdown(wait=True)
+        self.smart_brush.shutdown()
+        self.image_scanner.stop()
+        self.window.destroy()
+        
     def next_image(self):
         """다음 이미지로 이동"""
-        # 현재 이미지에 박스나 폴리곤이 있으면 저장
-        if self.boxes or self.polygons:
-            self.save_result()
+        # 현재 이미지에 저장되지 않은 박스나 폴리곤이 있으면 저장
+        self.save_dirty_labels()
             
         if self.current_index < len(self.image_files) - 1:
             self.current_index += 1
@@ -1036,6 +1684,62 @@ class DetectionApp:
             self.mode_indices[self.label_mode.get()] = self.current_index  # 현재 모드의 인덱스 업데이트
             self.load_current_image()
             
+    def jump_to_image(self, index):
+        """index 이미지로 바로 이동 (저장되지 않은 변경은 먼저 저장)"""
+        self.save_dirty_labels()
+        self.current_index = index
+        self.mode_indices[self.label_mode.get()] = self.current_index  # 현재 모드의 인덱스 업데이트
+        self.load_current_image()
+        
+    def refresh_label_index(self):
+        """저장하지 않은 변경을 저장하고, 처음 색인이 끝났으면 True 반환
+
+        저장한 라벨은 저장 작업이 색인에 바로 반영하므로 기다리지 않고 지금 색인을 쓴다.
+        바깥에서 바뀐 라벨 파일은 백그라운드에서 갱신하여 다음 검색부터 반영한다.
+        """
+        self.save_dirty_labels()
+        if not self.label_index.ready:
+            self.update_status("라벨 색인을 만드는 중입니다. 잠시 후 다시 시도하세요.")
+            return False
+        self.label_index.refresh_async()
+        return True
+        
+    def find_next_image(self, predicate, description):
+        """현재 이미지 다음부터 (끝에서는 처음으로 돌아가) 조건에 맞는 첫 이미지로 이동"""
+        if not self.save_dir or not self.image_files or not self.refresh_label_index():
+            return
+        count = len(self.image_files)
+        for step in range(1, count + 1):
+            index = (self.current_index + step) % count
+            if predicate(os.path.splitext(self.image_files[index])[0]):
+                self.jump_to_image(index)
+                self.update_status(f"{description} 이미지로 이동: {self.image_files[index]} ({index + 1}/{count})")
+                return
+        self.update_status(f"{description} 이미지가 없습니다")
+        
+    def next_unlabeled(self):
+        """현재 모드의 라벨이 없는 다음 이미지로 이동"""
+        mode = self.label_mode.get()
+        self.find_next_image(lambda stem: not self.label_index.is_labeled(stem, mode), "라벨이 없는")
+        
+    def next_with_class(self):
+        """선택한 클래스의 객체가 있는 다음 이미지로 이동"""
+        mode = self.label_mode.get()
+        class_id = self.current_class
+        self.find_next_image(lambda stem: self.label_index.has_class(stem, mode, class_id),
+                             f"클래스 {class_id} ({self.classes.get(class_id, '')})가 있는")
+        
+    def show_class_counts(self):
+        """현재 모드의 클래스별 객체 수와 이미지 수를 상태 표시줄에 표시"""
+        if not self.save_dir or not self.refresh_label_index():
+            return
+        mode = self.label_mode.get()
+        counts = self.label_index.class_counts(mode)
+        parts = [f"{class_id} {self.classes.get(class_id, '?')}: {objects}개/{images}장"
+                 for class_id, (objects, images) in sorted(counts.items())]
+        labeled = self.label_index.labeled_count(mode)
+        self.update_status(f"라벨된 이미지 {labeled}/{len(self.image_files)}장 | " + (", ".join(parts) or "객체 없음"))
+        
     def load_classes(self, application_path):
         """클래스 설정 파일 로드"""
         try:
@@ -1067,7 +1771,7 @@ class DetectionApp:
             self.selected_point = None
             self.resize_handle = None
             self.drag_start = None
-            self.mask = None
+            self.stroke = None
             self.update_display()  # 화면 갱신
             event.processed = True
             
@@ -1081,7 +1785,7 @@ class DetectionApp:
     def get_resize_handle(self, x, y, box):
         """박스의 크기 조절 핸들 위치 반환 (이미지 좌표 기준)"""
         x1, y1, x2, y2 = box[:4]
-        handle_size = 12 / self.scale  # 핸들 크기를 더 크게 조정
+        handle_size = self.HANDLE_SIZE_PX / self.scale  # 화면 기준 핸들 크기를 이미지 좌표로 변환
         
         # 모서리 핸들
         if abs(x - x1) <= handle_size and abs(y - y1) <= handle_size:
@@ -1108,93 +1812,41 @@ class DetectionApp:
         return None
 
     def on_label_mode_change(self):
-        """라벨링 모드 변경 시 호출되는 함수"""
+        """라벨링 모드 변경 시 호출되는 함수
+
+        두 모드의 주석을 모두 메모리에 두므로 파일을 다시 읽지 않고 보여주는 모드만 바꾼다.
+        저장하지 않은 다른 모드의 편집 내용도 그대로 유지된다.
+        """
         mode = self.label_mode.get()
         # 현재 모드의 인덱스 저장
         self.mode_indices[mode] = self.current_index
         
-        # 새 모드의 인덱스로 변경
-        self.current_index = self.mode_indices[mode]
-        
-        # 현재 이미지 정보 저장
-        current_image = self.image_files[self.current_index] if self.image_files else None
+        # 진행 중인 선택/그리기 초기화
+        self.current_polygon = []
+        self.selected_box = None
+        self.selected_polygon = None
+        self.selected_point = None
+        self.resize_handle = None
+        self.drag_start = None
+        self.edit_before = None
+        self.stroke = None
+        self.cancel_smart_brush()
+        self.drawing = False
         
-        # 데이터 초기화
-        if mode == "bbox":
-            self.boxes = []
-            self.polygons = []
-            self.current_polygon = []
-            self.selected_polygon = None
-            self.selected_point = None
-        else:  # polygon mode
-            self.boxes = []
-            self.current_polygon = []
-            self.selected_polygon = None
-            self.selected_point = None
-            
-        # 현재 이미지가 있다면 새 모드의 라벨 로드
-        if current_image and self.save_dir:
+        if self.image_files and self.image_size is not None:
             mode_folder = "bounding" if mode == "bbox" else "poly"
-            label_dir = os.path.join(self.save_dir, mode_folder, "label")
-            label_path = os.path.join(label_dir, os.path.splitext(current_image)[0] + '.txt')
-            
-            if os.path.exists(label_path):
-                try:
-                    h, w = self.original.shape[:2]
-                    with open(label_path, 'r') as f:
-                        for line in f:
-                            values = line.strip().split()
-                            if not values:  # 빈 줄 건너뛰기
-                                continue
-                                
-                            class_id = int(values[0])
-                            
-                            if mode == "polygon":
-                                # 폴리곤 데이터 로드
-                                try:
-                                    points = []
-                                    for i in range(1, len(values), 2):
-                                        if i + 1 >= len(values):  # 좌표가 짝이 맞지 않는 경우
-                                            break
-                                        x = float(values[i]) * w
-                                        y = float(values[i+1]) * h
-                                        points.append((x, y))
-                                    if len(points) >= 3:  # 최소 3개의 점이 있는 경우만 추가
-                                        self.polygons.append((points, class_id))
-                                except (ValueError, IndexError) as e:
-                                    print(f"폴리곤 데이터 로드 중 오류 발생: {e}")
-                                    continue
-                            else:
-                                # 바운딩 박스 데이터 로드
-                                try:
-                                    if len(values) >= 5:  # 최소한 필요한 값이 있는지 확인
-                                        x_center, y_center, width, height = map(float, values[1:5])
-                                        x1 = int((x_center - width/2) * w)
-                                        y1 = int((y_center - height/2) * h)
-                                        x2 = int((x_center + width/2) * w)
-                                        y2 = int((y_center + height/2) * h)
-                                        self.boxes.append((x1, y1, x2, y2, class_id))
-                                except (ValueError, IndexError) as e:
-                                    print(f"바운딩 박스 데이터 로드 중 오류 발생: {e}")
-                                    continue
-                                    
-                    count = len(self.polygons) if mode == "polygon" else len(self.boxes)
-                    self.update_status(f"모드 변경: {mode_folder} 모드의 기존 라벨 로드 완료 ({count}개의 객체)")
-                except Exception as e:
-                    print(f"라벨 로드 중 오류 발생: {e}")
-                    self.update_status(f"모드 변경: {mode_folder} 모드로 전환됨 (라벨 로드 실패)")
-            else:
-                self.update_status(f"모드 변경: {mode_folder} 모드로 전환됨 (기존 라벨 없음)")
+            count = len(self.get_store(mode))
+            unsaved = ", 저장되지 않은 변경 있음" if self.is_dirty(mode) else ""
+            self.update_status(f"모드 변경: {mode_folder} 모드 ({count}개의 객체{unsaved})")
         else:
             self.update_status(f"라벨링 모드: {'바운딩 박스' if mode == 'bbox' else '폴리곤'}")
             
-        # 모드 변경 시 오프셋 초기화
-        self.image_offset_x = 0
-        self.image_offset_y = 0
-        
+        # 화면 위치는 유지하고 주석 레이어만 다시 그림
         self.update_display()
+        self.update_filmstrip()  # 라벨 여부 표시는 모드별로 다름
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 썸네일 프로세스 풀 (PyInstaller 실행 파일)
     root = tk.Tk()
     app = DetectionApp(root)
     root.mainloop() 
\ No newline at end of file
@@ -0,0 +1,281 @@
+import math
+
+import cv2
+import numpy as np
+
+
+def union_rect(a, b):
+    """두 사각형 (x0, y0, x1, y1)의 합집합 (None은 빈 영역)"""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def clip_rect(rect, width, height):
+    """사각형을 (0, 0, width, height) 범위로 자르고, 비어 있으면 None 반환"""
+    if rect is None:
+        return None
+    x0, y0 = max(0, int(rect[0])), max(0, int(rect[1]))
+    x1, y1 = min(width, int(rect[2])), min(height, int(rect[3]))
+    if x0 >= x1 or y0 >= y1:
+        return None
+    return (x0, y0, x1, y1)
+
+
+def contains_rect(outer, inner):
+    """outer 사각형이 inner 사각형을 포함하는지 확인"""
+    return (outer[0] <= inner[0] and outer[1] <= inner[1]
+            and outer[2] >= inner[2] and outer[3] >= inner[3])
+
+
+class DisplayRenderer:
+    """베이스 이미지 / 주석 / 브러시 레이어를 캐시하고 변경된 영역만 합성하는 클래스
+
+    - 베이스 레이어: 스케일 적용 이미지 중 캔버스에 보이는 영역(+여유)만 잘라 리샘플링한다.
+      피라미드가 있으면 요청 배율에 가장 가까운 축소 레벨에서 리샘플링한다.
+      이미지, 스케일이 바뀌거나 화면 이동으로 보이는 영역이 레이어를 벗어날 때,
+      또는 더 알맞은 피라미드 레벨이 준비되었을 때만 다시 만든다.
+    - 주석 레이어: 베이스 위에 박스/폴리곤을 그린 이미지. 주석 키가 바뀔 때만 다시 그린다.
+    - 브러시 레이어: 베이스 크기의 마스크. 스트로크에 새로 추가된 구간만 화면 해상도로 그리고
+      그 영역만 합성한다.
+
+    레이어와 패치의 좌표는 모두 window (스케일 적용 이미지에서 렌더링된 영역)의 좌상단 기준이다.
+    """
+    PREVIEW_PAD = 6  # 윤곽선 미리보기(선 두께, 꼭지점 원)가 스트로크 영역 밖으로 나가는 여유
+    VIEW_MARGIN = 0.25  # 작은 화면 이동은 다시 렌더링하지 않도록 보이는 영역 주변에 더 그려두는 비율
+
+    def __init__(self, brush_color=(0, 255, 0), brush_alpha=0.3):
+        self.brush_color = brush_color
+        self.brush_alpha = brush_alpha
+        self.image = None
+        self.pyramid = None
+        self._reset_layers()
+
+    def _reset_layers(self):
+        self.scale = None
+        self.level_scale = None  # 베이스 레이어를 만든 피라미드 레벨의 배율
+        self.window = (0, 0, 0, 0)  # 스케일 적용 이미지에서 렌더링된 영역
+        self.base = None  # 베이스 레이어 (BGR)
+        self.annotated = None  # 베이스 + 주석 레이어 (BGR)
+        self.annotation_key = None
+        self.brush = None  # 브러시 레이어
+        self.brush_source = None  # 브러시 레이어에 그려진 스트로크
+        self.brush_drawn = 0  # 브러시 레이어에 이미 그린 스트로크 점 수
+        self.brush_bounds = None  # 현재 스트로크가 차지하는 영역
+        self.preview = None  # 표시 중인 윤곽선 미리보기 폴리곤 (window 좌표 (K, 1, 2))
+        self.contour = None  # 브러시 윤곽선을 단순화한 폴리곤 (이미지 좌표 (K, 2)) - 화면 이동/확대에도 재사용
+        self.contour_source = None  # contour를 계산한 스트로크
+        self.contour_points = 0  # contour를 계산할 때의 스트로크 점 수
+        self.shown_rect = None  # 마지막 프레임에 브러시가 합성된 영역
+
+    def set_image(self, image, pyramid=None):
+        """새 이미지(와 그 피라미드)를 설정하고 모든 레이어 캐시를 비움"""
+        self.image = image
+        self.pyramid = pyramid
+        self._reset_layers()
+
+    def _level_for(self, scale):
+        if self.pyramid is None:
+            return self.image, 1.0
+        return self.pyramid.level_for(scale)
+
+    def needs_upgrade(self):
+        """현재 스케일에 더 알맞은 피라미드 레벨 (또는 미리보기를 대신할 원본)이 준비되었는지 확인"""
+        if self.base is None or self.pyramid is None:
+            return False
+        return self._level_for(self.scale)[1] != self.level_scale
+
+    def scaled_size(self, scale):
+        """scale에서의 스케일 적용 이미지 전체 크기 (width, height)"""
+        if self.pyramid is not None:
+            w, h = self.pyramid.size  # 미리보기를 표시 중이어도 원본 크기 기준
+        else:
+            h, w = self.image.shape[:2]
+        return max(1, int(w * scale)), max(1, int(h * scale))
+
+    def visible_rect(self, scale, viewport):
+        """캔버스에 보이는 스케일 적용 이미지 영역
+
+        viewport: (image_x, image_y, canvas_w, canvas_h) - 캔버스에서 이미지 좌상단 위치와 캔버스 크기
+        """
+        image_x, image_y, canvas_w, canvas_h = viewport
+        width, height = self.scaled_size(scale)
+        rect = clip_rect((-image_x, -image_y, canvas_w - image_x, canvas_h - image_y), width, height)
+        # 이미지가 화면 밖으로 완전히 벗어난 경우에도 가장 가까운 1픽셀은 유지
+        if rect is None:
+            x = min(max(0, -image_x), width - 1)
+            y = min(max(0, -image_y), height - 1)
+            rect = (x, y, x + 1, y + 1)
+        return rect
+
+    def render(self, scale, viewport, annotation_key, draw_annotations,
+               stroke=None, contour_preview=False, preview_points=None):
+        """바뀐 레이어만 다시 그리고 화면에 반영할 패치를 반환
+
+        draw_annotations(display, origin)은 window 좌상단 origin 기준으로 주석을 그린다.
+        stroke는 진행 중인 브러시 스트로크 (BrushStroke)이며, 마지막 호출 이후 추가된 점만 그린다.
+        preview_points (이미지 좌표)가 있으면 브러시 윤곽선 대신 그 폴리곤을 미리보기로 그린다.
+        스트로크와 미리보기가 그대로이면 브러시 영역을 다시 합성하지 않는다.
+        반환값: (RGB 패치, window 안에서 패치 위치 (x, y), 전체 갱신 여부).
+        바뀐 것이 없으면 패치는 None.
+        """
+        if self.image is None:
+            return None, None, False
+
+        full = False
+        visible = self.visible_rect(scale, viewport)
+        level, level_scale = self._level_for(scale)
+        if (self.base is None or scale != self.scale or level_scale != self.level_scale
+                or not contains_rect(self.window, visible)):
+            self.scale = scale
+            self.level_scale = level_scale
+            self.window = self._window_for(visible, viewport)
+            self.base = self._resample(level, level_scale, self.window)
+            self.annotated = None
+            self.brush = None
+            self.brush_source = None
+            self.brush_bounds = None
+            self.shown_rect = None
+
+        if self.annotated is None or annotation_key != self.annotation_key:
+            self.annotated = self.base.copy()
+            draw_annotations(self.annotated, self.window[:2])
+            self.annotation_key = annotation_key
+            full = True
+
+        height, width = self.base.shape[:2]
+        dirty = None
+        if stroke is None:
+            if self.brush is not None:
+                dirty = self.shown_rect
+                self.brush = None
+                self.brush_source = None
+                self.brush_bounds = None
+            self.contour = None
+            self.contour_source = None
+        else:
+            if self.brush is None or stroke is not self.brush_source:
+                # 새 스트로크 (또는 다시 만든 레이어): 처음 점부터 그린다
+                self.brush = np.zeros((height, width), dtype=np.uint8)
+                self.brush_source = stroke
+                self.brush_drawn = 0
+                self.brush_bounds = None
+            rect = None
+            if len(stroke.points) > self.brush_drawn:
+                rect = clip_rect(stroke.draw(self.brush, scale, self.window[:2], self.brush_drawn),
+                                 width, height)
+                self.brush_drawn = len(stroke.points)
+            self.brush_bounds = union_rect(self.brush_bounds, rect)
+            dirty = rect
+
+        # 윤곽선 미리보기 (보정된 폴리곤이 없으면 캐시한 브러시 윤곽선)를 현재 배율의 window 좌표로
+        preview = None
+        if self.brush is not None and contour_preview:
+            if preview_points is None:
+                self._update_contour(stroke)
+                preview_points = self.contour
+            if preview_points is not None and len(preview_points):
+                preview = np.rint(np.asarray(preview_points, dtype=np.float64).reshape(-1, 2) * scale
+                                  - self.window[:2]).astype(np.int32).reshape(-1, 1, 2)
+        preview_rect = self._preview_rect(preview)
+        if (preview is None) != (self.preview is None) or (
+                preview is not None and not np.array_equal(preview, self.preview)):
+            # 미리보기가 바뀌면 이전 미리보기를 지우고 새 미리보기 영역을 그림
+            dirty = union_rect(union_rect(dirty, self.shown_rect), preview_rect)
+        self.preview = preview
+
+        region = (0, 0, width, height) if full else clip_rect(dirty, width, height)
+
+        if self.brush is not None and self.brush_bounds is not None:
+            pad = self.PREVIEW_PAD if contour_preview else 0
+            self.shown_rect = union_rect(self._pad(self.brush_bounds, pad), preview_rect)
+        else:
+            self.shown_rect = None
+
+        if region is None:
+            return None, None, False
+        return self._compose(region, contour_preview), (region[0], region[1]), full
+
+    def _update_contour(self, stroke):
+        """스트로크에 새 구간이 그려졌을 때만 브러시 영역에서 윤곽선을 다시 찾아 이미지 좌표로 캐시"""
+        if stroke is self.contour_source and len(stroke.points) == self.contour_points:
+            return
+        self.contour_source = stroke
+        self.contour_points = len(stroke.points)
+        self.contour = None
+        if self.brush_bounds is None:
+            return
+        bx0, by0, bx1, by1 = self.brush_bounds
+        roi = self.brush[by0:by1, bx0:bx1]
+        contours, _ = cv2.findContours(roi, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE,
+                                       offset=(bx0 + self.window[0], by0 + self.window[1]))
+        if not contours:
+            return
+        # 가장 큰 윤곽선을 단순화
+        max_contour = max(contours, key=cv2.contourArea)
+        epsilon = 0.005 * cv2.arcLength(max_contour, True)
+        approx = cv2.approxPolyDP(max_contour, epsilon, True)
+        self.contour = approx.reshape(-1, 2) / self.scale
+
+    def _preview_rect(self, preview):
+        """미리보기 폴리곤이 그려지는 영역 (선 두께와 꼭지점 원 포함)"""
+        if preview is None:
+            return None
+        low, high = preview.min(axis=(0, 1)), preview.max(axis=(0, 1)) + 1
+        return self._pad((int(low[0]), int(low[1]), int(high[0]), int(high[1])), self.PREVIEW_PAD)
+
+    @staticmethod
+    def _pad(rect, pad):
+        return (rect[0] - pad, rect[1] - pad, rect[2] + pad, rect[3] + pad)
+
+    def _window_for(self, visible, viewport):
+        """보이는 영역 주변에 여유를 더한 렌더링 영역"""
+        margin_x = int(viewport[2] * self.VIEW_MARGIN)
+        margin_y = int(viewport[3] * self.VIEW_MARGIN)
+        width, height = self.scaled_size(self.scale)
+        return clip_rect((visible[0] - margin_x, visible[1] - margin_y,
+                          visible[2] + margin_x, visible[3] + margin_y), width, height)
+
+    def _resample(self, level, level_scale, window):
+        """피라미드 레벨에서 window에 해당하는 부분만 잘라 스케일을 적용"""
+        wx0, wy0, wx1, wy1 = window
+        s = self.scale / level_scale  # 레벨 이미지 기준 배율
+        h, w = level.shape[:2]
+        if s == 1.0 and wx1 <= w and wy1 <= h:
+            return level[wy0:wy1, wx0:wx1]
+        # 보간에 필요한 이웃 픽셀까지 포함하여 원본을 자른다
+        sx0 = max(0, int(wx0 / s) - 1)
+        sy0 = max(0, int(wy0 / s) - 1)
+        sx1 = min(w, int(math.ceil(wx1 / s)) + 2)
+        sy1 = min(h, int(math.ceil(wy1 / s)) + 2)
+        crop = level[sy0:sy1, sx0:sx1]
+        # cv2.resize와 같은 픽셀 중심 정렬: src = (dst + 0.5) / s - 0.5
+        matrix = np.float32([[s, 0, s * (sx0 + 0.5) - 0.5 - wx0],
+                             [0, s, s * (sy0 + 0.5) - 0.5 - wy0]])
+        return cv2.warpAffine(crop, matrix, (wx1 - wx0, wy1 - wy0),
+                              flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+    def _compose(self, region, contour_preview):
+        """주석 레이어 위에 브러시 레이어를 region 영역만 합성하여 RGB로 반환"""
+        x0, y0, x1, y1 = region
+        patch = self.annotated[y0:y1, x0:x1].copy()
+        if self.brush is not None:
+            painted = self.brush[y0:y1, x0:x1] == 255
+            if painted.any():
+                overlay = patch.copy()
+                overlay[painted] = self.brush_color
+                cv2.addWeighted(overlay, self.brush_alpha, patch, 1 - self.brush_alpha, 0, patch)
+            if contour_preview:
+                self._draw_contour_preview(patch, (x0, y0))
+        return cv2.cvtColor(patch, cv2.COLOR_BGR2RGB)
+
+    def _draw_contour_preview(self, patch, origin):
+        """윤곽선 미리보기 폴리곤과 꼭지점을 패치 위에 그림"""
+        if self.preview is None:
+            return
+        approx = self.preview - np.array(origin, dtype=np.int32)
+        cv2.drawContours(patch, [approx], -1, self.brush_color, 2)
+        # 꼭지점 원 (반지름 4)을 길이 0인 두께 8 선분들로 한 번에 그림
+        cv2.polylines(patch, np.concatenate([approx, approx], axis=1), False, self.brush_color, 8)
@@ -0,0 +1,245 @@
+from collections import deque
+
+import numpy as np
+
+COMMAND_OVERHEAD = 96  # 명령 객체 하나의 대략적인 메모리 (바이트)
+
+
+class AddBox:
+    """박스 추가"""
+    __slots__ = ('index', 'box')
+    description = "박스 추가"
+
+    def __init__(self, index, box):
+        self.index = index
+        self.box = tuple(box)
+
+    @property
+    def nbytes(self):
+        return COMMAND_OVERHEAD
+
+    def undo(self, boxes):
+        boxes.pop(self.index)
+
+    def redo(self, boxes):
+        boxes.insert(self.index, self.box)
+
+
+class DeleteBox(AddBox):
+    """박스 삭제"""
+    __slots__ = ()
+    description = "박스 삭제"
+
+    def undo(self, boxes):
+        boxes.insert(self.index, self.box)
+
+    def redo(self, boxes):
+        boxes.pop(self.index)
+
+
+class SetBox:
+    """박스 이동/크기 조절 (드래그 한 번이 명령 하나)"""
+    __slots__ = ('index', 'before', 'after')
+    description = "박스 편집"
+
+    def __init__(self, index, before, after):
+        self.index = index
+        self.before = tuple(before)
+        self.after = tuple(after)
+
+    @property
+    def nbytes(self):
+        return COMMAND_OVERHEAD
+
+    def undo(self, boxes):
+        boxes[self.index] = self.before
+
+    def redo(self, boxes):
+        boxes[self.index] = self.after
+
+
+class AddPolygon:
+    """폴리곤 추가"""
+    __slots__ = ('index', 'points', 'class_id')
+    description = "폴리곤 추가"
+
+    def __init__(self, index, points, class_id):
+        self.index = index
+        self.points = np.array(points, dtype=np.float32).reshape(-1, 2)
+        self.class_id = class_id
+
+    @property
+    def nbytes(self):
+        return COMMAND_OVERHEAD + self.points.nbytes
+
+    def undo(self, polygons):
+        polygons.pop(self.index)
+
+    def redo(self, polygons):
+        polygons.insert(self.index, self.points, self.class_id)
+
+
+class DeletePolygon(AddPolygon):
+    """폴리곤 삭제"""
+    __slots__ = ()
+    description = "폴리곤 삭제"
+
+    def undo(self, polygons):
+        polygons.insert(self.index, self.points, self.class_id)
+
+    def redo(self, polygons):
+        polygons.pop(self.index)
+
+
+class MoveVertex:
+    """폴리곤 꼭지점 이동"""
+    __slots__ = ('index', 'vertex', 'before', 'after')
+    description = "꼭지점 이동"
+
+    def __init__(self, index, vertex, before, after):
+        self.index = index
+        self.vertex = vertex
+        self.before = tuple(before)
+        self.after = tuple(after)
+
+    @property
+    def nbytes(self):
+        return COMMAND_OVERHEAD
+
+    def undo(self, polygons):
+        polygons.move_vertex(self.index, self.vertex, *self.before)
+
+    def redo(self, polygons):
+        polygons.move_vertex(self.index, self.vertex, *self.after)
+
+
+class TranslatePolygon:
+    """폴리곤 전체 이동 (이동량만 기록)"""
+    __slots__ = ('index', 'dx', 'dy')
+    description = "폴리곤 이동"
+
+    def __init__(self, index, dx, dy):
+        self.index = index
+        self.dx = dx
+        self.dy = dy
+
+    @property
+    def nbytes(self):
+        return COMMAND_OVERHEAD
+
+    def undo(self, polygons):
+        polygons.translate(self.index, -self.dx, -self.dy)
+
+    def redo(self, polygons):
+        polygons.translate(self.index, self.dx, self.dy)
+
+
+class AddBoxes:
+    """자동 라벨 제안 박스들을 끝에 한 번에 추가 (명령 하나로 되돌림)"""
+    __slots__ = ('index', 'boxes')
+    description = "자동 라벨"
+
+    def __init__(self, index, boxes):
+        self.index = index
+        self.boxes = np.array(boxes, dtype=np.float32).reshape(-1, 5)
+
+    @property
+    def nbytes(self):
+        return COMMAND_OVERHEAD + self.boxes.nbytes
+
+    def undo(self, boxes):
+        boxes.truncate(self.index)
+
+    def redo(self, boxes):
+        boxes.extend(self.boxes)
+
+
+class AddPolygons:
+    """자동 라벨 제안 폴리곤들을 끝에 한 번에 추가 (명령 하나로 되돌림)"""
+    __slots__ = ('index', 'vertices', 'offsets', 'class_ids')
+    description = "자동 라벨"
+
+    def __init__(self, index, vertices, offsets, class_ids):
+        self.index = index
+        self.vertices = np.array(vertices, dtype=np.float32).reshape(-1, 2)
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.class_ids = np.array(class_ids, dtype=np.int64)
+
+    @property
+    def nbytes(self):
+        return COMMAND_OVERHEAD + self.vertices.nbytes + self.offsets.nbytes + self.class_ids.nbytes
+
+    def undo(self, polygons):
+        polygons.truncate(self.index)
+
+    def redo(self, polygons):
+        polygons.extend_flat(self.vertices, self.offsets, self.class_ids)
+
+
+COMMANDS = {cls.__name__: cls for cls in (AddBox, DeleteBox, SetBox, AddPolygon, DeletePolygon,
+                                          MoveVertex, TranslatePolygon, AddBoxes, AddPolygons)}
+
+
+def command_to_record(command):
+    """명령을 JSON으로 기록할 수 있는 dict로 변환 ({'cmd': 이름, 필드: 값, ...})"""
+    record = {'cmd': type(command).__name__}
+    for cls in type(command).__mro__:
+        for field in getattr(cls, '__slots__', ()):
+            value = getattr(command, field)
+            record[field] = value.tolist() if isinstance(value, np.ndarray) else value
+    return record
+
+
+def command_from_record(record):
+    """command_to_record의 결과로 명령 복원"""
+    fields = dict(record)
+    return COMMANDS[fields.pop('cmd')](**fields)
+
+
+class EditHistory:
+    """주석 저장소 하나의 실행 취소/다시 실행 기록
+
+    전체 주석을 복사해 두지 않고 바뀐 항목만 담은 작은 명령을 쌓는다.
+    명령들의 메모리 합이 max_bytes를 넘으면 가장 오래된 명령부터 버린다.
+    새 명령을 기록하면 다시 실행할 명령은 사라진다.
+    """
+    def __init__(self, max_bytes=512 * 1024):
+        self.max_bytes = max_bytes
+        self._undo = deque()
+        self._redo = []
+        self._bytes = 0  # 두 스택에 있는 명령의 메모리 합
+
+    def __len__(self):
+        return len(self._undo)
+
+    def record(self, command):
+        """이미 저장소에 적용된 편집을 기록"""
+        self._bytes -= sum(c.nbytes for c in self._redo)
+        self._redo.clear()
+        self._undo.append(command)
+        self._bytes += command.nbytes
+        while self._bytes > self.max_bytes and len(self._undo) > 1:
+            self._bytes -= self._undo.popleft().nbytes
+
+    def undo(self, store):
+        """마지막 명령을 되돌리고 반환 (없으면 None)"""
+        if not self._undo:
+            return None
+        command = self._undo.pop()
+        command.undo(store)
+        self._redo.append(command)
+        return command
+
+    def redo(self, store):
+        """마지막으로 되돌린 명령을 다시 적용하고 반환 (없으면 None)"""
+        if not self._redo:
+            return None
+        command = self._redo.pop()
+        command.redo(store)
+        self._undo.append(command)
+        return command
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._bytes = 0
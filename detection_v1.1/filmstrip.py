@@ -0,0 +1,121 @@
+import os
+
+import cv2
+from PIL import Image, ImageTk
+
+from thumbnail_cache import THUMBNAIL_SIZE
+
+
+class Filmstrip:
+    """현재 이미지 앞뒤의 썸네일과 라벨 여부 표시를 보여주는 필름 스트립
+
+    슬롯마다 고정된 캔버스 아이템을 두고 이미지가 바뀔 때 내용만 갱신한다.
+    썸네일은 ThumbnailCache에서 받아 오며, 아직 없으면 파일 이름을 표시하고
+    만들어지면 on_ready로 해당 슬롯만 다시 그린다. 슬롯을 클릭하면 on_select(index)를 호출한다.
+    """
+    SLOT_COUNT = 9  # 표시할 썸네일 수 (현재 이미지가 가운데)
+    LOOKAHEAD = 9  # 표시 범위 밖에서 미리 만들어 둘 다음 이미지 수
+    SLOT_PAD = 4  # 슬롯 사이 여백
+    BADGE_SIZE = 10  # 라벨 여부 표시 원 지름
+    LABELED_COLOR = "#2ecc40"  # 라벨 있음
+    UNLABELED_COLOR = "#9e9e9e"  # 라벨 없음
+    CURRENT_COLOR = "#1e90ff"  # 현재 이미지 테두리
+    HEIGHT = THUMBNAIL_SIZE[1] + 2 * SLOT_PAD
+
+    def __init__(self, canvas, thumbnails, on_select):
+        self.canvas = canvas
+        self.thumbnails = thumbnails
+        self.on_select = on_select
+        self.slot_width = THUMBNAIL_SIZE[0] + 2 * self.SLOT_PAD
+        self.origin = 0  # 첫 슬롯의 x 좌표 (스트립을 가운데 정렬)
+        self.slots = []  # [{'frame': id, 'image': id, 'text': id, 'badge': id}, ...]
+        self.indices = [None] * self.SLOT_COUNT  # 슬롯별 이미지 인덱스 (비어 있으면 None)
+        self.paths = {}  # 표시 중인 원본 경로 -> 슬롯 번호
+        self.photos = [None] * self.SLOT_COUNT  # 슬롯별 PhotoImage (참조 유지)
+        self.canvas.bind('<Button-1>', self.on_click)
+
+    def set_cache(self, thumbnails):
+        """썸네일 캐시 교체 (저장 경로 변경 시)"""
+        self.thumbnails = thumbnails
+        self.paths = {}
+
+    def show(self, folder, files, current, is_labeled):
+        """current 이미지를 가운데로 슬롯 내용을 갱신하고 필요한 썸네일을 요청
+
+        is_labeled(index)는 해당 이미지에 라벨이 있는지 반환한다.
+        """
+        if not self.slots:
+            self._create_slots()
+        self.origin = max(0, (self.canvas.winfo_width() - self.slot_width * self.SLOT_COUNT) // 2)
+        first = current - self.SLOT_COUNT // 2
+        self.paths = {}
+        for slot in range(self.SLOT_COUNT):
+            index = first + slot
+            items = self.slots[slot]
+            x = self.origin + slot * self.slot_width
+            self._place(items, x)
+            if not 0 <= index < len(files):
+                self.indices[slot] = None
+                self.photos[slot] = None
+                for item in items.values():
+                    self.canvas.itemconfigure(item, state='hidden')
+                continue
+            self.indices[slot] = index
+            path = os.path.join(folder, files[index])
+            self.paths[path] = slot
+            self.canvas.itemconfigure(items['frame'], state='normal',
+                                      outline=self.CURRENT_COLOR if index == current else "")
+            self.canvas.itemconfigure(items['badge'], state='normal',
+                                      fill=self.LABELED_COLOR if is_labeled(index) else self.UNLABELED_COLOR)
+            self.canvas.itemconfigure(items['text'], text=os.path.splitext(files[index])[0][:12])
+            self._draw_thumbnail(slot, path)
+
+        # 현재 이미지에서 가까운 순서로 요청하고, 진행 방향으로 몇 장 더 미리 만듦
+        visible = sorted(self.paths, key=lambda p: abs(self.indices[self.paths[p]] - current))
+        ahead = [os.path.join(folder, name)
+                 for name in files[first + self.SLOT_COUNT:first + self.SLOT_COUNT + self.LOOKAHEAD]]
+        self.thumbnails.request(visible + ahead)
+
+    def on_ready(self, paths):
+        """썸네일이 만들어진 경로 중 표시 중인 슬롯만 다시 그림"""
+        for path in paths:
+            slot = self.paths.get(path)
+            if slot is not None:
+                self._draw_thumbnail(slot, path)
+
+    def on_click(self, event):
+        slot = (event.x - self.origin) // self.slot_width
+        if 0 <= slot < self.SLOT_COUNT and self.indices[slot] is not None:
+            self.on_select(self.indices[slot])
+
+    def _create_slots(self):
+        for _ in range(self.SLOT_COUNT):
+            self.slots.append({
+                'frame': self.canvas.create_rectangle(0, 0, 0, 0, width=2, outline=""),
+                'text': self.canvas.create_text(0, 0, fill="gray40", font=("TkDefaultFont", 8)),
+                'image': self.canvas.create_image(0, 0, anchor='center'),
+                'badge': self.canvas.create_oval(0, 0, 0, 0, outline="white"),
+            })
+
+    def _place(self, items, x):
+        pad, (w, h) = self.SLOT_PAD, THUMBNAIL_SIZE
+        cx, cy = x + self.slot_width / 2, pad + h / 2
+        self.canvas.coords(items['frame'], x + pad - 2, pad - 2, x + pad + w + 2, pad + h + 2)
+        self.canvas.coords(items['text'], cx, cy)
+        self.canvas.coords(items['image'], cx, cy)
+        size = self.BADGE_SIZE
+        self.canvas.coords(items['badge'], x + pad + w - size - 2, pad + 2, x + pad + w - 2, pad + size + 2)
+        self.canvas.tag_raise(items['badge'])
+
+    def _draw_thumbnail(self, slot, path):
+        """썸네일이 준비되어 있으면 슬롯에 표시하고, 없으면 파일 이름을 표시"""
+        items = self.slots[slot]
+        thumbnail = self.thumbnails.get(path)
+        if thumbnail is None:
+            self.photos[slot] = None
+            self.canvas.itemconfigure(items['image'], state='hidden')
+            self.canvas.itemconfigure(items['text'], state='normal')
+            return
+        self.photos[slot] = ImageTk.PhotoImage(Image.fromarray(cv2.cvtColor(thumbnail, cv2.COLOR_BGR2RGB)))
+        self.canvas.itemconfigure(items['image'], image=self.photos[slot], state='normal')
+        self.canvas.itemconfigure(items['text'], state='hidden')
@@ -0,0 +1,78 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ImageCache:
+    """디코딩된 이미지를 바이트 예산 안에서 LRU로 보관하고 이웃 이미지를 미리 디코딩하는 클래스
+
+    load(key)는 {'image': ndarray, ...} 형태의 항목을 반환해야 하며 작업 스레드에서도 호출된다.
+    키에 파일 수정 시간을 포함하면 바뀐 파일은 자연스럽게 캐시 미스가 된다.
+    """
+    def __init__(self, load, max_bytes=512 * 1024 * 1024, workers=2):
+        self.load = load
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (entry, nbytes), 오래 사용하지 않은 순
+        self._futures = {}  # 미리 디코딩 중인 key -> Future
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+
+    def get(self, key):
+        """항목 반환 (캐시에 있으면 즉시, 미리 디코딩 중이면 완료를 기다리고, 없으면 직접 디코딩)"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+            future = self._futures.get(key)
+        if future is not None:
+            return future.result()
+        entry = self.load(key)
+        self._store(key, entry)
+        return entry
+
+    def peek(self, key):
+        """캐시에 있는 항목만 반환 (없으면 기다리거나 디코딩하지 않고 None)"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+            return None
+
+    def is_pending(self, key):
+        """key를 백그라운드에서 디코딩 중인지 확인"""
+        with self._lock:
+            return key in self._futures
+
+    def prefetch(self, keys):
+        """캐시에 없는 항목들을 백그라운드에서 디코딩"""
+        for key in keys:
+            with self._lock:
+                if key in self._entries or key in self._futures:
+                    continue
+                self._futures[key] = self._executor.submit(self._load_async, key)
+
+    def shutdown(self):
+        """대기 중인 미리 디코딩 작업을 취소하고 작업 스레드 종료"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _load_async(self, key):
+        try:
+            entry = self.load(key)
+            self._store(key, entry)
+            return entry
+        finally:
+            with self._lock:
+                self._futures.pop(key, None)
+
+    def _store(self, key, entry):
+        nbytes = entry['image'].nbytes
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (entry, nbytes)
+            self._bytes += nbytes
+            # 방금 넣은 항목은 남기고 오래된 항목부터 제거
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, old_bytes) = self._entries.popitem(last=False)
+                self._bytes -= old_bytes
@@ -0,0 +1,132 @@
+import threading
+
+import cv2
+import numpy as np
+from PIL import Image
+
+REDUCED_DECODE_FLAGS = {8: cv2.IMREAD_REDUCED_COLOR_8, 4: cv2.IMREAD_REDUCED_COLOR_4,
+                        2: cv2.IMREAD_REDUCED_COLOR_2}  # 축소 비율 -> JPEG 축소 디코딩 플래그
+REDUCED_DECODE_EXTENSIONS = ('.jpg', '.jpeg')  # DCT 단계에서 축소되어 실제로 빨라지는 형식
+
+
+def decode_reduced(path, scale_for):
+    """표시 배율에 충분한 가장 작은 축소 해상도로 JPEG를 디코딩
+
+    scale_for((width, height))는 원본 크기에 대한 표시 배율을 반환한다.
+    반환값: (축소 이미지, 원본 크기 (width, height), 축소 비율).
+    JPEG가 아니거나 원본 해상도가 필요하면 None (원본을 디코딩해야 함).
+    """
+    if not path.lower().endswith(REDUCED_DECODE_EXTENSIONS):
+        return None
+    try:
+        with Image.open(path) as header:  # 헤더만 읽어 원본 크기 확인
+            width, height = header.size
+    except OSError:
+        return None
+    scale = scale_for((width, height))
+    reduction = next((r for r in REDUCED_DECODE_FLAGS if scale <= 1.0 / r), None)
+    if reduction is None:
+        return None
+    image = cv2.imdecode(np.fromfile(path, dtype=np.uint8), REDUCED_DECODE_FLAGS[reduction])
+    if image is None:
+        return None
+    # EXIF 회전이 적용된 경우 가로/세로를 맞춤
+    if image.shape[1] != -(-width // reduction):
+        width, height = height, width
+    return image, (width, height), reduction
+
+
+class ImagePyramid:
+    """1/2, 1/4, 1/8 ... 배율의 축소 이미지를 백그라운드 스레드에서 만들어 두는 클래스
+
+    축소 표시할 때는 요청 배율 이상인 가장 작은 레벨에서 리샘플링하여
+    큰 이미지도 매번 원본 전체를 리사이즈하지 않는다.
+
+    축소 디코딩한 미리보기로 만들 때는 image를 base_level 레벨로 두고 size에 원본 크기를 준다.
+    그보다 큰 레벨은 set_full()로 원본이 들어올 때까지 비어 있으며 (None),
+    그동안 level_for는 있는 레벨 중 가장 큰 것을 확대하여 쓰게 한다.
+    """
+    def __init__(self, image, max_bytes=64 * 1024 * 1024, min_size=64, base_level=0, size=None):
+        self.max_bytes = max_bytes  # 원본을 제외한 축소 레벨들의 최대 메모리
+        self.min_size = min_size  # 짧은 변이 이보다 작아지면 더 만들지 않음
+        self.levels = [None] * base_level + [image]  # levels[k]는 원본의 1/2^k 크기
+        self.size = size or (image.shape[1], image.shape[0])  # 원본 크기 (width, height)
+        self._used = image.nbytes if base_level else 0  # 축소 레벨들이 사용 중인 메모리 (_lock으로 보호)
+        self.done = False
+        self._cancelled = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._build, daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """다른 이미지로 넘어갈 때 남은 레벨 생성을 중단"""
+        self._cancelled = True
+
+    def set_full(self, image):
+        """원본 해상도 이미지를 넣고, 미리보기와의 사이 레벨은 백그라운드에서 채움"""
+        with self._lock:
+            self.levels[0] = image
+        threading.Thread(target=self._fill, daemon=True).start()
+
+    def _fill(self):
+        try:
+            k = 1
+            with self._lock:
+                prev = self.levels[0]
+            while not self._cancelled:
+                with self._lock:
+                    if k >= len(self.levels) or self.levels[k] is not None:
+                        break
+                h, w = prev.shape[:2]
+                prev = cv2.resize(prev, (w // 2, h // 2), interpolation=cv2.INTER_AREA)
+                self._add_level(prev, k)  # 상한을 넘는 레벨은 비워 두고 (더 큰 레벨에서 리샘플링) 다음 레벨로
+                k += 1
+        except Exception as e:
+            print(f"이미지 피라미드 생성 중 오류 발생: {e}")
+
+    def _build(self):
+        try:
+            while not self._cancelled:
+                prev = self.levels[-1]
+                h, w = prev.shape[:2]
+                if min(h, w) // 2 < self.min_size:
+                    break
+                next_level = cv2.resize(prev, (w // 2, h // 2), interpolation=cv2.INTER_AREA)
+                if not self._add_level(next_level):
+                    break
+        except Exception as e:
+            print(f"이미지 피라미드 생성 중 오류 발생: {e}")
+        finally:
+            self.done = True
+
+    def _add_level(self, image, k=None):
+        """메모리 상한 안이면 레벨 k (None이면 맨 뒤)에 넣고 True 반환
+
+        _build와 _fill이 동시에 실행될 수 있으므로 사용량은 잠금 안에서 함께 센다.
+        """
+        with self._lock:
+            if self._used + image.nbytes > self.max_bytes:
+                return False
+            self._used += image.nbytes
+            if k is None:
+                self.levels.append(image)
+            else:
+                self.levels[k] = image
+        return True
+
+    def level_for(self, scale):
+        """scale 표시에 쓸 레벨 (이미지, 레벨 배율) - 레벨 배율이 scale 이상인 가장 작은 레벨"""
+        with self._lock:
+            levels = list(self.levels)
+        k = 0
+        while k + 1 < len(levels) and scale <= 0.5 ** (k + 1):
+            k += 1
+        # 아직 없는 레벨이면 있는 레벨 중 더 큰 것, 그것도 없으면 더 작은 것 (미리보기)
+        j = k
+        while j >= 0 and levels[j] is None:
+            j -= 1
+        if j < 0:
+            j = k
+            while levels[j] is None:
+                j += 1
+        return levels[j], 0.5 ** j
@@ -0,0 +1,147 @@
+import os
+import queue
+import re
+import threading
+
+try:  # 설치되어 있으면 OS 파일 변경 알림(inotify 등)으로 감시
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+_digits = re.compile(r'(\d+)')
+
+
+def natural_key(name):
+    """숫자 부분을 수로 비교하는 정렬 키 (img2 < img10)"""
+    return [int(part) if part.isdigit() else part.lower() for part in _digits.split(name)]
+
+
+class ImageFolderScanner:
+    """이미지 폴더를 백그라운드에서 훑어 찾은 파일을 조금씩 전달하고, 이후 새로 생기는 파일을 감시하는 클래스
+
+    처음 스캔은 os.scandir로 항목을 읽는 대로 batch_size씩 넘기므로 큰 폴더에서도 바로 시작할 수 있다.
+    스캔이 끝나면 watchdog이 있으면 파일 생성 알림으로, 없으면 폴더 수정 시간이 바뀔 때만
+    다시 훑는 방식으로 새 이미지를 찾는다. 결과는 poll()로 UI 스레드에서 가져간다.
+    """
+    POLL_INTERVAL = 2.0  # 폴링 방식에서 폴더 수정 시간 확인 주기 (초)
+
+    def __init__(self, folder, extensions=IMAGE_EXTENSIONS, batch_size=500):
+        self.folder = folder
+        self.extensions = extensions
+        self.batch_size = batch_size
+        self._known = set()  # 이미 전달한 파일 이름
+        self._lock = threading.Lock()  # _known 보호 (watchdog 콜백 스레드와 공유)
+        self._results = queue.Queue()
+        self._scan_done = threading.Event()
+        self._stop = threading.Event()
+        self._observer = None
+        self._thread = None
+
+    @property
+    def scanning(self):
+        """처음 스캔이 아직 진행 중인지 여부"""
+        return not self._scan_done.is_set()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="image-scanner", daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout=None):
+        """처음 스캔이 끝날 때까지 최대 timeout초 대기하고 끝났는지 반환"""
+        return self._scan_done.wait(timeout)
+
+    def poll(self):
+        """마지막 호출 이후 새로 찾은 파일 이름 목록"""
+        names = []
+        while True:
+            try:
+                names.extend(self._results.get_nowait())
+            except queue.Empty:
+                return names
+
+    def stop(self):
+        """스캔과 감시 종료"""
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+
+    def _is_image(self, name):
+        return name.lower().endswith(self.extensions)
+
+    def _add(self, names):
+        """처음 보는 파일만 골라 결과 큐에 넣음"""
+        with self._lock:
+            new = [name for name in names if name not in self._known]
+            self._known.update(new)
+        if new:
+            self._results.put(new)
+
+    def _scan(self):
+        """폴더를 훑으며 batch_size개씩 결과를 넘김"""
+        batch = []
+        try:
+            with os.scandir(self.folder) as entries:
+                for entry in entries:
+                    if self._stop.is_set():
+                        return
+                    if self._is_image(entry.name) and entry.is_file():
+                        batch.append(entry.name)
+                        if len(batch) >= self.batch_size:
+                            self._add(batch)
+                            batch = []
+        except OSError as e:
+            print(f"이미지 폴더 스캔 중 오류 발생: {e}")
+        self._add(batch)
+
+    def _folder_mtime(self):
+        try:
+            return os.stat(self.folder).st_mtime_ns
+        except OSError:
+            return None
+
+    def _run(self):
+        mtime = self._folder_mtime()
+        self._scan()
+        self._scan_done.set()
+        if self._stop.is_set():
+            return
+
+        if Observer is not None:
+            scanner = self
+
+            class Handler(FileSystemEventHandler):
+                def on_created(self, event):
+                    if not event.is_directory:
+                        scanner._on_path(event.src_path)
+
+                def on_moved(self, event):
+                    if not event.is_directory:
+                        scanner._on_path(event.dest_path)
+
+            try:
+                self._observer = Observer()
+                self._observer.schedule(Handler(), self.folder, recursive=False)
+                self._observer.start()
+                # 감시를 시작하기 전에 생긴 파일 확인
+                self._scan()
+                return
+            except Exception as e:
+                print(f"폴더 감시를 시작할 수 없어 폴링으로 대체합니다: {e}")
+                self._observer = None
+
+        # 폴링: 폴더 수정 시간이 바뀐 경우에만 다시 훑음
+        while not self._stop.wait(self.POLL_INTERVAL):
+            current = self._folder_mtime()
+            if current != mtime:
+                mtime = current
+                self._scan()
+
+    def _on_path(self, path):
+        if os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.folder):
+            return
+        name = os.path.basename(path)
+        if self._is_image(name):
+            self._add([name])
@@ -0,0 +1,149 @@
+import itertools
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def _tokenize(text):
+    """비어 있지 않은 줄을 토큰 목록으로 나누고 (줄별 토큰 수, 모든 값) 배열로 반환
+
+    숫자가 아닌 토큰이 있는 줄은 건너뛴다.
+    """
+    rows = [row for row in (line.split() for line in text.splitlines()) if row]
+    try:
+        values = np.array(list(itertools.chain.from_iterable(rows)), dtype=np.float64)
+    except ValueError:
+        # 잘못된 값이 있는 줄만 골라 버리고 다시 변환
+        valid = []
+        for row in rows:
+            try:
+                np.array(row, dtype=np.float64)
+                valid.append(row)
+            except ValueError:
+                print(f"라벨 데이터 로드 중 오류 발생: 잘못된 줄 '{' '.join(row)}'")
+        rows = valid
+        values = np.array(list(itertools.chain.from_iterable(rows)), dtype=np.float64)
+    counts = np.fromiter(map(len, rows), dtype=np.int64, count=len(rows))
+    return counts, values
+
+
+def parse_boxes(text, width, height):
+    """YOLO 바운딩 박스 라벨을 이미지 좌표 (N, 5) 배열 [x1, y1, x2, y2, class_id]로 변환"""
+    counts, values = _tokenize(text)
+    starts = np.cumsum(counts) - counts
+    starts = starts[counts >= 5]  # 값이 부족한 줄은 건너뜀
+    fields = values[starts[:, None] + np.arange(5)]
+    center, extent = fields[:, 1:3], fields[:, 3:5]
+    size = np.array([width, height], dtype=np.float64)
+    boxes = np.empty((len(fields), 5), dtype=np.float64)
+    # 기존과 같이 정수 픽셀로 잘라냄
+    boxes[:, 0:2] = np.trunc((center - extent / 2) * size)
+    boxes[:, 2:4] = np.trunc((center + extent / 2) * size)
+    boxes[:, 4] = fields[:, 0].astype(np.int64)
+    return boxes
+
+
+def parse_polygons(text, width, height):
+    """YOLO 세그멘테이션 라벨을 이미지 좌표 (꼭지점 (V, 2), 시작 위치 (N + 1,), 클래스 (N,))로 변환
+
+    짝이 맞지 않는 마지막 좌표는 버리고, 꼭지점이 3개 미만인 폴리곤은 건너뛴다.
+    """
+    counts, values = _tokenize(text)
+    starts = np.cumsum(counts) - counts
+    vertex_counts = (counts - 1) // 2
+    valid = vertex_counts >= 3
+    starts, vertex_counts = starts[valid], vertex_counts[valid]
+    offsets = np.concatenate([[0], np.cumsum(vertex_counts)]).astype(np.int64)
+    # 폴리곤마다 (클래스 다음 위치 + 2 * 꼭지점 번호)에서 x, y를 읽음
+    local = np.arange(offsets[-1]) - np.repeat(offsets[:-1], vertex_counts)
+    x_index = np.repeat(starts + 1, vertex_counts) + 2 * local
+    vertices = np.stack([values[x_index] * width, values[x_index + 1] * height], axis=1)
+    return vertices, offsets, values[starts].astype(np.int64)
+
+
+def format_boxes(normalized, class_ids):
+    """정규화한 박스 (N, 4) [x_center, y_center, width, height]와 클래스를 YOLO 바운딩 박스 라벨 문자열로 변환
+
+    정규화는 BoxStore.normalized()가 배열 전체에 한 번에 한다.
+    """
+    rows = np.asarray(normalized, dtype=np.float64).reshape(-1, 4).tolist()
+    return "".join("%d %.6f %.6f %.6f %.6f\n" % (class_id, *row)
+                   for class_id, row in zip(np.asarray(class_ids).tolist(), rows))
+
+
+def format_polygons(normalized, offsets, class_ids):
+    """정규화한 꼭지점 (V, 2), 시작 위치, 클래스를 YOLO 세그멘테이션 라벨 문자열로 변환
+
+    정규화는 PolygonStore.normalized()가 배열 전체에 한 번에 한다.
+    """
+    normalized = np.asarray(normalized, dtype=np.float64).ravel().tolist()
+    offsets = np.asarray(offsets).tolist()
+    lines = []
+    for i, class_id in enumerate(np.asarray(class_ids).tolist()):
+        coords = normalized[2 * offsets[i]:2 * offsets[i + 1]]
+        if coords:  # 유효한 점이 있는 경우만 저장
+            lines.append(("%d" + " %.6f" * len(coords) + "\n") % (class_id, *coords))
+    return "".join(lines)
+
+
+def read_class_ids(text):
+    """라벨 문자열에서 줄마다 클래스 ID만 읽음 (좌표는 변환하지 않음)"""
+    heads = [line.split(None, 1)[0] for line in text.splitlines() if line.strip()]
+    try:
+        return np.array(heads, dtype=np.float64).astype(np.int64)
+    except ValueError:
+        valid = []
+        for head in heads:
+            try:
+                valid.append(float(head))
+            except ValueError:
+                continue  # 잘못된 줄은 건너뜀
+        return np.array(valid, dtype=np.float64).astype(np.int64)
+
+
+def parse_labels(text, mode, width, height):
+    """모드에 맞게 라벨 문자열 변환 (bbox: 박스 배열, polygon: 폴리곤 배열 튜플)"""
+    if mode == "polygon":
+        return parse_polygons(text, width, height)
+    return parse_boxes(text, width, height)
+
+
+class LabelCache:
+    """파싱한 라벨 파일을 (경로, 모드)별로 보관하는 캐시
+
+    파일의 수정 시간과 크기가 그대로이면 다시 읽지 않으므로 모드를 오가거나
+    미리 읽어 둔 라벨을 다시 표시할 때 디스크를 읽지 않는다. 작업 스레드에서도 사용한다.
+    반환된 배열은 여러 곳에서 공유하므로 수정하지 않는다 (주석 저장소는 복사하여 보관).
+    """
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (path, mode) -> (검증 키, 파싱 결과)
+        self._lock = threading.Lock()
+
+    def load(self, path, mode, width, height):
+        """라벨 파일을 읽어 파싱 결과 반환 (파일이 없으면 None)"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = (path, mode)
+        check = (stat.st_mtime_ns, stat.st_size, width, height)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == check:
+                self._entries.move_to_end(key)
+                return cached[1]
+        with open(path, 'r') as f:
+            parsed = parse_labels(f.read(), mode, width, height)
+        with self._lock:
+            self._entries[key] = (check, parsed)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return parsed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,122 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from label_codec import read_class_ids
+
+LABEL_FOLDERS = {"bbox": "bounding", "polygon": "poly"}
+
+
+class LabelIndex:
+    """저장 경로의 모든 라벨 파일에 어떤 클래스가 몇 개 있는지 기억하는 데이터셋 색인
+
+    처음에는 모든 라벨 파일을 여러 스레드로 읽고, 이후 refresh_async()는 수정 시간과 크기가
+    바뀐 파일만 다시 읽는다. 프로그램이 직접 저장한 파일은 update()로 그 파일만 반영한다.
+    이미지 이름(확장자 제외) 단위로 조회한다.
+    """
+    def __init__(self, save_dir, workers=4):
+        self.save_dir = save_dir
+        self.workers = workers
+        # mode -> {이미지 이름: ((수정 시간, 크기), {class_id: 객체 수})}
+        self._entries = {mode: {} for mode in LABEL_FOLDERS}
+        self._lock = threading.Lock()  # _entries 보호
+        self._refresh_lock = threading.Lock()  # 동시에 한 번만 갱신
+        self._pending = threading.Lock()  # 대기 중인 백그라운드 갱신 (하나만 둠)
+        self.ready = False  # 처음 색인이 끝났는지 여부
+
+    def refresh_async(self):
+        """백그라운드 스레드에서 색인 갱신 (이미 시작을 기다리는 갱신이 있으면 그것으로 대신함)"""
+        if self._pending.acquire(blocking=False):
+            threading.Thread(target=self._refresh_pending, name="label-index", daemon=True).start()
+
+    def _refresh_pending(self):
+        with self._refresh_lock:
+            self._pending.release()  # 이 시점 이후의 변경은 다음 갱신이 반영
+            self._refresh()
+
+    def _refresh(self):
+        """라벨 폴더를 훑어 새로 생기거나 바뀐 파일만 다시 읽고 지워진 파일은 색인에서 제거"""
+        changed = []
+        current = {}
+        for mode, folder in LABEL_FOLDERS.items():
+            label_dir = os.path.join(self.save_dir, folder, "label")
+            current[mode] = {}
+            try:
+                entries = list(os.scandir(label_dir))
+            except FileNotFoundError:
+                continue
+            known = self._entries[mode]
+            for entry in entries:
+                if not entry.name.endswith('.txt') or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                stem = entry.name[:-4]
+                check = (stat.st_mtime_ns, stat.st_size)
+                current[mode][stem] = check
+                cached = known.get(stem)
+                if cached is None or cached[0] != check:
+                    changed.append((mode, stem, entry.path, check))
+
+        results = []
+        if changed:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(lambda item: self._read(*item), changed))
+
+        with self._lock:
+            for mode, stems in current.items():
+                entries = self._entries[mode]
+                for stem in [s for s in entries if s not in stems]:
+                    del entries[stem]
+            for mode, stem, check, counts in results:
+                if counts is not None:
+                    self._entries[mode][stem] = (check, counts)
+        self.ready = True
+
+    def update(self, mode, stem, path):
+        """저장한 라벨 파일 하나만 다시 읽어 색인에 반영"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        _, _, check, counts = self._read(mode, stem, path, (stat.st_mtime_ns, stat.st_size))
+        if counts is not None:
+            with self._lock:
+                self._entries[mode][stem] = (check, counts)
+
+    def _read(self, mode, stem, path, check):
+        try:
+            with open(path, 'r') as f:
+                class_ids, counts = np.unique(read_class_ids(f.read()), return_counts=True)
+            return mode, stem, check, dict(zip(class_ids.tolist(), counts.tolist()))
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"라벨 색인 중 오류 발생: {path}: {e}")
+            return mode, stem, check, None
+
+    def is_labeled(self, stem, mode):
+        """이미지에 해당 모드의 객체가 하나라도 저장되어 있는지 확인"""
+        with self._lock:
+            entry = self._entries[mode].get(stem)
+        return entry is not None and bool(entry[1])
+
+    def has_class(self, stem, mode, class_id):
+        """이미지의 해당 모드 라벨에 class_id 객체가 있는지 확인"""
+        with self._lock:
+            entry = self._entries[mode].get(stem)
+        return entry is not None and entry[1].get(class_id, 0) > 0
+
+    def class_counts(self, mode):
+        """클래스별 (객체 수, 이미지 수)"""
+        totals = {}
+        with self._lock:
+            for _, counts in self._entries[mode].values():
+                for class_id, count in counts.items():
+                    objects, images = totals.get(class_id, (0, 0))
+                    totals[class_id] = (objects + count, images + 1)
+        return totals
+
+    def labeled_count(self, mode):
+        """객체가 하나 이상 저장된 이미지 수"""
+        with self._lock:
+            return sum(1 for _, counts in self._entries[mode].values() if counts)
@@ -0,0 +1,500 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+
+import cv2
+import numpy as np
+
+from bmp_loader import load_image
+from save_queue import atomic_write
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """파일 내용의 SHA-1 해시"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def empty_prediction():
+    """객체가 없는 예측 결과"""
+    return {'boxes': np.zeros((0, 6), dtype=np.float32),
+            'vertices': np.zeros((0, 2), dtype=np.float32),
+            'offsets': np.zeros(1, dtype=np.int64)}
+
+
+def _box_overlap(a, b):
+    """박스 (N, 4)와 (M, 4)의 교집합 넓이 (N, M)와 각 박스 넓이"""
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter, area_a, area_b
+
+
+def box_iou(a, b):
+    """박스 (N, 4)와 (M, 4) [x1, y1, x2, y2]의 IoU 행렬 (N, M)"""
+    inter, area_a, area_b = _box_overlap(a, b)
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.where(union > 0, union, 1), 0.0)
+
+
+def tile_origins(length, tile_size, overlap):
+    """길이 length를 overlap 비율만큼 겹치는 tile_size 구간으로 덮는 시작 위치 목록 (마지막 구간은 끝에 맞춤)"""
+    if length <= tile_size:
+        return [0]
+    stride = max(1, int(tile_size * (1 - overlap)))
+    origins = list(range(0, length - tile_size, stride))
+    return origins + [length - tile_size]
+
+
+def select_prediction(prediction, keep):
+    """예측에서 keep (인덱스 배열) 순서의 객체만 남긴 결과"""
+    offsets = prediction['offsets']
+    result = empty_prediction()
+    result['boxes'] = prediction['boxes'][keep]
+    if len(offsets) > 1:
+        # 세그멘테이션 결과 (객체마다 폴리곤)
+        polygons = [prediction['vertices'][offsets[i]:offsets[i + 1]] for i in keep]
+        counts = [len(points) for points in polygons]
+        if polygons:
+            result['vertices'] = np.concatenate(polygons).reshape(-1, 2)
+        result['offsets'] = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    return result
+
+
+def merge_predictions(predictions, shifts, iou_threshold, containment=0.6):
+    """타일별 예측을 이미지 좌표로 옮겨 합치고 클래스별 NMS로 중복을 제거
+
+    타일 경계에 잘린 객체 조각은 같은 객체의 온전한 박스와 IoU가 낮으므로,
+    점수가 더 높은 같은 클래스 박스에 넓이의 containment 이상이 포함된 박스도 제거한다.
+    """
+    boxes, vertices, counts = [], [], []
+    segmentation = any(len(p['offsets']) > 1 for p in predictions)
+    for prediction, (dx, dy) in zip(predictions, shifts):
+        n = len(prediction['boxes'])
+        if not n:
+            continue
+        shifted = prediction['boxes'].copy()
+        shifted[:, :4] += (dx, dy, dx, dy)
+        boxes.append(shifted)
+        if segmentation:
+            offsets = prediction['offsets'] if len(prediction['offsets']) > 1 else np.zeros(n + 1, dtype=np.int64)
+            vertices.append(prediction['vertices'] + (dx, dy))
+            counts.append(np.diff(offsets))
+    if not boxes:
+        return empty_prediction()
+    merged = empty_prediction()
+    merged['boxes'] = np.concatenate(boxes)
+    if segmentation:
+        merged['vertices'] = np.concatenate(vertices).astype(np.float32)
+        merged['offsets'] = np.concatenate([[0], np.cumsum(np.concatenate(counts))]).astype(np.int64)
+
+    all_boxes = merged['boxes']
+    xywh = np.column_stack([all_boxes[:, :2], all_boxes[:, 2:4] - all_boxes[:, :2]])
+    keep = cv2.dnn.NMSBoxesBatched(xywh.tolist(), all_boxes[:, 5].tolist(), all_boxes[:, 4].astype(np.int64).tolist(),
+                                   0.0, iou_threshold)
+    keep = np.asarray(keep, dtype=np.int64).reshape(-1)
+    keep = keep[np.argsort(-all_boxes[keep, 5], kind='stable')]
+
+    # 점수 순으로 보며 앞서 남긴 같은 클래스 박스에 대부분 포함된 조각 제거
+    kept = all_boxes[keep]
+    inter, area, _ = _box_overlap(kept[:, :4], kept[:, :4])
+    contained = inter / np.maximum(area[:, None], 1e-9) >= containment
+    same_class = kept[:, None, 4] == kept[None, :, 4]
+    suppressed = np.zeros(len(keep), dtype=bool)
+    for i in range(len(keep)):
+        earlier = ~suppressed[:i]
+        suppressed[i] = (contained[i, :i] & same_class[i, :i] & earlier).any()
+    return select_prediction(merged, keep[~suppressed])
+
+
+def proposals_to_polygons(prediction, keep):
+    """예측에서 keep인 객체를 폴리곤 (꼭지점, 시작 위치, 클래스)으로 변환
+
+    세그멘테이션 모델이 아니어서 윤곽선이 없으면 (offsets가 [0]뿐이거나 빈 구간) 박스를 사각형 폴리곤으로 사용한다.
+    """
+    boxes = prediction['boxes']
+    offsets = prediction['offsets']
+    has_outlines = len(offsets) == len(boxes) + 1
+    polygons = []
+    for i in np.flatnonzero(keep):
+        points = prediction['vertices'][offsets[i]:offsets[i + 1]] if has_outlines else ()
+        if len(points) < 3:
+            x1, y1, x2, y2 = boxes[i, :4]
+            points = np.array([(x1, y1), (x2, y1), (x2, y2), (x1, y2)], dtype=np.float32)
+        polygons.append(points)
+    vertices = np.concatenate(polygons) if polygons else np.zeros((0, 2), dtype=np.float32)
+    counts = [len(points) for points in polygons]
+    return vertices, np.concatenate([[0], np.cumsum(counts)]).astype(np.int64), boxes[keep, 4].astype(np.int64)
+
+
+class OnnxDetector:
+    """cv2.dnn으로 YOLO 형식 ONNX 검출/세그멘테이션 모델을 CPU에서 실행하는 클래스
+
+    YOLOv5 (앵커별 행, objectness 포함)와 YOLOv8 (채널 우선) 출력 형식을 지원하고,
+    마스크 프로토타입 출력이 있으면 세그멘테이션 모델로 보고 객체마다 윤곽선 폴리곤도 만든다.
+    cv2.dnn.Net은 스레드 간에 공유하지 않으므로 작업 스레드마다 따로 만든다.
+    """
+    MASK_THRESHOLD = 0.5
+
+    def __init__(self, model_path, input_size=640, conf_threshold=0.25, iou_threshold=0.45):
+        self.input_size = input_size
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self.net = cv2.dnn.readNetFromONNX(model_path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.output_names = self.net.getUnconnectedOutLayersNames()
+        self.batching = True  # 여러 장을 한 번에 넣을 수 있는지 (고정 배치 모델이면 처음 실패 후 한 장씩)
+
+    def predict(self, images):
+        """이미지 목록의 예측 결과 목록 ({'boxes': (N, 6) [x1, y1, x2, y2, class_id, score], ...})"""
+        letterboxed = [self._letterbox(image) for image in images]
+        canvases = [canvas for canvas, _, _ in letterboxed]
+        outputs = None
+        if self.batching and len(images) > 1:
+            try:
+                outputs = self._forward(canvases)
+            except cv2.error:
+                self.batching = False
+        if outputs is None:
+            per_image = [self._forward([canvas]) for canvas in canvases]
+            outputs = [np.concatenate(parts) for parts in zip(*per_image)]
+        protos = outputs[1] if len(outputs) > 1 else None
+        return [self._decode(outputs[0][i], None if protos is None else protos[i], ratio, pad, image.shape[:2])
+                for i, (image, (_, ratio, pad)) in enumerate(zip(images, letterboxed))]
+
+    def _forward(self, canvases):
+        blob = cv2.dnn.blobFromImages(canvases, 1 / 255.0, (self.input_size, self.input_size), swapRB=True)
+        self.net.setInput(blob)
+        outputs = self.net.forward(self.output_names)
+        # 검출 출력 (3차원)을 앞에, 마스크 프로토타입 (4차원)을 뒤에
+        return sorted(outputs, key=lambda output: output.ndim)
+
+    def _letterbox(self, image):
+        """비율을 유지하며 입력 크기에 맞추고 남는 부분을 회색으로 채움"""
+        size = self.input_size
+        h, w = image.shape[:2]
+        ratio = min(size / h, size / w)
+        new_w, new_h = max(1, round(w * ratio)), max(1, round(h * ratio))
+        pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+        canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+        canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(image, (new_w, new_h),
+                                                                      interpolation=cv2.INTER_LINEAR)
+        return canvas, ratio, (pad_x, pad_y)
+
+    def _decode(self, output, protos, ratio, pad, shape):
+        """모델 출력 하나를 이미지 좌표 예측 결과로 변환"""
+        mask_dim = 0 if protos is None else protos.shape[0]
+        if output.shape[0] > output.shape[1]:
+            # YOLOv5: (앵커, 4 + objectness + 클래스 + 마스크 계수)
+            rows = output
+            scores = rows[:, 5:rows.shape[1] - mask_dim] * rows[:, 4:5]
+        else:
+            # YOLOv8: (4 + 클래스 + 마스크 계수, 앵커)
+            rows = output.T
+            scores = rows[:, 4:rows.shape[1] - mask_dim]
+        class_ids = np.argmax(scores, axis=1)
+        confidences = scores[np.arange(len(scores)), class_ids]
+        candidates = np.flatnonzero(confidences >= self.conf_threshold)
+        if not len(candidates):
+            return empty_prediction()
+
+        cx, cy, bw, bh = rows[candidates, :4].T
+        xywh = np.stack([cx - bw / 2, cy - bh / 2, bw, bh], axis=1)
+        keep = cv2.dnn.NMSBoxesBatched(xywh.tolist(), confidences[candidates].tolist(),
+                                       class_ids[candidates].tolist(), self.conf_threshold, self.iou_threshold)
+        keep = candidates[np.asarray(keep, dtype=np.int64).reshape(-1)]
+
+        # 레터박스 좌표 -> 이미지 좌표
+        h, w = shape
+        cx, cy, bw, bh = rows[keep, :4].T
+        letterbox_boxes = np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], axis=1)
+        boxes = (letterbox_boxes - np.array([pad[0], pad[1], pad[0], pad[1]])) / ratio
+        boxes = np.clip(boxes, 0, [w, h, w, h])
+        result = empty_prediction()
+        result['boxes'] = np.column_stack([boxes, class_ids[keep], confidences[keep]]).astype(np.float32)
+        if mask_dim:
+            result['vertices'], result['offsets'] = self._mask_polygons(
+                rows[keep, -mask_dim:], protos, letterbox_boxes, ratio, pad, shape)
+        return result
+
+    def _mask_polygons(self, coefficients, protos, letterbox_boxes, ratio, pad, shape):
+        """객체별 마스크를 박스 영역에서만 계산하여 윤곽선 폴리곤으로 변환 (박스와 같은 순서)"""
+        mask_dim, proto_h, proto_w = protos.shape
+        step_x, step_y = self.input_size / proto_w, self.input_size / proto_h
+        h, w = shape
+        polygons = []
+        for coefficient, (lx1, ly1, lx2, ly2) in zip(coefficients, letterbox_boxes):
+            px1, py1 = max(0, int(lx1 / step_x)), max(0, int(ly1 / step_y))
+            px2, py2 = min(proto_w, int(np.ceil(lx2 / step_x))), min(proto_h, int(np.ceil(ly2 / step_y)))
+            if px2 <= px1 or py2 <= py1:
+                polygons.append(np.zeros((0, 2), dtype=np.float32))
+                continue
+            crop = protos[:, py1:py2, px1:px2].reshape(mask_dim, -1)
+            logits = (coefficient @ crop).reshape(py2 - py1, px2 - px1)
+            # 프로토타입 영역을 이미지 해상도로 키운 뒤 박스 밖은 지움
+            x0, y0 = (px1 * step_x - pad[0]) / ratio, (py1 * step_y - pad[1]) / ratio
+            size = (max(1, round((px2 - px1) * step_x / ratio)), max(1, round((py2 - py1) * step_y / ratio)))
+            mask = (cv2.resize(logits, size, interpolation=cv2.INTER_LINEAR) > 0).astype(np.uint8)  # sigmoid > 0.5
+            bx1, by1 = round((lx1 - pad[0]) / ratio - x0), round((ly1 - pad[1]) / ratio - y0)
+            bx2, by2 = round((lx2 - pad[0]) / ratio - x0), round((ly2 - pad[1]) / ratio - y0)
+            mask[:max(0, by1)] = 0
+            mask[max(0, by2):] = 0
+            mask[:, :max(0, bx1)] = 0
+            mask[:, max(0, bx2):] = 0
+            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            if not contours:
+                polygons.append(np.zeros((0, 2), dtype=np.float32))
+                continue
+            contour = max(contours, key=cv2.contourArea)
+            approx = cv2.approxPolyDP(contour, 0.005 * cv2.arcLength(contour, True), True).reshape(-1, 2)
+            points = approx.astype(np.float32) + (x0, y0)
+            polygons.append(np.clip(points, 0, [w, h]).astype(np.float32))
+        counts = [len(points) for points in polygons]
+        return np.concatenate(polygons).reshape(-1, 2), np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+
+class SlicedDetector:
+    """큰 이미지를 겹치는 타일로 나눠 원본 해상도로 예측하고 합치는 검출기 (OnnxDetector와 같은 predict)
+
+    이미지 전체를 모델 입력 크기로 줄이면 사라지는 작은 객체를 찾기 위한 것으로,
+    타일은 workers개의 스레드에 나눠 각 스레드의 OnnxDetector가 배치로 실행한다.
+    """
+    def __init__(self, model_path, tile_size=640, overlap=0.2, workers=2, **options):
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.iou_threshold = options.get('iou_threshold', 0.45)
+        self.workers = workers
+        self._detectors = Queue()  # 쉬고 있는 검출기 (cv2.dnn.Net은 스레드마다 하나씩 사용)
+        for _ in range(workers):
+            self._detectors.put(OnnxDetector(model_path, **options))
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prelabel-tile")
+
+    def predict(self, images):
+        return [self._predict_tiles(image) for image in images]
+
+    def close(self):
+        self._executor.shutdown()
+
+    def _predict_tiles(self, image):
+        h, w = image.shape[:2]
+        shifts = [(x, y) for y in tile_origins(h, self.tile_size, self.overlap)
+                  for x in tile_origins(w, self.tile_size, self.overlap)]
+        tiles = [image[y:y + self.tile_size, x:x + self.tile_size] for x, y in shifts]
+        chunk = -(-len(tiles) // self.workers)
+        futures = [self._executor.submit(self._run, tiles[i:i + chunk]) for i in range(0, len(tiles), chunk)]
+        predictions = [prediction for future in futures for prediction in future.result()]
+        return merge_predictions(predictions, shifts, self.iou_threshold)
+
+    def _run(self, tiles):
+        detector = self._detectors.get()
+        try:
+            return detector.predict(tiles)
+        finally:
+            self._detectors.put(detector)
+
+
+class Prelabeler:
+    """다음에 볼 이미지들의 자동 라벨 제안을 작업 스레드에서 배치로 만들고 디스크에 캐시하는 클래스
+
+    request(paths)로 탐색 순서대로 요청하면 작업 스레드가 앞에서부터 batch_size장씩 묶어 실행하며,
+    새 요청은 아직 시작하지 않은 이전 요청을 대신한다.
+    결과는 (이미지 내용 해시, 모델 해시)로 이름 붙인 파일에 저장하므로 같은 이미지를 다시 보거나
+    프로그램을 다시 실행해도 모델을 다시 실행하지 않는다. 완성된 경로는 poll()로 가져간다.
+    tiling에 SlicedDetector 설정 (tile_size, overlap, workers)을 주면 타일로 나눠 예측한다.
+    모델 해시 계산과 모델 로드도 작업 스레드에서 하며, 끝나면 loaded, 실패하면 error가 설정된다.
+    """
+    BATCH_SIZE = 4  # 한 번에 모델에 넣을 이미지 수
+
+    def __init__(self, model_path, cache_dir, workers=1, batch_size=BATCH_SIZE, max_items=256, tiling=None,
+                 **options):
+        self.model_path = model_path
+        self.options = options  # OnnxDetector 설정 (입력 크기, 임계값)
+        self.tiling = tiling
+        self.batch_size = batch_size
+        self.max_items = max_items
+        self.base_cache_dir = cache_dir
+        self.model_hash = None  # 모델 로드가 끝나면 설정
+        self.cache_dir = None  # 모델 해시별 예측 캐시 폴더
+        self.loaded = threading.Event()  # 모델 로드가 끝났는지 (실패해도 설정)
+        self.error = None  # 모델 로드 중 발생한 오류
+        self._memory = OrderedDict()  # (경로, 크기, 수정 시간) -> 예측 결과
+        self._hashes = {}  # (경로, 크기, 수정 시간) -> 이미지 내용 해시
+        self._queue = []  # 아직 시작하지 않은 요청 경로 (탐색 순서)
+        self._running = set()
+        self._ready = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._run, args=(i == 0,), name=f"prelabel-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def get(self, path):
+        """메모리에 있는 예측 결과 (없으면 None)
+
+        UI 스레드에서 호출하므로 이미지 해시와 디스크 캐시 확인은 하지 않는다.
+        없으면 맨 앞에 요청해 두고, 작업 스레드가 캐시를 읽거나 예측을 마치면 poll()로 알린다.
+        """
+        key = self._file_key(path)
+        if key is None:
+            return None
+        with self._cond:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+            if path not in self._running and path not in self._queue:
+                self._queue.insert(0, path)
+                self._cond.notify()
+        return None
+
+    def request(self, paths):
+        """paths 순서대로 예측하도록 요청 (이전 요청 중 시작하지 않은 것은 취소)"""
+        with self._cond:
+            self._queue = [path for path in paths
+                           if path not in self._running and self._file_key(path) not in self._memory]
+            self._cond.notify_all()
+
+    def poll(self):
+        """마지막 호출 이후 예측이 끝난 경로 목록"""
+        with self._cond:
+            ready, self._ready = self._ready, []
+        return ready
+
+    def shutdown(self, wait=False):
+        """남은 요청을 취소하고 작업 스레드 종료 (wait이면 실행 중인 배치가 끝날 때까지 기다림)
+
+        프로그램 종료 시에는 wait=True로 호출한다. 모델 실행 중인 스레드가 남은 채 종료하면
+        OpenCV 내부 스레드가 정리되지 않아 프로세스가 비정상 종료될 수 있다.
+        """
+        with self._cond:
+            self._closed = True
+            self._queue = []
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _file_key(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (path, stat.st_size, stat.st_mtime_ns)
+
+    def _cache_path(self, path, key):
+        image_hash = self._hashes.get(key)
+        if image_hash is None:
+            image_hash = self._hashes[key] = file_hash(path)
+        return os.path.join(self.cache_dir, image_hash[:2], image_hash + '.npz')
+
+    def _load_cached(self, path, key):
+        cache_path = self._cache_path(path, key)
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with np.load(cache_path) as data:
+                return {name: data[name] for name in data.files}
+        except (OSError, ValueError) as e:
+            print(f"예측 캐시 읽기 중 오류 발생: {cache_path}: {e}")
+            return None
+
+    def _store(self, key, prediction):
+        with self._cond:
+            self._memory[key] = prediction
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+    def _load(self):
+        """모델 해시로 캐시 폴더를 정하고 모델을 불러옴 (첫 작업 스레드에서 실행)"""
+        try:
+            # 설정이 다르면 결과도 다르므로 모델 해시에 포함 (타일 스레드 수는 결과와 무관)
+            digest = hashlib.sha1(file_hash(self.model_path).encode())
+            digest.update(repr(sorted(self.options.items())).encode())
+            if self.tiling:
+                digest.update(repr(sorted((k, v) for k, v in self.tiling.items() if k != 'workers')).encode())
+            self.model_hash = digest.hexdigest()
+            self.cache_dir = os.path.join(self.base_cache_dir, self.model_hash[:16])
+            return self._make_detector()
+        except Exception as e:
+            self.error = e
+            self.shutdown()
+            return None
+        finally:
+            self.loaded.set()
+
+    def _make_detector(self):
+        if self.tiling:
+            return SlicedDetector(self.model_path, **self.tiling, **self.options)
+        return OnnxDetector(self.model_path, **self.options)
+
+    def _run(self, first):
+        if first:
+            detector = self._load()
+        else:
+            self.loaded.wait()
+            detector = None if self.error is not None else self._make_detector()
+        if detector is None:
+            return
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    if isinstance(detector, SlicedDetector):
+                        detector.close()
+                    return
+                batch = self._queue[:self.batch_size]
+                del self._queue[:self.batch_size]
+                self._running.update(batch)
+            try:
+                self._process(detector, batch)
+            except Exception as e:
+                print(f"자동 라벨 예측 중 오류 발생: {e}")
+            finally:
+                with self._cond:
+                    self._running.difference_update(batch)
+
+    def _process(self, detector, batch):
+        """캐시에 없는 이미지만 모아 한 번에 예측하고 결과를 저장"""
+        todo = []
+        for path in batch:
+            key = self._file_key(path)
+            if key is None:
+                continue
+            prediction = self._load_cached(path, key)
+            if prediction is None:
+                image = load_image(path)
+                if image is not None:
+                    todo.append((path, key, image))
+                continue
+            self._finish(path, key, prediction)
+        if not todo:
+            return
+        predictions = detector.predict([image for _, _, image in todo])
+        for (path, key, _), prediction in zip(todo, predictions):
+            buffer = io.BytesIO()
+            np.savez(buffer, **prediction)
+            cache_path = self._cache_path(path, key)
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            atomic_write(cache_path, buffer.getvalue())
+            self._finish(path, key, prediction)
+
+    def _finish(self, path, key, prediction):
+        self._store(key, prediction)
+        with self._cond:
+            self._ready.append(path)
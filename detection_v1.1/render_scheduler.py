@@ -0,0 +1,47 @@
+import time
+
+
+class RenderScheduler:
+    """화면 갱신 요청을 모아 프레임당 최대 한 번만 그리는 스케줄러
+
+    Tk는 렌더링할 수 있는 것보다 많은 마우스 이벤트를 전달하므로, 이벤트마다 그리지 않고
+    '다시 그려야 함'만 표시해 두었다가 남은 이벤트를 처리한 뒤(after_idle) 한 번에 그린다.
+    직전 프레임 이후 프레임 간격이 지나지 않았으면 남은 시간만큼 기다렸다가 그린다.
+    """
+    def __init__(self, window, render, target_fps=60):
+        self.window = window
+        self.render = render  # 실제로 화면을 그리는 함수
+        self.target_fps = target_fps
+        self._pending = None  # 예약된 after 콜백 ID
+        self._last_frame = 0.0
+
+    @property
+    def frame_interval(self):
+        """목표 프레임 간격 (초)"""
+        return 1.0 / max(1, self.target_fps)
+
+    def request(self):
+        """다음 프레임에 다시 그리도록 예약 (이미 예약되어 있으면 무시)"""
+        if self._pending is not None:
+            return
+        delay = self.frame_interval - (time.perf_counter() - self._last_frame)
+        if delay <= 0:
+            self._pending = self.window.after_idle(self._run)
+        else:
+            self._pending = self.window.after(max(1, int(delay * 1000)), self._run)
+
+    def cancel(self):
+        """예약된 갱신 취소 (즉시 그린 경우 호출)"""
+        if self._pending is not None:
+            self.window.after_cancel(self._pending)
+            self._pending = None
+
+    def mark_rendered(self):
+        """방금 화면을 그렸음을 기록하고 예약된 갱신을 취소"""
+        self.cancel()
+        self._last_frame = time.perf_counter()
+
+    def _run(self):
+        self._pending = None
+        self._last_frame = time.perf_counter()
+        self.render()
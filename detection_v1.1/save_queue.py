@@ -0,0 +1,127 @@
+import atexit
+import os
+import queue
+import shutil
+import threading
+
+
+def atomic_write(path, data):
+    """임시 파일에 쓴 뒤 이름을 바꿔, 중간에 중단되어도 기존 파일이 깨지지 않게 저장"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def is_same_content(src, dst):
+    """dst가 src와 같은 파일(하드링크)이거나 src를 그대로 복사한 파일인지 확인"""
+    try:
+        if os.path.samefile(src, dst):
+            return True
+        src_stat, dst_stat = os.stat(src), os.stat(dst)
+    except OSError:
+        return False
+    # 복사 시 수정 시간을 보존하므로 크기와 수정 시간이 같으면 같은 내용으로 본다
+    return src_stat.st_size == dst_stat.st_size and src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+
+
+def link_or_copy(src, dst):
+    """dst를 src와 같은 내용으로 만듦 - 이미 같으면 건너뛰고, 가능하면 하드링크, 안 되면 복사
+
+    반환값: 실제로 파일을 만들었는지 여부
+    """
+    if is_same_content(src, dst):
+        return False
+    tmp_path = f"{dst}.{os.getpid()}.tmp"
+    try:
+        try:
+            os.link(src, tmp_path)
+        except OSError:
+            # 다른 드라이브이거나 하드링크를 지원하지 않는 파일 시스템
+            shutil.copy2(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
+
+
+class SaveQueue:
+    """저장 작업을 백그라운드 스레드에서 순서대로 처리하는 쓰기 지연(write-behind) 큐
+
+    UI 스레드는 작업을 넣기만 하고 바로 돌아가며, 결과는 poll_results()로 받아 표시한다.
+    큐가 가득 차면 submit이 기다리므로 저장이 밀려도 메모리가 무한정 늘지 않는다.
+    프로그램 종료 시(close 또는 atexit) 남은 작업을 모두 기록한다.
+    """
+    def __init__(self, maxsize=16):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._results = queue.Queue()
+        self._pending = {}  # 아직 기록되지 않은 파일 경로 -> 작업 수
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="save-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, job, paths, description):
+        """저장 작업 추가 - job()은 작업 스레드에서 실행되며 paths는 job이 기록하는 파일들"""
+        with self._cond:
+            for path in paths:
+                self._pending[path] = self._pending.get(path, 0) + 1
+        self._queue.put((job, tuple(paths), description))
+
+    def wait_for(self, path):
+        """path에 대한 저장 작업이 남아 있으면 기록될 때까지 대기 (읽기 전에 호출)"""
+        with self._cond:
+            while self._pending.get(path):
+                self._cond.wait()
+
+    def flush(self):
+        """지금까지 넣은 모든 작업이 끝날 때까지 대기"""
+        self._queue.join()
+
+    def poll_results(self):
+        """완료된 작업 결과 목록 [(성공 여부, 설명, 오류, 기록한 파일 경로들), ...]"""
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def close(self):
+        """남은 작업을 모두 기록하고 작업 스레드 종료"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            job, paths, description = item
+            try:
+                job()
+                self._results.put((True, description, None, paths))
+            except Exception as e:
+                self._results.put((False, description, e, paths))
+            finally:
+                with self._cond:
+                    for path in paths:
+                        self._pending[path] -= 1
+                        if not self._pending[path]:
+                            del self._pending[path]
+                    self._cond.notify_all()
+                self._queue.task_done()
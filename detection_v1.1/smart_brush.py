@@ -0,0 +1,144 @@
+import math
+import threading
+
+import cv2
+import numpy as np
+
+from display_renderer import clip_rect
+
+GRABCUT = "grabcut"
+WATERSHED = "watershed"
+
+
+def refine_stroke(image, image_size, stroke, method=GRABCUT, max_side=512, iterations=3, epsilon_ratio=0.005):
+    """브러시 스트로크를 물체 경계에 맞게 보정한 폴리곤 점 목록 (이미지 좌표, 실패하면 빈 목록)
+
+    스트로크 주변 ROI에서만 계산하며, ROI의 긴 변이 max_side보다 크면 줄여서 계산한다.
+    스트로크는 물체일 가능성이 높은 영역, 스트로크에서 떨어진 ROI 가장자리는 배경으로 두고
+    GrabCut 또는 watershed로 그 사이의 경계를 찾는다.
+    image는 원본 크기 image_size (width, height)를 축소한 미리보기여도 된다.
+    """
+    bounds = stroke.clipped_bounds()
+    if bounds is None:
+        return []
+    width, height = image_size
+    pad = max(16, int(2 * stroke.radius))
+    x0, y0, x1, y1 = clip_rect((bounds[0] - pad, bounds[1] - pad, bounds[2] + pad, bounds[3] + pad), width, height)
+    work_scale = min(1.0, max_side / max(x1 - x0, y1 - y0))
+    work_w, work_h = max(1, round((x1 - x0) * work_scale)), max(1, round((y1 - y0) * work_scale))
+
+    # ROI에 해당하는 이미지를 계산 해상도로
+    source_scale = image.shape[1] / width
+    crop = image[int(y0 * source_scale):math.ceil(y1 * source_scale),
+                 int(x0 * source_scale):math.ceil(x1 * source_scale)]
+    if crop.shape[1] != work_w or crop.shape[0] != work_h:
+        crop = cv2.resize(crop, (work_w, work_h), interpolation=cv2.INTER_AREA)
+    crop = np.ascontiguousarray(crop)
+
+    painted = np.zeros((work_h, work_w), dtype=np.uint8)
+    stroke.draw(painted, scale=work_scale, origin=(x0 * work_scale, y0 * work_scale))
+    if not painted.any():
+        return []
+    ring_size = max(3, int(pad * work_scale) | 1)
+    near = cv2.dilate(painted, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (ring_size, ring_size)))
+
+    if method == WATERSHED:
+        core_size = max(3, int(stroke.radius * work_scale) | 1)
+        core = cv2.erode(painted, cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (core_size, core_size)))
+        markers = np.zeros((work_h, work_w), dtype=np.int32)  # 0: 미정
+        markers[near == 0] = 1  # 배경
+        markers[(core if core.any() else painted) > 0] = 2  # 물체
+        cv2.watershed(crop, markers)
+        foreground = markers == 2
+    else:
+        mask = np.full((work_h, work_w), cv2.GC_BGD, dtype=np.uint8)
+        mask[near > 0] = cv2.GC_PR_BGD
+        mask[painted > 0] = cv2.GC_PR_FGD
+        if not (mask == cv2.GC_BGD).any():
+            mask[[0, -1], :] = cv2.GC_BGD  # 이미지 끝까지 칠한 경우에도 배경 표본을 둠
+            mask[:, [0, -1]] = cv2.GC_BGD
+        bgd_model = np.zeros((1, 65), dtype=np.float64)
+        fgd_model = np.zeros((1, 65), dtype=np.float64)
+        cv2.grabCut(crop, mask, None, bgd_model, fgd_model, iterations, cv2.GC_INIT_WITH_MASK)
+        foreground = (mask == cv2.GC_FGD) | (mask == cv2.GC_PR_FGD)
+
+    contours, _ = cv2.findContours(foreground.astype(np.uint8), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return []
+    max_contour = max(contours, key=cv2.contourArea)
+    approx = cv2.approxPolyDP(max_contour, epsilon_ratio * cv2.arcLength(max_contour, True), True)
+    if len(approx) < 3:
+        return []
+    points = approx[:, 0].astype(np.float64) / work_scale + (x0, y0)
+    points = np.clip(points, 0, (width, height))
+    return [(float(x), float(y)) for x, y in points]
+
+
+class SmartBrush:
+    """스트로크 경계 보정(refine_stroke)을 작업 스레드에서 실행하는 클래스
+
+    그리는 동안의 미리보기 요청은 아직 시작하지 않은 이전 미리보기를 대신하고 (가장 최근 상태만 계산),
+    스트로크를 마칠 때의 최종 요청은 순서대로 모두 계산한다. 결과는 poll()로 (token, 점 목록)을 가져간다.
+    미리보기는 자주 갱신되도록 더 작은 해상도(preview_side)에서 계산한다.
+    """
+    def __init__(self, method=GRABCUT, max_side=512, preview_side=256):
+        self.method = method
+        self.max_side = max_side
+        self.preview_side = preview_side
+        self._preview = None  # 계산할 미리보기 요청 (token, image, image_size, stroke)
+        self._finals = []  # 계산할 최종 요청
+        self._ready = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="smart-brush", daemon=True)
+        self._thread.start()
+
+    def request(self, token, image, image_size, stroke, final=False):
+        """stroke (스냅샷)의 보정 요청 - 결과는 token과 함께 poll()로 돌려줌"""
+        job = (token, image, image_size, stroke)
+        with self._cond:
+            if final:
+                self._finals.append(job)
+            else:
+                self._preview = job
+            self._cond.notify()
+
+    def poll(self):
+        """마지막 호출 이후 끝난 (token, 점 목록) 목록"""
+        with self._cond:
+            ready, self._ready = self._ready, []
+        return ready
+
+    def cancel(self):
+        """아직 시작하지 않은 요청을 모두 취소 (이미지를 바꿀 때)"""
+        with self._cond:
+            self._preview = None
+            self._finals = []
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._finals and self._preview is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                if self._finals:
+                    job = self._finals.pop(0)
+                    side = self.max_side
+                else:
+                    job, self._preview = self._preview, None
+                    side = self.preview_side
+            token, image, image_size, stroke = job
+            try:
+                points = refine_stroke(image, image_size, stroke, self.method, side)
+            except Exception as e:
+                print(f"스마트 브러시 계산 중 오류 발생: {e}")
+                points = []
+            with self._cond:
+                self._ready.append((token, points))
@@ -0,0 +1,78 @@
+import math
+
+import numpy as np
+
+
+class SpatialIndex:
+    """주석의 경계 사각형을 균일 격자에 등록하여 한 점 근처의 주석만 빠르게 찾는 공간 인덱스
+
+    sync(store)는 주석 저장소(BoxStore/PolygonStore)의 행별 변경 번호를 비교하여
+    마지막 동기화 이후 바뀐 항목만 격자에서 다시 등록한다.
+    query()는 후보 인덱스를 오름차순으로 반환하여 목록을 앞에서부터 훑던 선택 순서를 유지한다.
+    """
+    def __init__(self, cell_size=128):
+        self.cell_size = cell_size  # 격자 한 칸 크기 (이미지 픽셀)
+        self._version = None  # 마지막으로 동기화한 저장소 버전
+        self._revisions = np.zeros(0, dtype=np.int64)  # 마지막 동기화 시점의 행별 변경 번호
+        self._rects = []  # 항목별 경계 사각형 (x0, y0, x1, y1) 또는 None
+        self._cells = {}  # (cx, cy) -> 해당 칸과 겹치는 항목 인덱스 집합
+
+    def sync(self, store):
+        """저장소와 인덱스를 맞춤 - 바뀐 항목만 다시 등록"""
+        if store.version == self._version:
+            return
+        revisions = store.revisions
+        count, old_count = len(revisions), len(self._revisions)
+        common = min(count, old_count)
+        changed = np.flatnonzero(revisions[:common] != self._revisions[:common]).tolist()
+        # 삭제되어 남은 항목 제거
+        for i in range(count, old_count):
+            self._unregister(i)
+        del self._rects[count:]
+        self._rects.extend([None] * (count - len(self._rects)))
+        changed.extend(range(common, count))
+        if changed:
+            bounds = store.bounds()
+            for i in changed:
+                self._unregister(i)
+                rect = bounds[i]
+                self._register(i, None if np.isnan(rect[0]) else tuple(rect.tolist()))
+        self._revisions = revisions.copy()
+        self._version = store.version
+
+    def query(self, x, y, pad=0):
+        """경계 사각형을 pad만큼 넓혔을 때 (x, y)를 포함하는 항목 인덱스 (오름차순)"""
+        found = set()
+        for cell in self._cells_for((x - pad, y - pad, x + pad, y + pad)):
+            found.update(self._cells.get(cell, ()))
+        result = []
+        for i in sorted(found):
+            x0, y0, x1, y1 = self._rects[i]
+            if x0 - pad <= x <= x1 + pad and y0 - pad <= y <= y1 + pad:
+                result.append(i)
+        return result
+
+    def _cells_for(self, rect):
+        size = self.cell_size
+        cx0, cy0 = math.floor(rect[0] / size), math.floor(rect[1] / size)
+        cx1, cy1 = math.floor(rect[2] / size), math.floor(rect[3] / size)
+        return [(cx, cy) for cy in range(cy0, cy1 + 1) for cx in range(cx0, cx1 + 1)]
+
+    def _register(self, i, rect):
+        self._rects[i] = rect
+        if rect is None:
+            return
+        for cell in self._cells_for(rect):
+            self._cells.setdefault(cell, set()).add(i)
+
+    def _unregister(self, i):
+        rect = self._rects[i]
+        if rect is None:
+            return
+        for cell in self._cells_for(rect):
+            members = self._cells.get(cell)
+            if members is not None:
+                members.discard(i)
+                if not members:
+                    del self._cells[cell]
+        self._rects[i] = None
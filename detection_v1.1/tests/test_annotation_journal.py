@@ -0,0 +1,112 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from annotation_journal import AnnotationJournal, replay  # noqa: E402
+from annotation_store import BoxStore  # noqa: E402
+from edit_history import AddBox  # noqa: E402
+
+BOX = (10.0, 10.0, 20.0, 20.0, 0)
+
+
+def reopen(journal, save_dir):
+    """동기화만 하고 닫은 뒤 (비정상 종료 시점) 다시 열기"""
+    journal.close()
+    return AnnotationJournal(save_dir)
+
+
+def test_unsaved_edits_are_recovered(tmp_path):
+    journal = AnnotationJournal(str(tmp_path))
+    journal.begin("a.jpg", "bbox", 0)
+    journal.record("a.jpg", "bbox", AddBox(0, BOX))
+
+    journal = reopen(journal, str(tmp_path))
+    assert journal.recovered == [("a.jpg", "bbox")]
+    records = journal.begin("a.jpg", "bbox", 0)
+    store = BoxStore()
+    replay(records, store)
+    assert list(store) == [BOX]
+    journal.close()
+
+
+def test_edits_after_save_are_recovered(tmp_path):
+    journal = AnnotationJournal(str(tmp_path))
+    journal.begin("a.jpg", "bbox", 0)
+    journal.record("a.jpg", "bbox", AddBox(0, BOX))
+    journal.saved(journal.checkpoint("a.jpg", "bbox", 1))
+    journal.record("a.jpg", "bbox", AddBox(1, BOX))
+
+    journal = reopen(journal, str(tmp_path))
+    assert journal.recovered == [("a.jpg", "bbox")]
+    store = BoxStore()
+    store.append(BOX)  # 저장된 라벨 파일 상태
+    replay(journal.begin("a.jpg", "bbox", 1), store)
+    assert list(store) == [BOX, BOX]
+    journal.close()
+
+
+def test_edits_before_unfinished_save_are_recovered(tmp_path):
+    journal = AnnotationJournal(str(tmp_path))
+    journal.begin("a.jpg", "bbox", 0)
+    journal.record("a.jpg", "bbox", AddBox(0, BOX))
+    journal.saved(journal.checkpoint("a.jpg", "bbox", 1))
+    journal.record("a.jpg", "bbox", AddBox(1, BOX))
+    journal.checkpoint("a.jpg", "bbox", 2)  # 디스크에 기록되기 전에 중단
+
+    journal = reopen(journal, str(tmp_path))
+    store = BoxStore()
+    store.append(BOX)
+    replay(journal.begin("a.jpg", "bbox", 1), store)
+    assert list(store) == [BOX, BOX]
+    journal.close()
+
+
+def test_abandoned_edits_are_discarded(tmp_path):
+    journal = AnnotationJournal(str(tmp_path))
+    journal.begin("a.jpg", "bbox", 0)
+    journal.record("a.jpg", "bbox", AddBox(0, BOX))
+    journal.begin("b.jpg", "bbox", 0)  # 저장하지 않고 다음 이미지로 이동
+
+    journal.close()
+    assert os.path.getsize(journal.path) == 0  # 남은 편집이 없어 정리됨
+    journal = AnnotationJournal(str(tmp_path))
+    assert journal.recovered == []
+    journal.close()
+
+
+def test_recovered_entries_wait_until_visited(tmp_path):
+    journal = AnnotationJournal(str(tmp_path))
+    for image in ("a.jpg", "b.jpg"):
+        journal.begin(image, "bbox", 0)
+        journal.record(image, "bbox", AddBox(0, BOX))
+        journal.checkpoint(image, "bbox", 1)  # 기록되지 않은 저장
+
+    journal = reopen(journal, str(tmp_path))
+    assert sorted(journal.recovered) == [("a.jpg", "bbox"), ("b.jpg", "bbox")]
+    assert journal.begin("a.jpg", "bbox", 0) is not None
+    assert journal.begin("b.jpg", "bbox", 0) is not None
+    journal.close()
+
+
+def test_new_journal_starts_from_loaded_state(tmp_path):
+    # 저장 경로를 바꾸면 보고 있는 이미지를 다시 불러오지 않고 새 기록을 시작
+    old_dir, new_dir = tmp_path / "old", tmp_path / "new"
+    old_dir.mkdir()
+    new_dir.mkdir()
+    journal = AnnotationJournal(str(old_dir))
+    journal.begin("a.jpg", "bbox", 0)
+    journal.record("a.jpg", "bbox", AddBox(0, BOX))
+    journal.close()
+
+    journal = AnnotationJournal(str(new_dir))
+    assert journal.begin("a.jpg", "bbox", 1) is None
+    journal.record("a.jpg", "bbox", AddBox(1, BOX))
+
+    journal = reopen(journal, str(new_dir))
+    assert journal.recovered == [("a.jpg", "bbox")]
+    store = BoxStore()
+    store.append(BOX)
+    replay(journal.begin("a.jpg", "bbox", 1), store)
+    assert list(store) == [BOX, BOX]
+    journal.close()
@@ -0,0 +1,78 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from annotation_store import BoxStore, PolygonStore  # noqa: E402
+from spatial_index import SpatialIndex  # noqa: E402
+
+
+def make_boxes():
+    store = BoxStore()
+    store.extend([(0, 0, 10, 10, 0), (100, 100, 110, 110, 1), (200, 200, 210, 210, 2)])
+    return store
+
+
+def test_box_insert_and_pop():
+    store = make_boxes()
+    store.insert(1, (50, 50, 60, 60, 5))
+    assert store.class_ids.tolist() == [0, 5, 1, 2]
+    assert store.pop(0) == (0, 0, 10, 10, 0)
+    assert store.class_ids.tolist() == [5, 1, 2]
+    assert store[-1] == (200, 200, 210, 210, 2)
+
+
+def test_polygon_insert_and_pop_keep_offsets():
+    store = PolygonStore()
+    store.append([(0, 0), (1, 0), (1, 1)], 0)
+    store.append([(5, 5), (6, 5), (6, 6), (5, 6)], 1)
+    store.insert(1, [(2, 2), (3, 2), (3, 3), (2, 3), (2, 2.5)], 2)
+    assert store.offsets.tolist() == [0, 3, 8, 12]
+    assert store.class_ids.tolist() == [0, 2, 1]
+    points, class_id = store.pop(1)
+    assert class_id == 2 and len(points) == 5
+    assert store.offsets.tolist() == [0, 3, 7]
+    assert store.points(1).tolist() == [[5, 5], [6, 5], [6, 6], [5, 6]]
+
+
+def test_polygon_extend_flat_after_existing():
+    store = PolygonStore()
+    store.append([(0, 0), (1, 0), (1, 1)], 0)
+    vertices = np.array([(9, 9), (10, 10), (11, 10), (11, 11), (20, 20), (21, 20), (21, 21)], dtype=np.float32)
+    store.extend_flat(vertices, [1, 4, 7], [3, 4])  # 시작 위치가 0이 아닌 구간
+    assert store.offsets.tolist() == [0, 3, 6, 9]
+    assert store.class_ids.tolist() == [0, 3, 4]
+    assert store.points(1).tolist() == [[10, 10], [11, 10], [11, 11]]
+
+
+def test_spatial_index_follows_pop_and_insert():
+    store = make_boxes()
+    index = SpatialIndex(cell_size=64)
+    index.sync(store)
+    assert index.query(105, 105) == [1]
+
+    store.pop(0)  # 뒤의 박스가 한 칸씩 당겨짐
+    index.sync(store)
+    assert index.query(5, 5) == []
+    assert index.query(105, 105) == [0]
+    assert index.query(205, 205) == [1]
+
+    store.insert(0, (0, 0, 10, 10, 0))  # 실행 취소처럼 되돌림
+    index.sync(store)
+    assert index.query(5, 5) == [0]
+    assert index.query(105, 105) == [1]
+    assert index.query(205, 205) == [2]
+
+
+def test_spatial_index_follows_polygon_truncate():
+    store = PolygonStore()
+    store.append([(0, 0), (10, 0), (10, 10)], 0)
+    store.append([(100, 100), (110, 100), (110, 110)], 1)
+    index = SpatialIndex(cell_size=64)
+    index.sync(store)
+    store.truncate(1)
+    index.sync(store)
+    assert index.query(105, 105) == []
+    assert index.query(5, 5) == [0]
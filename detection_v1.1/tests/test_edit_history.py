@@ -0,0 +1,80 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from annotation_store import BoxStore, PolygonStore  # noqa: E402
+from edit_history import (AddBox, AddPolygons, DeleteBox, EditHistory, command_from_record,  # noqa: E402
+                          command_to_record)
+
+BOX_A = (0.0, 0.0, 10.0, 10.0, 0)
+BOX_B = (20.0, 20.0, 30.0, 30.0, 1)
+
+
+def apply(history, store, command):
+    command.redo(store)
+    history.record(command)
+
+
+def test_add_box_undo_redo():
+    store, history = BoxStore(), EditHistory()
+    apply(history, store, AddBox(0, BOX_A))
+    apply(history, store, AddBox(1, BOX_B))
+    history.undo(store)
+    assert list(store) == [BOX_A]
+    history.redo(store)
+    assert list(store) == [BOX_A, BOX_B]
+    assert history.redo(store) is None
+
+
+def test_delete_box_undo_restores_position():
+    store, history = BoxStore(), EditHistory()
+    store.extend([BOX_A, BOX_B])
+    apply(history, store, DeleteBox(0, store[0]))
+    assert list(store) == [BOX_B]
+    history.undo(store)
+    assert list(store) == [BOX_A, BOX_B]
+    history.redo(store)
+    assert list(store) == [BOX_B]
+
+
+def test_add_polygons_undo_redo():
+    store, history = PolygonStore(), EditHistory()
+    store.append([(0, 0), (1, 0), (1, 1)], 0)
+    vertices = [(5, 5), (6, 5), (6, 6), (8, 8), (9, 8), (9, 9), (8, 9)]
+    apply(history, store, AddPolygons(len(store), vertices, [0, 3, 7], [1, 2]))
+    assert store.offsets.tolist() == [0, 3, 6, 10]
+    history.undo(store)
+    assert len(store) == 1 and store.offsets.tolist() == [0, 3]
+    history.redo(store)
+    assert store.class_ids.tolist() == [0, 1, 2]
+    np.testing.assert_array_equal(store.points(2), np.array(vertices[3:], dtype=np.float32))
+
+
+def test_new_edit_discards_redo():
+    store, history = BoxStore(), EditHistory()
+    apply(history, store, AddBox(0, BOX_A))
+    history.undo(store)
+    apply(history, store, AddBox(0, BOX_B))
+    assert history.redo(store) is None
+    assert list(store) == [BOX_B]
+
+
+def test_memory_limit_drops_oldest():
+    store, history = BoxStore(), EditHistory(max_bytes=1)
+    apply(history, store, AddBox(0, BOX_A))
+    apply(history, store, AddBox(1, BOX_B))
+    assert len(history) == 1  # 마지막 명령은 항상 남김
+    history.undo(store)
+    assert history.undo(store) is None
+    assert list(store) == [BOX_A]
+
+
+def test_command_record_round_trip():
+    command = AddPolygons(2, [(0, 0), (1, 0), (1, 1)], [0, 3], [4])
+    restored = command_from_record(command_to_record(command))
+    assert isinstance(restored, AddPolygons) and restored.index == 2
+    np.testing.assert_array_equal(restored.vertices, command.vertices)
+    assert restored.class_ids.tolist() == [4]
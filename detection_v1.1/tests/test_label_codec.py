@@ -0,0 +1,53 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from annotation_store import BoxStore, PolygonStore  # noqa: E402
+from label_codec import format_boxes, format_polygons, parse_boxes, parse_polygons  # noqa: E402
+
+WIDTH, HEIGHT = 640, 480
+
+
+def test_boxes_round_trip():
+    store = BoxStore()
+    store.extend([(10, 20, 110, 220, 0), (300, 40, 639, 479, 3)])
+    text = format_boxes(store.normalized(WIDTH, HEIGHT), store.class_ids)
+    assert text.splitlines()[0] == "0 0.093750 0.250000 0.156250 0.416667"
+    # 불러올 때 정수 픽셀로 잘라내므로 (기존 동작) 1픽셀 이내로 복원
+    np.testing.assert_allclose(parse_boxes(text, WIDTH, HEIGHT), store.array, atol=1)
+
+
+def test_polygons_round_trip():
+    store = PolygonStore()
+    store.append([(10, 10), (100, 10), (100, 50)], 1)
+    store.append([(0, 0), (640, 0), (640, 480), (0, 480)], 2)
+    text = format_polygons(store.normalized(WIDTH, HEIGHT), store.offsets, store.class_ids)
+    vertices, offsets, class_ids = parse_polygons(text, WIDTH, HEIGHT)
+    np.testing.assert_allclose(vertices, store.vertices, atol=1e-3)
+    assert offsets.tolist() == [0, 3, 7]
+    assert class_ids.tolist() == [1, 2]
+
+
+def test_malformed_box_lines_are_skipped():
+    text = "0 0.5 0.5 0.5 0.5\n\nbad line here x y\n1 0.5 0.5\n2 0.25 0.25 0.5 0.5\n"
+    boxes = parse_boxes(text, WIDTH, HEIGHT)
+    assert boxes[:, 4].tolist() == [0, 2]
+    assert boxes[1, :4].tolist() == [0, 0, 320, 240]
+
+
+def test_malformed_polygon_lines_are_skipped():
+    # 꼭지점 3개 미만인 줄, 숫자가 아닌 줄은 건너뛰고 짝이 맞지 않는 마지막 좌표는 버림
+    text = "0 0.1 0.1 0.2 0.2\n1 0 0 1 0 1 1 0.5\nabc 0 0 1 0 1 1\n"
+    vertices, offsets, class_ids = parse_polygons(text, WIDTH, HEIGHT)
+    assert class_ids.tolist() == [1]
+    assert offsets.tolist() == [0, 3]
+    assert vertices.tolist() == [[0, 0], [640, 0], [640, 480]]
+
+
+def test_empty_text():
+    assert parse_boxes("", WIDTH, HEIGHT).shape == (0, 5)
+    vertices, offsets, class_ids = parse_polygons("", WIDTH, HEIGHT)
+    assert len(vertices) == 0 and offsets.tolist() == [0] and len(class_ids) == 0
@@ -0,0 +1,57 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prelabel import box_iou, empty_prediction, merge_predictions, proposals_to_polygons, tile_origins  # noqa: E402
+
+
+def prediction(boxes):
+    result = empty_prediction()
+    result['boxes'] = np.array(boxes, dtype=np.float32).reshape(-1, 6)
+    return result
+
+
+def test_tile_origins_cover_length():
+    assert tile_origins(500, 640, 0.2) == [0]
+    origins = tile_origins(1500, 640, 0.2)
+    assert origins[0] == 0 and origins[-1] == 1500 - 640
+    assert all(b - a <= 640 for a, b in zip(origins, origins[1:]))
+
+
+def test_box_iou():
+    iou = box_iou([[0, 0, 10, 10]], [[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]])
+    np.testing.assert_allclose(iou, [[1.0, 1 / 3, 0.0]])
+
+
+def test_merge_shifts_and_removes_duplicates():
+    # 겹치는 두 타일에서 같은 객체가 검출됨
+    left = prediction([[500, 100, 600, 200, 0, 0.9]])
+    right = prediction([[100, 100, 200, 200, 0, 0.8], [10, 10, 20, 20, 1, 0.7]])
+    merged = merge_predictions([left, right], [(0, 0), (400, 0)], iou_threshold=0.45)
+    assert merged['boxes'][:, 4].tolist() == [0, 1]
+    assert merged['boxes'][0, :4].tolist() == [500, 100, 600, 200]
+    assert merged['boxes'][1, :4].tolist() == [410, 10, 420, 20]
+
+
+def test_merge_removes_fragment_cut_at_tile_edge():
+    whole = prediction([[100, 100, 300, 200, 2, 0.9]])
+    fragment = prediction([[0, 100, 60, 200, 2, 0.6]])  # 이미지 좌표 240~300 조각
+    merged = merge_predictions([whole, fragment], [(0, 0), (240, 0)], iou_threshold=0.45)
+    assert len(merged['boxes']) == 1
+
+
+def test_merge_keeps_other_classes():
+    a = prediction([[0, 0, 100, 100, 0, 0.9]])
+    b = prediction([[0, 0, 100, 100, 1, 0.8]])
+    merged = merge_predictions([a, b], [(0, 0), (0, 0)], iou_threshold=0.45)
+    assert sorted(merged['boxes'][:, 4].tolist()) == [0, 1]
+
+
+def test_proposals_without_outlines_use_box_rectangle():
+    result = prediction([[0, 0, 10, 20, 3, 0.9]])
+    vertices, offsets, class_ids = proposals_to_polygons(result, np.array([True]))
+    assert vertices.tolist() == [[0, 0], [10, 0], [10, 20], [0, 20]]
+    assert offsets.tolist() == [0, 4] and class_ids.tolist() == [3]
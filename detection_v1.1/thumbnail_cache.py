@@ -0,0 +1,141 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from bmp_loader import map_bmp
+from save_queue import atomic_write
+
+THUMBNAIL_SIZE = (96, 72)  # 썸네일 최대 크기 (width, height)
+
+
+def make_thumbnail(src_path, cache_path, size):
+    """(작업 프로세스에서 실행) 1/8 축소 디코딩으로 썸네일을 만들어 디스크 캐시에 저장하고 반환
+
+    비압축 BMP는 메모리 맵에서 바로 축소하므로 원본 크기 배열을 만들지 않는다.
+    """
+    image = map_bmp(src_path) if src_path.lower().endswith('.bmp') else None
+    if image is None:
+        image = cv2.imdecode(np.fromfile(src_path, dtype=np.uint8), cv2.IMREAD_REDUCED_COLOR_8)
+    if image is None:
+        raise ValueError(f"이미지를 읽을 수 없습니다: {src_path}")
+    h, w = image.shape[:2]
+    ratio = min(size[0] / w, size[1] / h, 1.0)
+    thumbnail = cv2.resize(image, (max(1, int(w * ratio)), max(1, int(h * ratio))),
+                           interpolation=cv2.INTER_AREA)
+    is_success, buffer = cv2.imencode('.jpg', thumbnail, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    if is_success:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        atomic_write(cache_path, buffer.tobytes())
+    return thumbnail
+
+
+class ThumbnailCache:
+    """이미지 썸네일을 프로세스 풀에서 만들고 디스크와 메모리에 보관하는 클래스
+
+    디스크 캐시 파일 이름은 (경로, 파일 크기, 수정 시간, 썸네일 크기)의 해시이므로
+    원본이 바뀌면 자동으로 다시 만든다. UI 스레드에서는 작은 썸네일 파일만 읽고,
+    원본 디코딩은 항상 작업 프로세스에서 한다.
+    """
+    def __init__(self, cache_dir, size=THUMBNAIL_SIZE, workers=None, max_items=1024):
+        self.cache_dir = cache_dir
+        self.size = size
+        self.workers = workers or max(1, min(4, (os.cpu_count() or 2) // 2))
+        self.max_items = max_items
+        self._memory = OrderedDict()  # 캐시 키 -> 썸네일 (BGR), 오래 사용하지 않은 순
+        self._pending = {}  # 원본 경로 -> (캐시 키, Future)
+        self._failed = set()  # 만들 수 없었던 캐시 키 (다시 시도하지 않음)
+        self._ready = []  # 마지막 poll 이후 완성된 원본 경로
+        self._lock = threading.Lock()
+        self._executor = None  # 처음 요청할 때 생성
+
+    def cache_key(self, path):
+        """원본 파일의 캐시 키와 디스크 캐시 경로 (파일이 없으면 None)"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        source = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|{self.size[0]}x{self.size[1]}"
+        key = hashlib.sha1(source.encode('utf-8')).hexdigest()
+        return key, os.path.join(self.cache_dir, key[:2], key + '.jpg')
+
+    def get(self, path):
+        """메모리나 디스크에 있는 썸네일 반환 (없으면 None - request로 만들기를 요청)"""
+        cached = self.cache_key(path)
+        if cached is None:
+            return None
+        key, cache_path = cached
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        if os.path.exists(cache_path):
+            thumbnail = cv2.imdecode(np.fromfile(cache_path, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if thumbnail is not None:
+                self._store(key, thumbnail)
+                return thumbnail
+        return None
+
+    def request(self, paths):
+        """paths 중 썸네일이 없는 것을 만들도록 요청하고, 더 이상 필요 없는 대기 작업은 취소"""
+        wanted = set(paths)
+        with self._lock:
+            for path in [p for p in self._pending if p not in wanted]:
+                if self._pending[path][1].cancel():
+                    del self._pending[path]
+        for path in paths:
+            if path in self._pending:
+                continue
+            cached = self.cache_key(path)
+            if cached is None:
+                continue
+            key, cache_path = cached
+            with self._lock:
+                if key in self._memory or key in self._failed:
+                    continue
+            if os.path.exists(cache_path):
+                continue
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            future = self._executor.submit(make_thumbnail, path, cache_path, self.size)
+            with self._lock:
+                self._pending[path] = (key, future)
+            future.add_done_callback(lambda f, path=path, key=key: self._on_done(path, key, f))
+
+    def poll(self):
+        """마지막 호출 이후 썸네일이 완성된 원본 경로 목록"""
+        with self._lock:
+            ready, self._ready = self._ready, []
+        return ready
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _on_done(self, path, key, future):
+        with self._lock:
+            if self._pending.get(path, (None,))[0] == key:
+                del self._pending[path]
+        if future.cancelled():
+            return
+        try:
+            thumbnail = future.result()
+        except Exception as e:
+            print(f"썸네일 생성 중 오류 발생: {path}: {e}")
+            with self._lock:
+                self._failed.add(key)
+            return
+        self._store(key, thumbnail)
+        with self._lock:
+            self._ready.append(path)
+
+    def _store(self, key, thumbnail):
+        with self._lock:
+            self._memory[key] = thumbnail
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
@@ -0,0 +1,59 @@
+import os
+import struct
+
+import cv2
+import numpy as np
+
+BI_RGB = 0
+BI_BITFIELDS = 3
+_BGR_MASKS = (0x00FF0000, 0x0000FF00, 0x000000FF)  # BITFIELDS 중 BI_RGB와 같은 배치
+
+
+def map_bmp(path):
+    """비압축 24/32비트 BMP의 픽셀을 복사하지 않고 메모리 맵으로 여는 (H, W, 3) BGR 뷰
+
+    행 끝의 4바이트 정렬 여백은 잘라낸 뷰로, 아래에서 위로 저장된 행 순서는 음의 stride 뷰로
+    처리하므로 파일을 통째로 읽거나 디코딩하지 않는다. 페이지는 실제로 접근할 때 읽힌다.
+    반환된 배열은 읽기 전용이다. 지원하지 않는 형식(압축, 팔레트 등)이면 None.
+    """
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(66)
+    except OSError:
+        return None
+    if len(header) < 54 or header[:2] != b'BM':
+        return None
+    pixel_offset, dib_size = struct.unpack_from('<II', header, 10)
+    if dib_size < 40:
+        return None  # OS/2 BITMAPCOREHEADER
+    width, height, _, bits, compression = struct.unpack_from('<iiHHI', header, 18)
+    if bits not in (24, 32) or width <= 0 or height == 0:
+        return None
+    if compression == BI_BITFIELDS:
+        if bits != 32 or len(header) < 66 or struct.unpack_from('<III', header, 54) != _BGR_MASKS:
+            return None
+    elif compression != BI_RGB:
+        return None
+
+    channels = bits // 8
+    rows = abs(height)
+    stride = (width * bits + 31) // 32 * 4  # 행마다 4바이트 단위로 맞춰진 크기
+    if os.path.getsize(path) < pixel_offset + stride * rows:
+        return None  # 잘린 파일
+    data = np.memmap(path, dtype=np.uint8, mode='r', offset=pixel_offset, shape=(rows, stride))
+    pixels = data[:, :width * channels].reshape(rows, width, channels)
+    if height > 0:
+        pixels = pixels[::-1]  # 아래에서 위로 저장된 행 (일반적인 BMP)
+    return pixels[:, :, :3]
+
+
+def load_image(path):
+    """이미지를 BGR로 읽음 (비압축 BMP는 메모리 맵, 그 외는 디코딩 - 읽을 수 없으면 None)
+
+    한글 경로 처리를 위해 imread 대신 np.fromfile + imdecode를 사용한다.
+    """
+    if path.lower().endswith('.bmp'):
+        image = map_bmp(path)
+        if image is not None:
+            return image
+    return cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR)
@@ -2,6 +2,8 @@ import cv2
 import numpy as np
 import os
 
+from bmp_loader import load_image
+
 class ImageManager:
     """이미지 로딩, 리사이징, 저장을 담당하는 클래스"""
     def __init__(self, target_size=(800, 600)):
@@ -9,8 +11,8 @@ class ImageManager:
 
     def load_image(self, path):
         try:
-            # 한글 경로 처리를 위해 imdecode 사용
-            image = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR)
+            # 한글 경로 처리를 위해 imdecode 사용 (비압축 BMP는 메모리 맵에서 바로 리사이즈)
+            image = load_image(path)
             if image is None:
                 print(f"이미지를 읽을 수 없습니다: {path}")
                 return self._create_blank_image()